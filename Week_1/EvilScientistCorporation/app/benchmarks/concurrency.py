@@ -0,0 +1,82 @@
+# Benchmark: search latency under concurrent load, blocking vs async
+# Run it from the project root (uses the hash embedder unless you pass --real-embeddings):
+#   python -m app.benchmarks.concurrency --docs 200 --rounds 20
+#
+# "blocking" = what the routers used to do: call the sync search() straight from an async function,
+#              which blocks the event loop, so concurrent requests run one after another
+# "async"    = await asearch(), which runs the search on the vector executor
+#
+# For each concurrency level we fire that many searches at once (one "round"), and measure each request's latency
+# from the moment the round started until that request finished - so time spent waiting in line counts too
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.benchmarks.common import isolated_vector_store, percentile, use_fake_embeddings
+from app.services import vectordb_service
+from app.services.embedding_cache import query_embedding_cache
+
+
+async def blocking_search(query: str, collection: str):
+    return vectordb_service.search(query, k=3, collection=collection)
+
+
+async def async_search(query: str, collection: str):
+    return await vectordb_service.asearch(query, k=3, collection=collection)
+
+
+async def run_level(search_fn, concurrency: int, rounds: int, collection: str) -> dict:
+    latencies = []
+
+    async def timed(query: str, round_start: float):
+        await search_fn(query, collection)
+        latencies.append((time.perf_counter() - round_start) * 1000)
+
+    for round_number in range(rounds):
+        # Unique queries so every request pays for an embedding (no query-embedding cache hits)
+        queries = [f"evil gadget number {round_number}-{index}" for index in range(concurrency)]
+        round_start = time.perf_counter()
+        await asyncio.gather(*(timed(query, round_start) for query in queries))
+
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "mean_ms": round(statistics.mean(latencies), 3)
+    }
+
+
+async def run(doc_count: int, rounds: int, levels: list[int]) -> dict:
+    # Throwaway persist directory + collection so we never touch the real data
+    isolated_vector_store(vectordb_service, "concurrency_bench_")
+    collection = "concurrency_benchmark"
+    vectordb_service.ingest_items(
+        [{"id": f"doc_{index}", "text": f"Evil gadget {index}: a device for minor inconveniences"} for index in range(doc_count)],
+        collection=collection
+    )
+
+    report = {"docs": doc_count, "rounds": rounds, "vector_max_workers": vectordb_service.VECTOR_MAX_WORKERS, "results": {}}
+
+    for name, search_fn in [("blocking", blocking_search), ("async", async_search)]:
+        report["results"][name] = {}
+        for concurrency in levels:
+            query_embedding_cache.clear()
+            report["results"][name][str(concurrency)] = await run_level(search_fn, concurrency, rounds, collection)
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="p50/p99 search latency at different concurrency levels")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--real-embeddings", action="store_true", help="use the configured Ollama model instead of the hash embedder")
+    args = parser.parse_args()
+
+    if not args.real_embeddings:
+        use_fake_embeddings(vectordb_service)
+
+    print(json.dumps(asyncio.run(run(args.docs, args.rounds, args.concurrency)), indent=2))
@@ -0,0 +1,77 @@
+# Benchmark: per-turn overhead of the LangGraph checkpointers
+# Run it from the project root:
+#   python -m app.benchmarks.graph_checkpointer --threads 50 --turns 20
+#
+# The graph's only node echoes the query back (no LLM, no vector search), so the per-turn latency is
+# (almost) all checkpointer. Compares:
+#   - MemorySaver (what we had - keeps every checkpoint forever)
+#   - BoundedMemorySaver (in memory, pruned)
+#   - SQLiteCheckpointSaver with its background writer (what the app uses now)
+#   - SQLiteCheckpointSaver flushed after every turn (what a synchronous SQLite checkpointer would cost)
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.benchmarks.common import latency_summary
+from app.services.graph_memory import BoundedMemorySaver
+from app.services.sqlite_checkpointer import SQLiteCheckpointSaver
+from app.tests.graph_helpers import build_echo_graph
+
+
+# About the size of a short LLM answer
+def villain_answer(query: str) -> str:
+    return f"Muahaha, {query} " * 20
+
+
+async def bench(checkpointer, threads: int, turns: int, flush_every_turn: bool = False) -> dict:
+    graph = build_echo_graph(checkpointer, answer=villain_answer)
+    latencies = []
+    # Interleave the threads, like concurrent users would
+    for turn in range(turns):
+        for thread in range(threads):
+            start = time.perf_counter()
+            await graph.ainvoke({"query": f"scheme {turn}"}, config={"configurable": {"thread_id": f"user-{thread}"}})
+            if flush_every_turn:
+                checkpointer.flush()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    checkpoints = sum(len(checkpoints) for namespaces in checkpointer.storage.values() for checkpoints in namespaces.values())
+    return {**latency_summary(latencies), "checkpoints_in_memory": checkpoints, "blobs_in_memory": len(checkpointer.blobs)}
+
+
+async def run(threads: int, turns: int) -> dict:
+    results = {
+        "threads": threads,
+        "turns_per_thread": turns,
+        "memory_saver": await bench(MemorySaver(), threads, turns),
+        "bounded_memory_saver": await bench(BoundedMemorySaver(), threads, turns)
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, flush_every_turn in [("sqlite_write_behind", False), ("sqlite_flush_every_turn", True)]:
+            path = os.path.join(directory, f"{name}.db")
+            saver = SQLiteCheckpointSaver(graph="bench", path=path).open()
+            results[name] = await bench(saver, threads, turns, flush_every_turn)
+            saver.close()
+            results[name].update({
+                "flushes": saver.flushes,
+                "rows_written": saver.rows_written,
+                "db_kb": round(sum(os.path.getsize(os.path.join(directory, file)) for file in os.listdir(directory)
+                                   if file.startswith(name)) / 1024, 1)
+            })
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-turn overhead of MemorySaver vs the SQLite checkpointer")
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args.threads, args.turns)), indent=2))
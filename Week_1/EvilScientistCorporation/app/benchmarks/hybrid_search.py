@@ -0,0 +1,96 @@
+# Benchmark: dense-only vs hybrid (dense + BM25) search on exact-term queries
+# Run it from the project root (uses the hash embedder unless you pass --real-embeddings):
+#   python -m app.benchmarks.hybrid_search --docs 500 --queries 50
+#
+# Each synthetic chunk describes a gadget with a made-up codename. Each query asks about one codename,
+# so there's exactly one "right" chunk. We report recall@k (how often the right chunk shows up in the top k)
+# and the average latency for both modes.
+import argparse
+import json
+import random
+import statistics
+import time
+
+from app.benchmarks.common import isolated_vector_store, use_fake_embeddings
+from app.services import vectordb_service
+from app.services.embedding_cache import query_embedding_cache
+
+SYLLABLES = ["zor", "vex", "kra", "mul", "tig", "nox", "pra", "dru", "vel", "qua", "sni", "gor"]
+GADGETS = ["freeze ray", "shrink ray", "mind scrambler", "weather machine", "moon vaporizer", "robot army"]
+VERBS = ["deploy", "test", "upgrade", "hide", "sell", "dismantle"]
+
+
+def make_codename(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(3)).capitalize()
+
+
+# Build the corpus: every chunk mentions one unique codename, the rest of the text is very similar on purpose
+def make_corpus(doc_count: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    codenames = set()
+    while len(codenames) < doc_count:
+        codenames.add(make_codename(rng))
+
+    return [
+        {
+            "id": f"bench_{index}",
+            "text": (f"Project {codename}: the boss wants to {rng.choice(VERBS)} the {rng.choice(GADGETS)} "
+                     f"before the next full moon. Minions assigned to {codename} report to lab {rng.randint(1, 40)}."),
+            "metadata": {"codename": codename}
+        }
+        for index, codename in enumerate(sorted(codenames))
+    ]
+
+
+def run(doc_count: int, query_count: int, ks: list[int], seed: int) -> dict:
+    corpus = make_corpus(doc_count, seed)
+    targets = random.Random(seed + 1).sample(corpus, min(query_count, len(corpus)))
+
+    # Use a throwaway persist directory + collection so we never touch the real data
+    isolated_vector_store(vectordb_service, "hybrid_bench_")
+    collection = "hybrid_benchmark"
+    vectordb_service.ingest_items(corpus, collection=collection)
+
+    report = {"docs": len(corpus), "queries": len(targets), "modes": {}}
+
+    for mode in ["dense", "hybrid"]:
+        hits = {k: 0 for k in ks}
+        latencies = []
+
+        # Start each mode with a cold query-embedding cache so the latencies are comparable
+        query_embedding_cache.clear()
+
+        for target in targets:
+            query = f"What's the status of project {target['metadata']['codename']}?"
+
+            start = time.perf_counter()
+            results = vectordb_service.search(query, k=max(ks), collection=collection, mode=mode)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            result_ids = [item["id"] for item in results]
+            for k in ks:
+                if target["id"] in result_ids[:k]:
+                    hits[k] += 1
+
+        report["modes"][mode] = {
+            "recall_at_k": {str(k): round(hits[k] / len(targets), 4) for k in ks},
+            "mean_latency_ms": round(statistics.mean(latencies), 3),
+            "max_latency_ms": round(max(latencies), 3)
+        }
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare dense-only and hybrid search recall/latency")
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--real-embeddings", action="store_true", help="use the configured Ollama model instead of the hash embedder")
+    args = parser.parse_args()
+
+    if not args.real_embeddings:
+        use_fake_embeddings(vectordb_service)
+
+    print(json.dumps(run(args.docs, args.queries, args.k, args.seed), indent=2))
@@ -0,0 +1,109 @@
+# Offline retrieval benchmark suite - no Ollama needed (uses the deterministic hash embedder by default)
+# Run it from the project root:
+#   python -m app.benchmarks.retrieval --sizes 1000 10000 100000 --out retrieval_results.json
+#
+# For each corpus size it measures:
+#   - ingest_items throughput (docs/sec)
+#   - ingest_text throughput (chunks/sec) - includes chunking + NER, like the real endpoint
+#   - search latency (p50/p95/p99), dense and hybrid
+#   - on-disk size of the vector store
+# Results are written as JSON so runs can be diffed/compared
+import argparse
+import json
+import platform
+import time
+from datetime import datetime, timezone
+
+from app.benchmarks.common import (
+    directory_size, isolated_vector_store, latency_summary, make_corpus, make_queries, use_fake_embeddings
+)
+from app.services import vectordb_service
+from app.services.embedding_cache import model_name, query_embedding_cache
+
+
+def bench_ingest_items(corpus: list[str], collection: str) -> dict:
+    items = [{"id": f"doc_{index}", "text": text, "metadata": {"index": index}} for index, text in enumerate(corpus)]
+
+    start = time.perf_counter()
+    vectordb_service.ingest_items(items, collection=collection)
+    seconds = time.perf_counter() - start
+
+    return {"docs": len(items), "seconds": round(seconds, 3), "docs_per_sec": round(len(items) / seconds, 2)}
+
+
+def bench_ingest_text(corpus: list[str]) -> dict:
+    text = "\n\n".join(corpus)
+
+    start = time.perf_counter()
+    chunks = vectordb_service.ingest_text(text)
+    seconds = time.perf_counter() - start
+
+    return {"chars": len(text), "chunks": chunks, "seconds": round(seconds, 3), "chunks_per_sec": round(chunks / seconds, 2)}
+
+
+def bench_search(queries: list[str], collection: str, k: int, mode: str) -> dict:
+    # Cold cache so every query pays for its embedding, like a first-time query would
+    query_embedding_cache.clear()
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        vectordb_service.search(query, k=k, collection=collection, mode=mode)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return latency_summary(latencies)
+
+
+def run(sizes: list[int], query_count: int, k: int, seed: int, include_text: bool) -> dict:
+    report = {
+        "project": "EvilScientistCorporation",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "embedding": model_name(vectordb_service.EMBEDDING),
+        "backend": vectordb_service.DEFAULT_VECTOR_BACKEND,
+        "seed": seed,
+        "k": k,
+        "results": []
+    }
+
+    for size in sizes:
+        directory = isolated_vector_store(vectordb_service, f"retrieval_bench_{size}_")
+        corpus = make_corpus(size, seed)
+        queries = make_queries(corpus, query_count, seed)
+
+        result = {"size": size, "ingest_items": bench_ingest_items(corpus, "bench_items")}
+        result["search_dense"] = bench_search(queries, "bench_items", k, "dense")
+        result["search_hybrid"] = bench_search(queries, "bench_items", k, "hybrid")
+
+        if include_text:
+            result["ingest_text"] = bench_ingest_text(corpus)
+
+        result["disk_bytes"] = directory_size(directory)
+        report["results"].append(result)
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline ingest/search benchmark for the vector service")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backend", choices=["chroma", "numpy"], default=vectordb_service.DEFAULT_VECTOR_BACKEND)
+    parser.add_argument("--real-embeddings", action="store_true", help="use the configured Ollama model instead of the hash embedder")
+    parser.add_argument("--skip-ingest-text", action="store_true", help="skip ingest_text (it needs the spaCy model)")
+    parser.add_argument("--out", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    if not args.real_embeddings:
+        use_fake_embeddings(vectordb_service)
+    vectordb_service.DEFAULT_VECTOR_BACKEND = args.backend
+
+    results = run(args.sizes, args.queries, args.k, args.seed, include_text=not args.skip_ingest_text)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as out_file:
+            json.dump(results, out_file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,165 @@
+# Benchmark: routing accuracy + latency of the LangGraph routers on a labelled set of questions
+# Run it from the project root:
+#   python -m app.benchmarks.router                 (hash-based fake embeddings, no Ollama needed)
+#   python -m app.benchmarks.router --ollama        (the real nomic-embed-text embeddings)
+#   python -m app.benchmarks.router --ollama --llm  (also the agentic router's llama3.2 tool call)
+#
+# Compares:
+#   - keyword: the old route_node keyword lists
+#   - semantic: the centroid router on its own (always takes the top route)
+#   - semantic_keyword_fallback: what route_node does now
+#   - llm / semantic_llm_fallback (--llm): the old agentic router, and what agentic_router_node does now
+# NOTE: the hash-based embeddings only match on shared words, so the real embeddings are what count for accuracy
+import argparse
+import asyncio
+import json
+import time
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.benchmarks.common import latency_summary
+from app.services.embedding_cache import query_embedding_cache
+from app.services.fake_embeddings import HashEmbeddings
+from app.services.semantic_router import SemanticRouter, keyword_route
+
+# None of these are in ROUTE_EXAMPLES
+LABELLED_QUERIES: list[tuple[str, str]] = [
+    ("Which doomsday devices can I order today?", "items"),
+    ("Is the shrink ray on sale?", "items"),
+    ("How expensive is the volcano base kit?", "items"),
+    ("Recommend something to disable the city's power grid", "items"),
+    ("Do you have any robot minions available?", "items"),
+    ("What's the cheapest gadget in the catalog?", "items"),
+    ("I need a weapon that fits in my pocket", "items"),
+    ("Can I get a discount on the tsunami machine?", "items"),
+    ("What's the boss up to this week?", "plans"),
+    ("Explain the scheme to steal the moon", "plans"),
+    ("Which city will the boss attack first?", "plans"),
+    ("What's the timeline for the world domination project?", "plans"),
+    ("Who does the boss want to kidnap?", "plans"),
+    ("What's the next step in the master plan?", "plans"),
+    ("Did the boss change the plan after the hero escaped?", "plans"),
+    ("What's phase two of operation blackout?", "plans"),
+    ("Hello there!", "chat"),
+    ("Tell me something funny", "chat"),
+    ("How are you feeling today?", "chat"),
+    ("Thank you, that was useful", "chat"),
+    ("What's your favorite color?", "chat"),
+    ("Can you help me write an evil laugh?", "chat"),
+    ("Who are you?", "chat"),
+    ("Say something encouraging", "chat")
+]
+
+
+def accuracy(predictions: list[str]) -> float:
+    correct = sum(prediction == label for prediction, (_, label) in zip(predictions, LABELLED_QUERIES))
+    return round(correct / len(LABELLED_QUERIES), 4)
+
+
+def bench_keyword() -> dict:
+    predictions, latencies = [], []
+    for query, _ in LABELLED_QUERIES:
+        start = time.perf_counter()
+        predictions.append(keyword_route(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {"accuracy": accuracy(predictions), **latency_summary(latencies)}
+
+
+def bench_semantic(router: SemanticRouter) -> tuple[dict, dict, list[dict], list[float]]:
+    query_embedding_cache.clear() # every query pays for its embedding, like a first-time question would
+    decisions, latencies = [], []
+    for query, _ in LABELLED_QUERIES:
+        start = time.perf_counter()
+        decisions.append(router.classify(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    semantic = {"accuracy": accuracy([decision["route"] for decision in decisions]), **latency_summary(latencies)}
+    with_fallback = {
+        "accuracy": accuracy([
+            decision["route"] if decision["confident"] else keyword_route(query)
+            for decision, (query, _) in zip(decisions, LABELLED_QUERIES)
+        ]),
+        "fallback_rate": round(sum(not decision["confident"] for decision in decisions) / len(decisions), 4)
+    }
+    return semantic, with_fallback, decisions, latencies
+
+
+async def llm_route(llm_with_tools, query: str) -> str:
+    # Same prompt as agentic_router_node
+    response = await llm_with_tools.ainvoke([
+        SystemMessage(content=(
+            """
+            You are an internal agent that decides whether VectorDB retrieval is needed
+            If the User is asking about product, items, recs, prices, etc., use the "extract_items" tool
+            If the User is asking about their boss's evil plans or schemes, use the "extract_plans" tool
+            If the User is asking about items AND the boss's plans, use the "extract_both" tool
+            If neither applies, it's a general chat. DO NOT call a tool.
+            If you call a tool, call EXACTLY ONE tool.
+            """
+        )),
+        HumanMessage(content=query)
+    ])
+    if not response.tool_calls:
+        return "chat"
+    tool_routes = {"extract_items_tool": "items", "extract_plans_tool": "plans", "extract_both_tool": "both"}
+    return tool_routes.get(response.tool_calls[0]["name"], "chat")
+
+
+async def bench_llm(decisions: list[dict], semantic_latencies: list[float]) -> tuple[dict, dict]:
+    # Only imported for --llm (it needs Ollama + the rest of the app's dependencies)
+    from app.services.agentic_langgraph_service import llm_with_tools
+
+    predictions, latencies = [], []
+    for query, _ in LABELLED_QUERIES:
+        start = time.perf_counter()
+        predictions.append(await llm_route(llm_with_tools, query))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    # What agentic_router_node does now: the semantic route, or the LLM's answer where it wasn't confident
+    combined, combined_latencies = [], []
+    for decision, prediction, semantic_ms, llm_ms in zip(decisions, predictions, semantic_latencies, latencies):
+        combined.append(decision["route"] if decision["confident"] else prediction)
+        combined_latencies.append(semantic_ms if decision["confident"] else semantic_ms + llm_ms)
+
+    llm = {"accuracy": accuracy(predictions), **latency_summary(latencies)}
+    with_fallback = {
+        "accuracy": accuracy(combined),
+        "llm_calls": sum(not decision["confident"] for decision in decisions),
+        **latency_summary(combined_latencies)
+    }
+    return llm, with_fallback
+
+
+def run(use_ollama: bool, use_llm: bool) -> dict:
+    if use_ollama:
+        from langchain_community.embeddings import OllamaEmbeddings
+        embedding = OllamaEmbeddings(model="nomic-embed-text")
+    else:
+        embedding = HashEmbeddings()
+
+    router = SemanticRouter(embedding)
+    router.build()
+
+    semantic, semantic_keyword_fallback, decisions, semantic_latencies = bench_semantic(router)
+    results = {
+        "queries": len(LABELLED_QUERIES),
+        "embeddings": getattr(embedding, "model", type(embedding).__name__),
+        "centroid_build_ms": router.build_ms,
+        "keyword": bench_keyword(),
+        "semantic": semantic,
+        "semantic_keyword_fallback": semantic_keyword_fallback
+    }
+
+    if use_llm:
+        results["llm"], results["semantic_llm_fallback"] = asyncio.run(bench_llm(decisions, semantic_latencies))
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keyword vs semantic vs LLM routing")
+    parser.add_argument("--ollama", action="store_true", help="use the real nomic-embed-text embeddings")
+    parser.add_argument("--llm", action="store_true", help="also benchmark the llama3.2 tool-calling router")
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.ollama, args.llm), indent=2))
@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 from starlette.middleware.cors import CORSMiddleware
 from app.services.db_connection import Base, engine
@@ -12,17 +12,41 @@ from app.routers import chat
 from app.routers import vector_ops
 from app.routers import langgraph_ops
 from app.routers import sql_ops
+from app.services.llm_gateway import LLMOverloadedError, llm_gateway
+from app.services.metrics import RouteTagMiddleware, render_metrics
+from app.services.summary_cache import summary_cache
+from app.services.semantic_router import semantic_router
+from app.services.langgraph_service import langgraph
+from app.services.agentic_langgraph_service import agentic_graph
 
 Base.metadata.create_all(bind=engine)
 
 
-app = FastAPI()
+# Startup/shutdown logic for the app
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start summarizing the static files in the background, so /chat/plan-summary is ready before anyone asks
+    summary_cache.warm_up()
+    # Embed the LangGraph routers' example questions, so the first chat doesn't have to
+    semantic_router.warm_up()
+    # Open the LangGraph checkpoint file and start its writers here, not at import
+    langgraph.checkpointer.open()
+    agentic_graph.checkpointer.open()
+    yield
+    # Write out the LangGraph conversations that haven't been saved yet
+    langgraph.checkpointer.close()
+    agentic_graph.checkpointer.close()
+
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173"],  # Allow all origins (not recommended for production)
     allow_methods=["*"],  # Allow all HTTP methods
     allow_headers=["*"],  # Allow all headers
 )
+# Tags every LLM call with the route that made it, for the per-endpoint numbers in /metrics
+app.add_middleware(RouteTagMiddleware)
 
 #Setting CORS (Cross Origin Resource Sharing) policy 
 origins = ["*"] # Allow all origins (not recommended for production)
@@ -38,6 +62,15 @@ async def custom_http_exception_handler(request, exception: HTTPException):
         status_code=exception.status_code,
         content={"message": exception.detail},
     )
+# The shared LLM gateway is full - shed the request with a 503 and tell the client when to retry
+@app.exception_handler(LLMOverloadedError)
+async def llm_overloaded_exception_handler(request, exception: LLMOverloadedError):
+    return JSONResponse(
+        status_code=503,
+        content={"message": str(exception)},
+        headers={"Retry-After": str(exception.retry_after)},
+    )
+
 # Import routers here
 app.include_router(users.router)
 app.include_router(items.router)
@@ -46,6 +79,16 @@ app.include_router(vector_ops.router)
 app.include_router(langgraph_ops.router)
 app.include_router(sql_ops.router)
 
+# How busy the shared LLM gateway is (queue depth, wait times, shed/coalesced requests)
+@app.get("/llm-gateway")
+async def llm_gateway_stats():
+    return llm_gateway.stats()
+
+# LLM token counts + latency histograms per route, in Prometheus' text format (point a Prometheus scrape job here)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # Generic sample endpoint (GET request that just returns a message)
 @app.get("/")
 async def sample_endpoint():
@@ -1,12 +1,19 @@
 from typing import List
 
-from fastapi import APIRouter
-from langchain_community.document_loaders import TextLoader, CSVLoader
-from langchain_core.output_parsers import PydanticOutputParser
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 
 from app.models.item_model import ItemModel
-from app.services.chain_service import get_general_chain, get_memory_chain, get_sequential_chain, get_bad_word_filter_chain
+from app.services.chain_service import get_general_chain, get_memory_chain, get_sequential_chain, get_bad_word_filter_chain, \
+    get_pipelined_sequential_chain, is_forbidden, BLOCKED_MESSAGE, session_memory_store
+from app.services.content_filter import censor_stream
+from app.services.csv_context import build_csv_context
+from app.services.document_cache import document_cache
+from app.services.summary_cache import summary_cache
+from app.services.structured_output import StructuredOutputError, generate_structured, structured_metrics
+from app.services.streaming_service import sse_event, sse_response, stream_tokens
 
 #Typical Router setup
 router = APIRouter(
@@ -19,6 +26,10 @@ router = APIRouter(
 class ChatInputModel(BaseModel):
     input:str
 
+# The memory chat also needs to know WHICH conversation this message belongs to
+class MemoryChatInputModel(ChatInputModel):
+    session_id:str = "default"
+
 # Here's another short model that will help us format responses into Pydantic Lists
 class ItemListModel(BaseModel):
     items:list[ItemModel] # A list of our ItemModel from models/item_model.py
@@ -27,53 +38,67 @@ class ItemListModel(BaseModel):
 general_chain = get_general_chain()
 memory_chain = get_memory_chain()
 sequential_chain = get_sequential_chain()
+support_pipeline = get_pipelined_sequential_chain()
 transform_chain = get_bad_word_filter_chain()
+structured_chain = get_general_chain(structured_output=ItemListModel)
 
 # Generic chatbot-esque endpoint
 @router.post("/")
 async def general_chat(chat:ChatInputModel):
-    return general_chain.invoke(input={"input":chat.input})
+    return await general_chain.ainvoke(input={"input":chat.input})
 
 # DOCUMENT LOADING EXAMPLE: Endpoint that summarizes a .txt file
-@router.get("/plan-summary")
-async def summarize_plans():
-
-    # Load in .txt file
-    loader = TextLoader("app/files_to_load/boss_plans.txt")
-    docs = loader.load() # return a list of langchain Document objects
-
-    # Extract the text from the docs variable
-    evil_plans_text = docs[0].page_content
+# The file is static, so the summary is precomputed (at startup) and only redone when the file content changes
+async def summarize_boss_plans(evil_plans_text: str):
 
     # Invoke the LLM and give it another small prompt to summarize the boss's plans
-    return general_chain.invoke(
+    return await general_chain.ainvoke(
         {
             "input": f"Concisely summarize the following text from my boss: "
             f"{evil_plans_text}"
         }
     )
 
+# The summary cache loads the .txt file (through the document cache) and hashes it for us
+summary_cache.register("plan-summary", "app/files_to_load/boss_plans.txt", summarize_boss_plans)
+
+@router.get("/plan-summary")
+async def summarize_plans(response: Response):
+
+    # "fresh" = cached summary of the current file, "stale" = file changed and a refresh is running,
+    # "cold" = first summary ever, so we had to wait for it
+    summary, status = await summary_cache.get("plan-summary")
+    response.headers["X-Summary-Cache"] = status
+    return summary
+
+# Which summaries are cached, and for which version of their file
+@router.get("/summary-cache")
+async def summary_cache_stats():
+    return summary_cache.stats()
+
 # DOCUMENT LOADING EXAMPLE: Endpoint that lets user ask questions about a .csv file
 @router.post("/data-analysis")
 async def analyze_data(chat:ChatInputModel):
 
-    # Load in .csv file
-    loader = CSVLoader("app/files_to_load/sales_data.csv")
-    docs = loader.load()
-
-    # Convert the loaded documents into a single CSV string
-    sales_data_csv = "\n".join(doc.page_content for doc in docs)
+    # Instead of pasting every row of the .csv into the prompt, send a compact summary:
+    # only the relevant columns/rows, plus precomputed totals, averages and min/max
+    # (on a worker thread - matching rows still looks at every row, and a changed file gets re-parsed)
+    sales_data_context, _ = await run_in_threadpool(build_csv_context, "app/files_to_load/sales_data.csv", chat.input)
 
     # Invoke the LLM with another small prompt encouraging data analysis
-    return general_chain.invoke(
+    return (await general_chain.ainvoke(
         {
             "input": f"Answer the following question based on the provided sales data: "
                      f"{chat.input}"
-                     f"Here's the sales data: "
-                     f"{sales_data_csv}"
+                     f"Here's a summary of the sales data: "
+                     f"{sales_data_context}"
         }
-    ).content
+    )).content
 
+# How often the loaders above are served from memory vs read from disk
+@router.get("/document-cache")
+async def document_cache_stats():
+    return document_cache.stats()
 
 # OUTPUT PARSER EXAMPLE: An endpoint that sends item recs based on our Pydantic ItemModel
 # We're going to parse the LLM's output into a Pydantic model
@@ -103,37 +128,102 @@ async def get_item_recommendations(amount: int = 3):
     Return ONLY the JSON, no extra text.
     """
 
-    # Pydantic has its own output parser in LangChain
-    parser = PydanticOutputParser(pydantic_object=ItemListModel)
-
-    # This time, we'll actually save the response
-    response = general_chain.invoke({"input": rec_prompt})
+    # The structured chain constrains the LLM to ItemListModel's JSON schema,
+    # and generate_structured repairs small mistakes and regenerates (a limited number of times) if it still won't parse
+    try:
+        parsed_output = await generate_structured(structured_chain, {"input": rec_prompt}, ItemListModel)
+    except StructuredOutputError as error:
+        raise HTTPException(status_code=502, detail=str(error))
 
-    # Finally, parse the response into our Pydantic Model and return it!
-    parsed_output = parser.parse(response.content)
+    # Finally, return the parsed items!
     return parsed_output.items
 
+# How often the LLM's JSON needed repairs or retries, and how much time the retries cost
+@router.get("/recommendations/metrics")
+async def recommendation_metrics():
+    return structured_metrics.stats()
+
 # MEMORY EXAMPLE - This endpoint uses our memory chain for better conversational memory 
+# Each session_id gets its own memory, so different users (or browser tabs) don't share one conversation
 @router.post("/memory-chat")
+async def chat_with_memory(chat:MemoryChatInputModel, background_tasks:BackgroundTasks):
+
+    # The session's summary + recent messages - no LLM call needed to get these
+    history = session_memory_store.history(chat.session_id)
+
+    response = await memory_chain.ainvoke({"history": history, "input": chat.input})
+    session_memory_store.add_turn(chat.session_id, chat.input, response.content)
 
-async def chat_with_memory(chat:ChatInputModel):
-    # That's it! The chain will remember the last "k" interactions automatically
-    # Note we use "run" instead of invoke 
-    return memory_chain.invoke(input=chat.input)
+    # Summarizing older messages happens AFTER the response is sent (FastAPI runs background tasks once it's out)
+    background_tasks.add_task(session_memory_store.maybe_compact, chat.session_id)
+
+    # Same keys the old ConversationChain returned (the frontend reads "response")
+    return {"input": chat.input, "history": history, "response": response.content, "session_id": chat.session_id}
 
 # USING OUR SEQUENTIAL CHAIN
 @router.post("/support-chat")
 async def customer_support_chat(chat:ChatInputModel):
     # Another one liner - same user behavior as general chat,
     # Just using a different chain
-    return sequential_chain.invoke(input={"input":chat.input})
+    return await sequential_chain.ainvoke(input={"input":chat.input})
 
 # USING OUR TRANSFORM CHAIN 
 @router.post("/censorted-chat")
 async def censored_chat(chat:ChatInputModel):
 
     # Another basic one liner, just using a different chain
-    return transform_chain.invoke(input={"input":chat.input})
+    # ainvoke runs the filter's async path, so the event loop isn't blocked while the LLM answers
+    return await transform_chain.ainvoke(input={"input":chat.input})
+
+
+# STREAMING VARIANTS - same chains as above, but the answer is sent token by token (Server-Sent Events)
+# Each message is "data: {"token": "..."}", and a final "event: done" message reports ttft_ms/total_ms
+# The non-streaming routes above still work exactly the same
+
+@router.post("/stream")
+async def general_chat_stream(chat:ChatInputModel):
+    # astream() yields message chunks as soon as the model emits them
+    return sse_response(stream_tokens(general_chain.astream({"input":chat.input}), route="/chat/stream"))
+
+@router.post("/support-chat/stream")
+async def customer_support_chat_stream(chat:ChatInputModel):
+    # Pipelined: the draft streams out as "draft" events while it's written, then the refined answer streams as tokens
+    # The "done" event has per-stage timings (draft_ms, refine_ttft_ms, overlapped_ms...)
+    return sse_response(support_pipeline.astream_sse(chat.input))
+
+@router.post("/memory-chat/stream")
+async def chat_with_memory_stream(chat:MemoryChatInputModel):
+    # Same as /memory-chat: the session's history goes into the prompt, and the exchange is saved when we're done
+    history = session_memory_store.history(chat.session_id)
+
+    async def save_to_memory(answer: str):
+        session_memory_store.add_turn(chat.session_id, chat.input, answer)
+
+    tokens = memory_chain.astream({"history": history, "input": chat.input})
+    return sse_response(
+        stream_tokens(tokens, on_complete=save_to_memory, route="/chat/memory-chat/stream"),
+        background=BackgroundTask(session_memory_store.maybe_compact, chat.session_id) # runs after the stream ends
+    )
+
+# How many sessions are in memory, and how often they've been compacted/evicted
+@router.get("/memory-chat/sessions")
+async def memory_session_stats():
+    return session_memory_store.stats()
+
+@router.post("/censorted-chat/stream")
+async def censored_chat_stream(chat:ChatInputModel):
+
+    # Blocked inputs never reach the LLM - send the refusal as a single message
+    if is_forbidden(chat.input):
+        async def refusal():
+            yield sse_event({"token": BLOCKED_MESSAGE})
+            yield sse_event({"ttft_ms": 0.0, "total_ms": 0.0, "tokens": 1}, event="done")
+        return sse_response(refusal())
+
+    # The answer goes through the filter too, token by token - if the LLM starts writing a blocked term,
+    # the client gets the refusal instead (the partial term is held back, so it never leaks out)
+    tokens = censor_stream(general_chain.astream({"input":chat.input}), BLOCKED_MESSAGE)
+    return sse_response(stream_tokens(tokens, route="/chat/censorted-chat/stream"))
 
 
 # You can ignore this - I stole it from Shane for week 4 cuz I liked it
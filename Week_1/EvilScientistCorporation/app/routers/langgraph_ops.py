@@ -1,6 +1,9 @@
-from fastapi import APIRouter 
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from app.services.langgraph_service import langgraph
+from app.services.agentic_langgraph_service import agentic_graph
+from app.services.semantic_router import semantic_router
+from app.services.tracing import tracer
 
 router = APIRouter(
     prefix="/langgraph",
@@ -9,46 +12,92 @@ router = APIRouter(
 
 class ChatInputModel(BaseModel):
     input:str
+    # Each session gets its own LangGraph thread (its own message_memory)
+    session_id:str = "default"
 
 # Endpoint that invokes the graph in the langgraph service 
+# The graph nodes are async, so we await ainvoke (and the endpoint is async too)
 @router.post("/chat")
-def chat(chat: ChatInputModel):
+async def chat(chat: ChatInputModel):
     # We're going to add a config object to configure the "thread ID" for our memory
-    # NOTE: I'm just hardcoding this, realistically you'd pull a User ID, Session ID, etc. 
+    # The session ID is the thread ID, so every session has its own (bounded) conversation memory
     #result = langgraph.invoke({chat.input})
-    result = langgraph.invoke(
-        {"query": chat.input},
-        config={
-            "configurable": {"thread_id":"demo_thread"}
-        }
-    )
+    # The whole run is one trace - each node, search and LLM call inside it is a span (see tracing.py)
+    async with tracer.trace("chat", session_id=chat.session_id, query_chars=len(chat.input)) as trace:
+        result = await langgraph.ainvoke(
+            {"query": chat.input},
+            config={
+                "configurable": {"thread_id": chat.session_id}
+            }
+        )
     
     return {
         "route": result.get("route"),
         "answer": result.get("answer"),
         "sources": result.get("docs"),
-        "message_memory": result.get("message_memory")
+        "message_memory": result.get("message_memory"),
+        "session_id": chat.session_id,
+        "trace_id": trace["trace_id"]
     }
 
 
-# Endpoint that invokes the graph in the langgraph service 
+# Endpoint that invokes the graph in the agentic langgraph service 
 @router.post("/agent-chat")
-def agent_chat(chat: ChatInputModel):
+async def agent_chat(chat: ChatInputModel):
     # We're going to add a config object to configure the "thread ID" for our memory
-    # NOTE: I'm just hardcoding this, realistically you'd pull a User ID, Session ID, etc. 
+    # The session ID is the thread ID, so every session has its own (bounded) conversation memory
     #result = langgraph.invoke({chat.input})
-    result = langgraph.invoke(
-        {"query": chat.input},
-        config={
-            "configurable": {"thread_id":"demo_thread"}
-        }
-    )
+    async with tracer.trace("agent_chat", session_id=chat.session_id, query_chars=len(chat.input)) as trace:
+        result = await agentic_graph.ainvoke(
+            {"query": chat.input},
+            config={
+                "configurable": {"thread_id": chat.session_id}
+            }
+        )
     
     return {
         "route": result.get("route"),
         "answer": result.get("answer"),
         "sources": result.get("docs"),
-        "message_memory": result.get("message_memory")
+        "message_memory": result.get("message_memory"),
+        "session_id": chat.session_id,
+        "trace_id": trace["trace_id"]
     }
     
 
+
+# How many threads each graph's checkpointer holds, and how much it has pruned/evicted
+@router.get("/threads")
+async def thread_stats():
+    return {
+        "chat": langgraph.checkpointer.stats(),
+        "agent_chat": agentic_graph.checkpointer.stats()
+    }
+
+
+# How the semantic router has been deciding (and how often it had to fall back)
+@router.get("/router")
+async def router_stats():
+    return semantic_router.stats()
+
+
+# The most recent graph runs, newest first, with every node/search/LLM call they made and how long each took
+@router.get("/traces")
+async def recent_traces(limit: int = 20, graph: str | None = None):
+    return tracer.recent(limit, graph)
+
+
+# Per-node (and per-call) latency percentiles over the recent runs
+# NOTE: declared before /traces/{trace_id}, or "stats" would be taken for a trace ID
+@router.get("/traces/stats")
+async def trace_stats():
+    return tracer.stats()
+
+
+# One run's trace
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
@@ -53,7 +53,7 @@ async def usernames_chat(db: Session = Depends(get_db)):
     chain = get_general_chain()
 
     # invoke the chain with a prompt - this is RAG (Retrieval Augmented Generation).
-    response = chain.invoke({
+    response = await chain.ainvoke({
         "input": f"""Here's a list of innocent, harmless usernames {usernames}.
         Tell me a funny story involving at least 2 of the usernames."""
     })
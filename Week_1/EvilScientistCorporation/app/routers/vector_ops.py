@@ -1,9 +1,13 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
-from app.services.vectordb_service import ingest_items, search
-from typing import Any
+from typing import Any, Literal
 from app.services.chain_service import get_general_chain
-from app.services.vectordb_service import ingest_items, search, ingest_text, extract_entities
+# Async versions of the vector service functions, so Chroma/Ollama calls don't block the event loop
+from app.services.vectordb_service import asearch, aingest_text, aentities_for_results, aingest_items_batched, areingest_text, aget_query_embedding, run_in_vector_executor
+from app.services.vectordb_service import INGEST_BATCH_SIZE, INGEST_MAX_WORKERS, StreamingTextIngestor
+from app.services.embedding_cache import query_embedding_cache
+from app.services.text_chunking import TextTooLongError
+from app.services.answer_cache import answer_cache
  
 router = APIRouter(
     prefix="/vector-ops",
@@ -25,6 +29,7 @@ class IngestTextRequest(BaseModel):
 class SearchRequest(BaseModel):
     query: str
     k: int = 3
+    mode: Literal["dense", "hybrid"] = "dense" # hybrid = dense + BM25 keyword search
 
 # Importing the basic chainm for use in the LLM-powered endpoints
 chain = get_general_chain()
@@ -35,55 +40,123 @@ chain = get_general_chain()
 # Endpoint for raw data ingestion 
 @router.post("ingest-text")
 async def ingest_raw_text(request: IngestTextRequest):
-    count = ingest_text(request.text)
+    count = await aingest_text(request.text)
     return {"ingested chunks: ": count}
 
-# Endpoint for similarity search 
+# Incremental re-ingestion - send the FULL (edited) text, only the changed chunks get embedded
+# Returns how many chunks were added, kept as-is, and removed
+@router.post("/reingest-text")
+async def reingest_raw_text(request: IngestTextRequest):
+    return await areingest_text(request.text)
+
+# Streaming version of ingest-text for big documents
+# Send the raw text as the request body (e.g. Content-Type: text/plain), NOT wrapped in JSON.
+# The body is read piece by piece, chunked on the fly, and embedded in bounded batches
+# A paragraph (or a document without paragraph breaks) over STREAM_MAX_BUFFER_CHARS gets a 413 - use /ingest-text for it
+@router.post("/ingest-text-stream")
+async def ingest_raw_text_stream(request: Request, batch_size: int = INGEST_BATCH_SIZE):
+    ingestor = StreamingTextIngestor(batch_size=batch_size)
+
+    async for piece in request.stream():
+        # feed() may embed + write a batch, so keep that blocking work off the event loop
+        try:
+            await run_in_vector_executor(ingestor.feed, piece)
+        except TextTooLongError as error:
+            raise HTTPException(status_code=413, detail=f"{error} (already ingested: {ingestor.chunks_ingested} chunks)")
+
+    return await run_in_vector_executor(ingestor.finish)
+
+# Endpoint for bulk JSON ingestion 
+# batch_size and max_workers are optional query params so we can tune against our Ollama host
 @router.post("/ingest-items")
-async def ingest_json(items: list[IngestItem]):
+async def ingest_json(items: list[IngestItem], batch_size: int = INGEST_BATCH_SIZE, max_workers: int = INGEST_MAX_WORKERS):
     
-    # Call the service method to ingest items
-    count = ingest_items([item.model_dump() for item in items])
+    # Call the service method to ingest items in parallel batches
+    # The report includes per-batch throughput (docs/sec)
+    return await aingest_items_batched(
+        [item.model_dump() for item in items],
+        batch_size=batch_size,
+        max_workers=max_workers
+    )
+
 
-    return {"ingested": count}
 
+# Query-embedding cache stats (hits, misses, size, etc.)
+@router.get("/embedding-cache")
+async def embedding_cache_stats():
+    return query_embedding_cache.stats()
 
+# Flush the query-embedding cache - do this whenever the embedding model changes
+@router.delete("/embedding-cache")
+async def flush_embedding_cache(model: str | None = None):
+    return {"flushed": query_embedding_cache.clear(model)}
 
 @router.post("/search-items")
 async def items_similarity_search(request: SearchRequest):
-    return search(request.query, request.k)
+    return await asearch(request.query, request.k, mode=request.mode)
+
+# Semantic answer cache stats (hits, misses, invalidations)
+@router.get("/answer-cache")
+async def answer_cache_stats():
+    return answer_cache.stats()
 
 # Endpoint with LLM-powered response that uses the boss_plans collection 
+# X-Cache response header says whether the answer came from the semantic answer cache (HIT) or the LLM (MISS)
 @router.post("/search-plans")
-async def search_plans(request: SearchRequest):
-    result = search(request.query, request.k, collection="boss_plans")
+async def search_plans(request: SearchRequest, response: Response):
+    result = await asearch(request.query, request.k, collection="boss_plans", mode=request.mode)
+
+    # Check the semantic cache - same retrieved chunks + a similar enough question = same answer
+    # (the query vector normally comes straight out of the embedding cache, asearch() just put it there -
+    # but if it's been evicted that means an Ollama call, so it goes through the vector executor too)
+    query_vector = await aget_query_embedding(request.query)
+    chunk_ids = [item["id"] for item in result]
+
+    cached_answer = answer_cache.lookup("search-plans", query_vector, chunk_ids)
+    if cached_answer is not None:
+        response.headers["X-Cache"] = "HIT"
+        return cached_answer
 
     # Really quick prompt that tells the LLM the returned results 
     # and asks for it to answer the user based on those results 
+    # Only the chunk TEXT goes in - not the ids, scores or stored entities (only /ner-search-plans needs those)
+    extracted_info = "\n\n".join(item["text"] for item in result)
 
     prompt = (
         "Based on the following extracted info from a boss's evil plans,"
         "Answer the user's query to the best of your ability."
         "If there's no relevant information stored, you can say that."
-        f"Extracted info: {result}"
+        f"Extracted info: {extracted_info}"
         f"USer query: {request.query}"
     )
 
     # Invoke our general chain from chain_service 
-    return chain.invoke({"input": prompt})
+    answer = await chain.ainvoke({"input": prompt})
+
+    answer_cache.store("search-plans", "boss_plans", query_vector, chunk_ids, answer)
+    response.headers["X-Cache"] = "MISS"
+    return answer
 
 # Endpoint that uses NER to extract entities from our "boss-plans" collection
 @router.post("/ner-search-plans")
-async def ner_search_plans(request: SearchRequest):
+async def ner_search_plans(request: SearchRequest, response: Response):
 
     # Extract search results from vector DB as usual 
-    result = search(request.query, request.k, collection="boss_plans")
+    result = await asearch(request.query, request.k, collection="boss_plans", mode=request.mode)
+
+    # Same semantic cache check as search-plans (separate namespace since the prompt is different)
+    query_vector = await aget_query_embedding(request.query)
+    chunk_ids = [item["id"] for item in result]
 
-    # Combine the text content from the results to feed into the NER model 
-    combined_text = " ".join(item["text"] for item in result)
+    cached_answer = answer_cache.lookup("ner-search-plans", query_vector, chunk_ids)
+    if cached_answer is not None:
+        response.headers["X-Cache"] = "HIT"
+        return cached_answer
 
-    # Collect the extracted entities from the model 
-    entities = extract_entities(combined_text)
+    # Collect the entities for the retrieved chunks
+    # These were extracted at ingest time and stored with each chunk, so no NER model run here
+    # (older chunks without stored entities still get run through the model, in one batch)
+    entities = await aentities_for_results(result)
 
     # FOR NOW: just return the entities 
     # return {
@@ -101,5 +174,8 @@ async def ner_search_plans(request: SearchRequest):
         f"User query: {request.query}"
     )
 
-    return chain.invoke({"input": prompt})
+    answer = await chain.ainvoke({"input": prompt})
 
+    answer_cache.store("ner-search-plans", "boss_plans", query_vector, chunk_ids, answer)
+    response.headers["X-Cache"] = "MISS"
+    return answer
\ No newline at end of file
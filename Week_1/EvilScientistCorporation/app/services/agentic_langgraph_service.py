@@ -16,26 +16,39 @@ The chat nodes pretty much stay the same
 from typing import TypedDict, Any, Annotated
 
 from langchain_core.messages import BaseMessage
-from langchain_ollama import ChatOllama
-from langgraph.graph import add_messages, StateGraph
+from langgraph.graph import StateGraph
 from langchain_core.tools import tool
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
-from langgraph.checkpoint.memory import MemorySaver
-from app.services.vectordb_service import search
-
-llm = ChatOllama(
-    model="llama3.2:3b", # The model we're using (we installed llama3.2:3b)
-    temperature=0.2 # Temp goes from 0-1. Higher temp = more creativity
+from app.services.graph_memory import bounded_add_messages, format_memory
+from app.services.sqlite_checkpointer import SQLiteCheckpointSaver
+from app.services.vectordb_service import asearch
+from app.services.llm_gateway import get_llm
+from app.services.metrics import llm_metrics_callback
+from app.services.semantic_router import is_items_plans_tie, semantic_router
+from app.services.fanout_retrieval import fanout_search
+from app.services.tracing import traced, traced_node
+
+# get_llm() gives us a ChatOllama (llama3.2:3b) that goes through the shared LLM gateway (see llm_gateway.py),
+# so every LLM call in the app shares one concurrency limit
+# llm_metrics_callback records each call's tokens and latency for GET /metrics (see metrics.py)
+llm = get_llm(
+    temperature=0.2, # Temp goes from 0-1. Higher temp = more creativity
+    callbacks=[llm_metrics_callback]
 )
 
+# The calls the nodes and tools make, wrapped so every call shows up as a span in the run's trace (see tracing.py)
+traced_classify = traced("router.classify", "router", semantic_router.aclassify)
+traced_search = traced("vector.search", "vector", asearch)
+traced_llm = traced("llm", "llm", llm.ainvoke)
+
 # Same state as the old service
 class GraphState(TypedDict, total=False): #total=False makes all fields optional
     query: str
     route: str
     docs: list[dict[str, Any]]
     answer: str
-    # with add_messages reducer 
-    message_memory: Annotated[list[BaseMessage], add_messages]
+    # with the bounded add_messages reducer (see graph_memory.py)
+    message_memory: Annotated[list[BaseMessage], bounded_add_messages]
 
 # TOOLS --------------------------------
 # The agentic route node will use one or none of these based on the User's query 
@@ -43,26 +56,35 @@ class GraphState(TypedDict, total=False): #total=False makes all fields optional
 # IMPORTANT: Each tool needs '''docstrings''' to describe what they do for the agent 
 
 @tool(name_or_callable="extract_items_tool")
-def extract_items_tool(query: str) -> list[dict[str, Any]]:
+async def extract_items_tool(query: str) -> list[dict[str, Any]]:
     """
     Based on the user's input, the "query" arg, do a semantic search.
-    Retrieve relevant docs on the boss's plans/schemes based on the boss_plans vectorDB collection.
+    Retrieve relevant docs on products/items (prices, recommendations) based on the evil_items vectorDB collection.
     """
-    return search(query, k=5, collection="evil_items")
+    return await traced_search(query, k=5, collection="evil_items")
 
 @tool(name_or_callable="extract_plans_tool")
-def extract_plans_tool(query: str) -> list[dict[str, Any]]:
+async def extract_plans_tool(query: str) -> list[dict[str, Any]]:
     """
     Based on the user's input, the "query" arg, do a semantic search.
     Retrieve relevant docs on the boss's plans/schemes based on the boss_plans vectorDB collection.
     """
 
-    return search(query, k=5, collection="boss_plans")
+    return await traced_search(query, k=5, collection="boss_plans", mode="hybrid")
+
+@tool(name_or_callable="extract_both_tool")
+async def extract_both_tool(query: str) -> list[dict[str, Any]]:
+    """
+    Based on the user's input, the "query" arg, search BOTH the evil_items and boss_plans vectorDB collections.
+    Use this when the question is about products/items AND the boss's plans/schemes.
+    """
+    # Both searches run at the same time, and the merged results get the same k=5 budget (see fanout_retrieval.py)
+    return await fanout_search(query, traced_search)
 
 # Some variables that will help us make the agent aware of the tools 
 
 # List of the available tools
-TOOLS = [extract_items_tool, extract_plans_tool]
+TOOLS = [extract_items_tool, extract_plans_tool, extract_both_tool]
 
 # Map tool names to their functions in a scalable way 
 # We need this to call tools by their name in the agentic router node 
@@ -71,24 +93,48 @@ TOOL_MAP = {tool.name: tool for tool in TOOLS}
 
 # Get a version of the LLM that is aware of its toolbox 
 llm_with_tools = llm.bind_tools(TOOLS)
+traced_llm_with_tools = traced("llm.tool_choice", "llm", llm_with_tools.ainvoke)
 
 # NODES (including our agentic router)-----------------------------
 
+# Which tool each semantic route maps to ("chat" means no tool)
+ROUTE_TOOLS = {"items": "extract_items_tool", "plans": "extract_plans_tool"}
+
 # Here's the AGENT part - this routing node uses agentic AI to determine what tool to call, if any 
-def agentic_router_node(state: GraphState) -> GraphState:
+async def agentic_router_node(state: GraphState) -> GraphState:
     
     # Get the user's query from State 
     query = state.get("query", "")
 
+    # First ask the semantic router (an embedding + 3 dot products instead of an LLM call, see semantic_router.py)
+    # Only if it's too close to call do we spend an LLM call on the decision
+    decision = await traced_classify(query)
+    if decision["confident"]:
+        if decision["route"] == "chat":
+            return {"route": "chat"}
+        tool_name = ROUTE_TOOLS[decision["route"]]
+        return {
+            "route": "answer",
+            "docs": await TOOL_MAP[tool_name].ainvoke({"query": query})
+        }
+
+    # Torn between items and plans - no need to ask the LLM, just search both
+    if is_items_plans_tie(decision):
+        return {
+            "route": "answer",
+            "docs": await extract_both_tool.ainvoke({"query": query})
+        }
+
     # Using this different chat prompting style just cuz it looks cool 
     # Feel free to use the typical prompt string like we've been doing 
 
     messages = [
-        SystemMessage(concent=(
+        SystemMessage(content=(
             """
             You are an internal agent that decides whether VectorDB retrieval is needed
             If the User is asking about product, items, recs, prices, etc., use the "extract_items" tool
             If the User is asking about their boss's evil plans or schemes, use the "extract_plans" tool  
+            If the User is asking about items AND the boss's plans, use the "extract_both" tool
             If neither applies, it's a general chat. DO NOT call a tool.
             If you call a tool, call EXACTLY ONE tool.
             """
@@ -96,8 +142,8 @@ def agentic_router_node(state: GraphState) -> GraphState:
         HumanMessage(content=query)
     ]
 
-    #First LLM call to decide which tool to use 
-    agentic_response = llm_with_tools.invoke(messages)
+    # Fallback: an LLM call decides which tool to use 
+    agentic_response = await traced_llm_with_tools(messages)
 
     # If there was no tool call, route to general chat
     if not agentic_response.tool_calls:
@@ -105,10 +151,10 @@ def agentic_router_node(state: GraphState) -> GraphState:
     
     # if a tool WAS called, invoked it and store results and the appropriate route in State 
     tool_call = agentic_response.tool_calls[0] # We only expect one tool call 
-    tool_name = tool_call["tool_name"] # Extract the name of the tool that was called 
+    tool_name = tool_call["name"] # Extract the name of the tool that was called 
 
     # Finally, here's us actually invoking the tool by name 
-    results = TOOL_MAP[tool_name].invoke({"query": query})
+    results = await TOOL_MAP[tool_name].ainvoke({"query": query})
 
     # Automatically set the route to the answer_with_context node 
     return {
@@ -118,7 +164,7 @@ def agentic_router_node(state: GraphState) -> GraphState:
 
     # ANSWER WITH CONTEXT & GENERAL CHAT will stay the same as before :)
     # The node that answers the user's query based on docs retrieved from either "extract" node 
-def answer_with_context_node(state: GraphState) -> GraphState:
+async def answer_with_context_node(state: GraphState) -> GraphState:
     # This should be a pretty comfortable pattern - just talking to the LLM 
 
     #First, extract the query and docs from state
@@ -138,20 +184,20 @@ def answer_with_context_node(state: GraphState) -> GraphState:
     )
 
     # Invoke the LLM with the prompt
-    response = llm.invoke(prompt)
+    response = await traced_llm(prompt)
 
     # Return the answer, which also adds it to state 
     return {"answer": response}
 
 # Here's the fallback general chat node (invoked if no particular route is identified in the router node)
-def general_chat_node(state: GraphState) -> GraphState:
+async def general_chat_node(state: GraphState) -> GraphState:
 
     # Define the prompt 
     prompt = (
         f"""
         You are an internal assistant at the Evil Scientist Corp."
         You are pretty evil yourself, but still helpful.
-        You have context from previous interactions: \n{state.get("message_memory")}
+        You have context from previous interactions: \n{format_memory(state.get("message_memory"))}
         Answer the User's query based ONLY on the extracted data below."
         If the data doesn't help, say you don't know."
         User Query: \n{state.get("query", "")}
@@ -159,7 +205,7 @@ def general_chat_node(state: GraphState) -> GraphState:
     )
 
     # Storing the LLM response cuz I'm using it twice below
-    result = llm.invoke(prompt).content
+    result = (await traced_llm(prompt)).content
 
     # Invoke the LLM and return the response (which adds it to state too)
     return {"answer": result,
@@ -178,16 +224,17 @@ def build_agentic_graph():
 
     # Register each node within the graph 
     # NOTE: extract_items and extract_plans are TOOLS now, not nodes 
-    build.add_node("router", agentic_router_node)
-    build.add_node("answer", answer_with_context_node)
-    build.add_node("chat", general_chat_node)
+    # traced_node times every run of the node (and records the route it picked) in the current trace
+    build.add_node("router", traced_node("router", agentic_router_node))
+    build.add_node("answer", traced_node("answer", answer_with_context_node))
+    build.add_node("chat", traced_node("chat", general_chat_node))
 
     # Set our entry point node (the first one to invoke after a user query)
-    build.set_entrypoint("route")
+    build.set_entry_point("router")
 
     # After the router runs, conditionally choose the next node based on "route" in state 
     build.add_conditional_edges(
-        "route", # Based on the "route" state field...
+        "router", # After the router node, based on the "route" state field...
         lambda state: state["route"], # Get the route value from state
         {
             "answer": "answer", # If route=="answer", go to answer node
@@ -199,8 +246,8 @@ def build_agentic_graph():
     build.set_finish_point("answer")
     build.set_finish_point("chat")
 
-    # Finally, compile and return the graph, with a Memory Checkpointer
-    return build.compile(checkpointer=MemorySaver())
+    # Finally, compile and return the graph, with a (bounded, SQLite-backed) Checkpointer
+    return build.compile(checkpointer=SQLiteCheckpointSaver(graph="agent_chat"))
 
 # Create a singleton instance of the graph for use in the router endpoint 
 
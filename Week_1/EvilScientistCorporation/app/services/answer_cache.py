@@ -0,0 +1,115 @@
+# This service is a SEMANTIC response cache for our RAG endpoints
+# If someone asks (nearly) the same question and the vector search returns the same chunks,
+# the LLM would produce (nearly) the same answer - so we can skip the LLM call entirely
+import math
+import threading
+from collections import OrderedDict
+from typing import Any
+
+ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.95 # Min cosine similarity between query embeddings to count as "the same question"
+ANSWER_CACHE_MAX_ENTRIES = 256 # Oldest entries get dropped after this many
+
+
+def cosine_similarity(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(y * y for y in b))
+
+    if norm_a == 0 or norm_b == 0:
+        return 0.0
+
+    return dot / (norm_a * norm_b)
+
+
+class AnswerCache:
+    """
+    Caches LLM answers keyed by the query embedding plus the exact set of chunk IDs the search returned.
+    A lookup only hits if the retrieved chunks are identical AND the query is similar enough.
+    Writing to a collection invalidates every entry that was built from one of the written chunk IDs.
+    """
+
+    def __init__(self, threshold: float = ANSWER_CACHE_SIMILARITY_THRESHOLD, max_entries: int = ANSWER_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        # entry id -> entry dict. OrderedDict so we can drop the oldest entries first
+        self._entries: OrderedDict[int, dict[str, Any]] = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def lookup(self, namespace: str, query_vector: list[float], chunk_ids: list[str]) -> Any | None:
+        chunk_key = frozenset(chunk_ids)
+
+        with self._lock:
+            best_entry = None
+            best_score = self.threshold
+
+            for entry in self._entries.values():
+                # Different endpoint or different retrieved chunks? Not a candidate
+                if entry["namespace"] != namespace or entry["chunk_ids"] != chunk_key:
+                    continue
+
+                score = cosine_similarity(query_vector, entry["query_vector"])
+                if score >= best_score:
+                    best_entry, best_score = entry, score
+
+            if best_entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return best_entry["answer"]
+
+    def store(self, namespace: str, collection: str, query_vector: list[float], chunk_ids: list[str], answer: Any) -> None:
+        with self._lock:
+            self._entries[self._next_id] = {
+                "namespace": namespace,
+                "collection": collection,
+                "query_vector": query_vector,
+                "chunk_ids": frozenset(chunk_ids),
+                "answer": answer
+            }
+            self._next_id += 1
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # Call this whenever chunks get written to (or deleted from) a collection
+    # Any cached answer that used one of those chunks is stale now
+    def invalidate(self, collection: str, chunk_ids: list[str]) -> int:
+        changed = set(chunk_ids)
+
+        with self._lock:
+            stale = [
+                entry_id for entry_id, entry in self._entries.items()
+                if entry["collection"] == collection and not entry["chunk_ids"].isdisjoint(changed)
+            ]
+            for entry_id in stale:
+                del self._entries[entry_id]
+
+            self.invalidations += len(stale)
+
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+
+# Singleton instance shared by the vector service (invalidation) and the routers (lookup/store)
+answer_cache = AnswerCache()
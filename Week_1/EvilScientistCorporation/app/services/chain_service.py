@@ -1,17 +1,25 @@
-from langchain_classic.chains.conversation.base import ConversationChain
 from langchain_classic.chains.transform import TransformChain
-from langchain_classic.memory import ConversationBufferWindowMemory, ConversationSummaryMemory
+from langchain_classic.memory import ConversationBufferWindowMemory
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_ollama import ChatOllama
+from pydantic import BaseModel
+
+from app.services.content_filter import content_filter
+from app.services.llm_gateway import get_llm
+from app.services.metrics import llm_metrics_callback
+from app.services.session_memory import SessionMemoryStore
+from app.services.support_pipeline import SupportPipeline
 
 # This service module will store logic that returns chains
 # a chain in LangChain is just a sequence of actions/info that we send to an LLM
 # all in the hopes of getting an appropriate response
 
 # Define the LLM we're going to use
-llm = ChatOllama(
-    model="llama3.2:3b", # The model we're using (we installed llama3.2:3b)
-    temperature=0.2 # Temp goes from 0-1. Higher temp = more creativity
+# get_llm() gives us a ChatOllama (llama3.2:3b) that goes through the shared LLM gateway (see llm_gateway.py),
+# so every LLM call in the app shares one concurrency limit
+# llm_metrics_callback records each call's tokens and latency for GET /metrics (see metrics.py)
+llm = get_llm(
+    temperature=0.2, # Temp goes from 0-1. Higher temp = more creativity
+    callbacks=[llm_metrics_callback]
 )
 
 # Define the general prompt we'll send to the LLM (helps with tone and context)
@@ -24,31 +32,65 @@ prompt = ChatPromptTemplate.from_messages([
     ("user", "{input}")
 ])
 
+# What the censored chat says when the input is blocked
+BLOCKED_MESSAGE = "I won't talk about that forbidden language"
+
+# One general chain for the filter to share - building prompt | llm on every request is wasted work
+filter_general_chain = prompt | llm
+
+# True if the input mentions something we refuse to talk about (anything in the blocklist, see content_filter.py)
+# (shared by the TransformChain below and the streaming censored chat route)
+def is_forbidden(user_input: str) -> bool:
+    return content_filter.is_blocked(user_input)
+
 # Defining some filter logic for our TransformChain
 def bad_word_filter(inputs):
 
     # Capture the User's input as a string
     user_input = inputs["input"]
 
-    # If the input contains "javascript", block it. Otherwise, answer with general chat
-    if "javascript" in user_input.lower():
-        return {"output":"I won't talk about that forbidden language"}
-    else:
-        return {"output":get_general_chain().invoke(user_input)}
+    # If the input contains a blocked term, block it before the LLM ever sees it. Otherwise, answer with general chat
+    if is_forbidden(user_input):
+        return {"output":BLOCKED_MESSAGE}
+
+    response = filter_general_chain.invoke(user_input)
+
+    # The LLM can bring up a blocked term on its own - check its answer too
+    if is_forbidden(response.content):
+        return {"output":BLOCKED_MESSAGE}
+    return {"output":response}
+
+# Async version of the same filter - TransformChain uses this one for ainvoke(), so no thread is blocked on the LLM
+async def abad_word_filter(inputs):
+
+    user_input = inputs["input"]
+
+    if is_forbidden(user_input):
+        return {"output":BLOCKED_MESSAGE}
+
+    response = await filter_general_chain.ainvoke(user_input)
+
+    if is_forbidden(response.content):
+        return {"output":BLOCKED_MESSAGE}
+    return {"output":response}
 
 # Basic general chain here
-def get_general_chain():
+# Pass a Pydantic model as structured_output to constrain the LLM's output to that model's JSON schema
+def get_general_chain(structured_output: type[BaseModel] | None = None):
 
     # This basic chain is just:
         # The prompt we're sending to the llm
         # The llm we're talking to
         # We defined both of these above!!
-    chain = prompt | llm
+    if structured_output is None:
+        return prompt | llm
 
-    return chain
+    # STRUCTURED OUTPUT MODE: Ollama's "format" option takes a JSON schema and only lets the model
+    # generate tokens that fit it - no prose, no missing fields (pair it with structured_output.py for parsing)
+    return prompt | llm.bind(format=structured_output.model_json_schema())
 
-# More sequential chain that refines the answer more by adding 2 chains to the workflow
-def get_sequential_chain():
+# The two stages of the customer support chain: (draft chain, refine chain)
+def get_support_chain_stages():
 
     # First chain - just a basic prompt to the LLM. We can use our OG members from above
     draft_chain = prompt | llm
@@ -71,9 +113,24 @@ def get_sequential_chain():
     # Second chain using the refined prompt
     final_chain = improved_prompt | llm
 
+    return draft_chain, final_chain
+
+# More sequential chain that refines the answer more by adding 2 chains to the workflow
+def get_sequential_chain():
+
+    draft_chain, final_chain = get_support_chain_stages()
+
     # Finally, combine the 2 chains and return the refined output
     return draft_chain | final_chain
 
+# PIPELINED version of the sequential chain - streams the draft while it's being written,
+# then streams the refined answer, and caches drafts (see support_pipeline.py)
+def get_pipelined_sequential_chain():
+
+    draft_chain, final_chain = get_support_chain_stages()
+    return SupportPipeline(draft_chain, final_chain)
+
+
 # A chain that is better equipped to remember the conversation (memory)
 def get_memory_chain():
 
@@ -83,10 +140,11 @@ def get_memory_chain():
 
     # maybe a summary memory is better? I don't like losing older interactions
     # It SUMMARIZES the chat history instead of dropping older interactions entirely
-    memory = ConversationSummaryMemory(llm=llm)
+    # ...but ConversationSummaryMemory was ONE memory for everyone, and it re-summarized with a blocking LLM call every turn
+    # So now memory lives in session_memory_store (below): one memory per session_id, with the summarizing
+    # done in the background after the response goes out
 
-    # This is clunky: Going to rewrite the prompt with a {history} variable
-    # These older Memory classes need a {history} variable to store the previous messages
+    # The prompt still has a {history} variable - the router fills it in from the session's memory
     memory_prompt = ChatPromptTemplate.from_messages([
         ("system", "You are a helpful chatbot that assists with queries in the fictional Evil Scientist Corporation. "
                    "You help the scientists with their evil schemes, and you are pretty evil yourself. "
@@ -97,14 +155,23 @@ def get_memory_chain():
                  "Current Input: {input}")
     ])
 
-    # Make and return a chain in a more old fashioned way
-    memory_chain = ConversationChain(
-        llm = llm, # Same LLM as defined above
-        memory = memory, # Defined at the start of this function
-        prompt = memory_prompt # The rewritten prompt with {history}
-    )
+    # A plain prompt | llm chain - the memory is handled outside of it
+    return memory_prompt | llm
+
+# The chain that folds older messages into a session's running summary (same idea as ConversationSummaryMemory)
+def get_summary_chain():
+
+    summary_prompt = ChatPromptTemplate.from_messages([
+        ("system", "Progressively summarize the lines of conversation provided, adding onto the previous summary. "
+                   "Return ONLY the new summary, in a few sentences."),
+        ("user", "Current summary: {summary}\n\n"
+                 "New lines of conversation:\n{new_lines}")
+    ])
+
+    return summary_prompt | llm
 
-    return memory_chain
+# Per-session conversation memory, shared by the /chat/memory-chat routes
+session_memory_store = SessionMemoryStore(summarizer=get_summary_chain())
 
 # TRANSFORMCHAIN EXAMPLE (A Legacy Chain)
 def get_bad_word_filter_chain():
@@ -113,7 +180,8 @@ def get_bad_word_filter_chain():
     filter_chain = TransformChain(
         input_variables=["input"],
         output_variables=["output"],
-        transform=bad_word_filter # transform function defined above
+        transform=bad_word_filter, # transform function defined above
+        atransform=abad_word_filter # ...and its async twin, used by ainvoke()
         # Ignore the "unexpected arg" error, it should work.
     )
 
@@ -0,0 +1,162 @@
+# This service decides what the censored chat refuses to talk about
+# The blocklist lives in a plain text file (one term per line) and is compiled ONCE into an Aho-Corasick automaton:
+# a trie of all the terms, plus "fail links" that say where to continue when a match breaks off
+#
+# Why bother? Checking `term in text` for every term is (number of terms) x (text length).
+# The automaton reads each character of the text exactly once, no matter if the blocklist has 1 term or 10,000
+# It also keeps its state between chunks, so it can scan LLM output token by token as it streams
+import os
+from collections import deque
+from typing import Any, AsyncIterator
+
+from app.services.streaming_service import chunk_text
+
+BLOCKLIST_PATH = os.getenv("CONTENT_FILTER_BLOCKLIST", "app/files_to_load/blocked_terms.txt")
+DEFAULT_BLOCKED_TERMS = ["javascript"] # used if the blocklist file is missing
+
+
+class ContentFilter:
+    """
+    Case-insensitive multi-term matcher (Aho-Corasick).
+    Matches are plain substrings, like the original `"javascript" in text` check.
+    """
+
+    def __init__(self, terms: list[str]):
+        self.terms = sorted({term.strip().lower() for term in terms if term.strip()})
+
+        # The trie: one dict of char -> next state per state. State 0 is the root
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._depth: list[int] = [0] # how many characters deep each state is
+        self._output: list[str | None] = [None] # a blocked term that ends at this state (directly or via fail links)
+
+        for term in self.terms:
+            self._add(term)
+        self._build_fail_links()
+
+    def _add(self, term: str) -> None:
+        state = 0
+        for char in term:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._depth.append(self._depth[state] + 1)
+                self._output.append(None)
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state] = term
+
+    # Breadth-first, so a state's fail link always points at a shallower state that's already finished
+    def _build_fail_links(self) -> None:
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+
+                # If the fallback state completes a term, so does this one ("xjavascript" still contains "javascript")
+                if self._output[next_state] is None:
+                    self._output[next_state] = self._output[self._fail[next_state]]
+
+    # Move the automaton forward by one character
+    def _step(self, state: int, char: str) -> int:
+        while state and char not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(char, 0)
+
+    # The first blocked term in the text (or None) - stops reading as soon as it finds one
+    def first_match(self, text: str) -> str | None:
+        state = 0
+        for char in text.lower():
+            state = self._step(state, char)
+            if self._output[state] is not None:
+                return self._output[state]
+        return None
+
+    def is_blocked(self, text: str) -> bool:
+        return self.first_match(text) is not None
+
+    # A scanner for text that arrives in pieces (streamed LLM tokens)
+    def scanner(self) -> "StreamScanner":
+        return StreamScanner(self)
+
+    def stats(self) -> dict[str, Any]:
+        return {"terms": len(self.terms), "states": len(self._goto)}
+
+
+class StreamScanner:
+    """
+    Feeds streamed chunks through the automaton, keeping its state across chunk boundaries
+    (so "Java" + "Script" is still caught).
+    It holds back the last few characters that COULD be the start of a blocked term, so they never reach the client
+    before we know whether they complete one.
+    """
+
+    def __init__(self, content_filter: ContentFilter):
+        self._filter = content_filter
+        self._state = 0
+        self._pending = ""
+
+    # Returns (text that is safe to send now, whether a blocked term was found)
+    def feed(self, text: str) -> tuple[str, bool]:
+        for char in text.lower():
+            self._state = self._filter._step(self._state, char)
+            if self._filter._output[self._state] is not None:
+                return "", True
+
+        self._pending += text
+        # The current state's depth = how many trailing characters are a partial match
+        hold = self._filter._depth[self._state]
+        safe = self._pending[:len(self._pending) - hold]
+        self._pending = self._pending[len(self._pending) - hold:]
+        return safe, False
+
+    # The stream ended without completing a term - whatever we held back is safe after all
+    def flush(self) -> str:
+        rest, self._pending = self._pending, ""
+        return rest
+
+
+# Read the blocklist file (one term per line, # for comments)
+def load_blocklist(path: str = BLOCKLIST_PATH) -> list[str]:
+    if not os.path.exists(path):
+        return list(DEFAULT_BLOCKED_TERMS)
+
+    with open(path, encoding="utf-8") as blocklist_file:
+        return [line.strip() for line in blocklist_file if line.strip() and not line.lstrip().startswith("#")]
+
+
+# Compiled once when the app starts, shared by every request
+content_filter = ContentFilter(load_blocklist())
+
+
+# Pass a stream of LLM chunks through the filter
+# Safe text is yielded as it's confirmed; if the output hits a blocked term, the replacement is sent instead and we stop
+async def censor_stream(chunks: AsyncIterator[Any], replacement: str, active_filter: ContentFilter | None = None) -> AsyncIterator[str]:
+    scanner = (active_filter or content_filter).scanner()
+
+    try:
+        async for chunk in chunks:
+            safe, blocked = scanner.feed(chunk_text(chunk))
+            if blocked:
+                yield replacement
+                return
+            if safe:
+                yield safe
+    finally:
+        # Stopping early? Close the LLM stream now, so it stops generating (and gives back its LLM slot)
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    rest = scanner.flush()
+    if rest:
+        yield rest
@@ -0,0 +1,194 @@
+# This service shrinks a CSV file down to the part that matters for ONE question, before it goes to the LLM
+# Pasting every row into the prompt makes the prompt (and the LLM's latency) grow with the file
+#
+# Instead we:
+#   1. Load the CSV once into a pandas DataFrame (a columnar in-memory table) and precompute its aggregates
+#      (totals, averages, min/max, group-by totals) so the LLM doesn't have to do math - cached in the shared
+#      document_cache, so both only happen again when the file changes
+#   2. Pick the columns and rows the question is about (simple keyword overlap)
+#   3. Cap the result at CSV_CONTEXT_MAX_CHARS and log roughly how many tokens we saved
+import os
+from typing import Any
+
+import pandas as pd
+
+from app.services.document_cache import document_cache
+from app.services.keyword_index import tokenize
+
+CSV_CONTEXT_MAX_CHARS = 2000 # hard cap on the context we send to the LLM
+CSV_CONTEXT_MAX_ROWS = 15 # at most this many raw rows in the context
+CSV_GROUP_BY_MAX_GROUPS = 10 # only group by text columns with a handful of distinct values
+CHARS_PER_TOKEN = 4 # rough rule of thumb for English text - good enough for logging savings
+
+# Filler words that would match half the rows/columns ("the", "of"...) without meaning anything
+STOPWORDS = {
+    "a", "an", "and", "are", "at", "by", "did", "do", "does", "for", "from", "how", "in", "is", "it", "many",
+    "much", "of", "on", "or", "per", "the", "to", "was", "we", "were", "what", "which", "who", "with"
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+# Parse the CSV into a DataFrame
+# sep=None lets pandas sniff the delimiter (our sales_data.csv is actually tab-separated)
+def read_table(path: str) -> pd.DataFrame:
+    table = pd.read_csv(path, sep=None, engine="python")
+    table.columns = [str(column).strip() for column in table.columns]
+    return table
+
+
+class CsvTable:
+    """
+    A parsed CSV plus everything about it that doesn't depend on the question: the aggregates, and how big
+    the whole file would be in a prompt. Built once per version of the file.
+    """
+
+    def __init__(self, table: pd.DataFrame):
+        self.table = table
+        self.text_columns = [column for column in table.columns if not pd.api.types.is_numeric_dtype(table[column])]
+        self.label_column = self.text_columns[0] if self.text_columns else None
+        self.aggregates = compute_aggregates(table)
+
+        # What the old endpoint would have sent: every row of the file (only the size is kept)
+        full_text = table.to_csv(sep="\t", index=False)
+        self.full_chars = len(full_text)
+        self.full_tokens = estimate_tokens(full_text)
+
+
+def parse_table(path: str) -> CsvTable:
+    return CsvTable(read_table(path))
+
+
+# Load the CSV and its aggregates, or reuse the ones we already built if the file hasn't changed
+# The table is shared between requests - don't modify it
+def load_table(path: str) -> CsvTable:
+    return document_cache.load_parsed(path, parse_table)
+
+
+def _format_number(value: Any) -> str:
+    if pd.isna(value):
+        return "n/a"
+    value = float(value)
+    return str(int(value)) if value.is_integer() else f"{value:.2f}"
+
+
+# Columns whose name shares a word with the question (the first text column is always kept - it names the rows)
+def relevant_columns(table: pd.DataFrame, question_tokens: set[str]) -> list[str]:
+    text_columns = [column for column in table.columns if not pd.api.types.is_numeric_dtype(table[column])]
+    label_column = text_columns[0] if text_columns else None
+
+    matched = [column for column in table.columns if question_tokens & set(tokenize(column))]
+    if not matched or matched == [label_column]:
+        return list(table.columns) # the question doesn't name any columns - keep them all
+
+    if label_column is not None and label_column not in matched:
+        matched.insert(0, label_column)
+    return [column for column in table.columns if column in matched] # keep the file's column order
+
+
+# Rows where any text cell shares a word with the question (e.g. "How many Moon Vaporizers did we sell?")
+def relevant_rows(table: pd.DataFrame, question_tokens: set[str]) -> pd.DataFrame:
+    text_columns = [column for column in table.columns if not pd.api.types.is_numeric_dtype(table[column])]
+    if not text_columns or not question_tokens:
+        return table.iloc[0:0]
+
+    def row_matches(row) -> bool:
+        return any(question_tokens & set(tokenize(str(row[column]))) for column in text_columns)
+
+    return table[table.apply(row_matches, axis=1)]
+
+
+# Totals/averages/min/max for every numeric column, plus group-by totals for low-cardinality text columns
+# Runs over all rows, so it's done once per file (see CsvTable) - aggregate_lines() picks out what a question needs
+def compute_aggregates(table: pd.DataFrame) -> dict[str, Any]:
+    numeric_columns = [column for column in table.columns if pd.api.types.is_numeric_dtype(table[column])]
+    text_columns = [column for column in table.columns if not pd.api.types.is_numeric_dtype(table[column])]
+    label_column = text_columns[0] if text_columns else None
+
+    column_lines = {}
+    for column in numeric_columns:
+        values = table[column]
+        line = (f"{column}: total={_format_number(values.sum())}, mean={_format_number(values.mean())}, "
+                f"min={_format_number(values.min())}, max={_format_number(values.max())}")
+        if label_column is not None and values.notna().any():
+            line += f" (min: {table.loc[values.idxmin(), label_column]}, max: {table.loc[values.idxmax(), label_column]})"
+        column_lines[column] = line
+
+    group_sums = {}
+    for group_column in text_columns:
+        groups = table[group_column].nunique()
+        if not numeric_columns or groups >= len(table) or groups > CSV_GROUP_BY_MAX_GROUPS:
+            continue # grouping by a unique name (or 500 distinct values) doesn't summarize anything
+        group_sums[group_column] = table.groupby(group_column)[numeric_columns].sum()
+
+    return {"rows": len(table), "columns": column_lines, "groups": group_sums}
+
+
+# The precomputed aggregates for the columns a question is about
+def aggregate_lines(aggregates: dict[str, Any], columns: list[str]) -> list[str]:
+    numeric_columns = [column for column in columns if column in aggregates["columns"]]
+    lines = [f"rows: {aggregates['rows']}"] + [aggregates["columns"][column] for column in numeric_columns]
+
+    if numeric_columns:
+        for group_column, sums in aggregates["groups"].items():
+            for group, row in sums.iterrows():
+                totals = ", ".join(f"{column}={_format_number(row[column])}" for column in numeric_columns)
+                lines.append(f"{group_column}={group}: {totals}")
+
+    return lines
+
+
+# Build the compact, question-specific context for one CSV file
+# Returns the context text plus some numbers about how much we trimmed
+# (the row matching still looks at every row - call it from a worker thread, not the event loop)
+def build_csv_context(path: str, question: str, max_chars: int = CSV_CONTEXT_MAX_CHARS) -> tuple[str, dict[str, Any]]:
+    csv_table = load_table(path)
+    table = csv_table.table
+    question_tokens = set(tokenize(question)) - STOPWORDS
+
+    columns = relevant_columns(table, question_tokens)
+    rows = relevant_rows(table, question_tokens)
+    if rows.empty:
+        rows = table # nothing specific asked about - show what fits
+
+    sections = [
+        "Columns: " + ", ".join(columns),
+        "Aggregates (over all rows):\n" + "\n".join(aggregate_lines(csv_table.aggregates, columns))
+    ]
+    shown = rows[columns].head(CSV_CONTEXT_MAX_ROWS)
+    rows_header = f"Rows ({len(shown)} of {len(table)}):\n"
+    rows_text = shown.to_csv(sep="\t", index=False)
+
+    context = "\n\n".join(sections)
+    # The aggregates matter more than the raw rows - only add as many rows as still fit under the cap
+    room = max_chars - len(context) - len(rows_header) - 2
+    rows_sent = 0
+    if room > 0:
+        kept_lines, used = [], 0
+        for line in rows_text.splitlines():
+            used += len(line) + 1
+            if used > room:
+                break
+            kept_lines.append(line)
+        if len(kept_lines) > 1: # more than just the header line
+            rows_sent = len(kept_lines) - 1
+            context += "\n\n" + f"Rows ({rows_sent} of {len(table)}):\n" + "\n".join(kept_lines)
+    context = context[:max_chars]
+
+    # A tiny file can be shorter than its own summary - then the raw file is the compact version
+    # (only serialized when it's that small)
+    if csv_table.full_chars <= len(context):
+        context, columns, rows_sent = table.to_csv(sep="\t", index=False), list(table.columns), len(table)
+    stats = {
+        "full_tokens": csv_table.full_tokens,
+        "context_tokens": estimate_tokens(context),
+        "columns": len(columns),
+        "rows": rows_sent
+    }
+    stats["saved_tokens"] = max(0, stats["full_tokens"] - stats["context_tokens"])
+
+    print(f"[CSV CONTEXT] {os.path.basename(path)}: ~{stats['context_tokens']} tokens instead of "
+          f"~{stats['full_tokens']} (saved ~{stats['saved_tokens']})")
+    return context, stats
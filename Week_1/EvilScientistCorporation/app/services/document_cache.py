@@ -0,0 +1,86 @@
+# This service keeps loaded files (as LangChain Document lists) in memory
+# so endpoints like /chat/plan-summary don't re-read and re-parse the same file on every request
+#
+# Every lookup does a cheap os.stat() - if the file's modification time or size changed since we
+# cached it, we reload it. So editing boss_plans.txt still shows up on the very next request
+#
+# Besides Document lists it can cache any other parsed form of a file (e.g. csv_context's pandas DataFrames)
+# with load_parsed() - same revalidation, one file-cache policy for the whole app
+import os
+import threading
+from typing import Any, Callable
+
+from langchain_community.document_loaders import CSVLoader, TextLoader
+from langchain_core.documents import Document
+
+
+class DocumentCache:
+
+    def __init__(self):
+        # key -> (mtime_ns, size, documents or other parsed value)
+        self._entries: dict[tuple, tuple[int, int, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0 # first load of a file
+        self.reloads = 0 # file changed on disk, so we loaded it again
+
+    # Load a file with the given loader class, or return the cached Documents if the file hasn't changed
+    # Extra keyword args go to the loader (e.g. csv_args for CSVLoader) and are part of the cache key
+    def load(self, path: str, loader_class: type = TextLoader, **loader_kwargs: Any) -> list[Document]:
+        key = (os.path.abspath(path), loader_class.__name__, repr(sorted(loader_kwargs.items())))
+        documents = self._load(key, path, lambda: loader_class(path, **loader_kwargs).load())
+        return list(documents) # copy of the list, so callers can't change what's cached
+
+    # Parse a file with any function (parse(path) -> value), or return the cached value if the file hasn't changed
+    # The value itself is shared between callers, so treat it as read-only
+    def load_parsed(self, path: str, parse: Callable[[str], Any]) -> Any:
+        key = (os.path.abspath(path), f"{parse.__module__}.{parse.__qualname__}")
+        return self._load(key, path, lambda: parse(path))
+
+    def _load(self, key: tuple, path: str, load: Callable[[], Any]) -> Any:
+        stat = os.stat(path) # raises FileNotFoundError just like the loader would
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self.hits += 1
+                return entry[2]
+
+        # Load outside the lock - a slow file shouldn't block lookups for other files
+        value = load()
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.reloads += 1
+            self._entries[key] = (stat.st_mtime_ns, stat.st_size, value)
+
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.reloads = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads
+            }
+
+
+# One cache shared by every router in the app
+document_cache = DocumentCache()
+
+
+# Shortcuts for the two loaders our routes use
+def load_text(path: str) -> list[Document]:
+    return document_cache.load(path, TextLoader)
+
+
+def load_csv(path: str, **loader_kwargs: Any) -> list[Document]:
+    return document_cache.load(path, CSVLoader, **loader_kwargs)
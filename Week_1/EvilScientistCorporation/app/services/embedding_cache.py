@@ -0,0 +1,64 @@
+# This service keeps recently used QUERY embeddings in memory
+# Embedding a query means a round trip to Ollama, and the same queries come in over and over
+# (LangGraph nodes, /vector-ops endpoints, etc.) so we remember the vectors for a while
+from typing import Any
+
+from app.services.lru_cache import LRUCache
+
+CACHE_MAX_SIZE = 1024 # How many query vectors we keep before evicting the least recently used
+CACHE_TTL_SECONDS = 60 * 60 # How long a cached vector stays valid (1 hour)
+
+
+# Normalize the query so "Moon Vaporizer?" and "  Moon   Vaporizer? " share a cache entry
+# Only the whitespace - case can change the embedding, and the vector we cache is the one for THIS exact text
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+
+# Figure out which model an embedding object uses, so entries from different models never mix
+def model_name(embedding: Any) -> str:
+    return getattr(embedding, "model", None) or type(embedding).__name__
+
+
+class EmbeddingCache:
+    """
+    A bounded LRU + TTL cache (see lru_cache.py) from (model name, normalized query text) to the embedding vector.
+    """
+
+    def __init__(self, max_size: int = CACHE_MAX_SIZE, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self._cache = LRUCache(max_size, ttl_seconds)
+
+    def get(self, model: str, query: str) -> list[float] | None:
+        return self._cache.get((model, normalize_query(query)))
+
+    def put(self, model: str, query: str, vector: list[float]) -> None:
+        self._cache.put((model, normalize_query(query)), vector)
+
+    # Flush the cache (call this when the embedding model changes)
+    # If a model name is passed in, only that model's entries are dropped
+    def clear(self, model: str | None = None) -> int:
+        if model is None:
+            return self._cache.clear()
+        return self._cache.clear(lambda key: key[0] == model)
+
+    def stats(self) -> dict[str, Any]:
+        return self._cache.stats()
+
+
+# Single shared instance (singleton) - every search in the app goes through this one
+query_embedding_cache = EmbeddingCache()
+
+
+# Get the embedding for a query, only calling the embedding model on a cache miss
+# The normalized query is what gets embedded, so every query sharing a cache entry really has that vector
+# (not whichever spelling happened to be asked first)
+def get_query_embedding(query: str, embedding: Any) -> list[float]:
+    model = model_name(embedding)
+    query = normalize_query(query)
+
+    vector = query_embedding_cache.get(model, query)
+    if vector is None:
+        vector = embedding.embed_query(query)
+        query_embedding_cache.put(model, query, vector)
+
+    return vector
@@ -0,0 +1,44 @@
+# A deterministic, hash-based embedding model - NO Ollama needed
+# Used by the benchmarks (and anywhere else we want repeatable vectors) by setting FAKE_EMBEDDINGS=1
+#
+# How it works ("feature hashing"): every word is hashed into one of `dimensions` slots with a +1/-1 sign,
+# and the vector is normalized to length 1. Texts that share words end up with similar vectors,
+# so similarity search still behaves sensibly - and the same text ALWAYS gets the same vector
+import hashlib
+import math
+import re
+
+from langchain_core.embeddings import Embeddings
+
+FAKE_EMBEDDING_DIMENSIONS = 384
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class HashEmbeddings(Embeddings):
+
+    def __init__(self, dimensions: int = FAKE_EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+        self.model = f"hash-embeddings-{dimensions}" # the embedding cache keys entries by model name
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dimensions
+
+        for token in _TOKEN_PATTERN.findall(text.lower()):
+            # hashlib (not hash()) so the vectors are the same in every process
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            slot = int.from_bytes(digest[:4], "little") % self.dimensions
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[slot] += sign
+
+        norm = math.sqrt(sum(value * value for value in vector))
+        if norm == 0:
+            return vector
+
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
@@ -0,0 +1,83 @@
+# This service searches SEVERAL collections for one question at the same time, and merges the results
+# The LangGraph route node used to pick exactly one collection, so "which of our items does the boss's plan need?"
+# got either the items or the plans - never both
+#
+# fanout_search():
+#   - runs every search concurrently (asyncio.gather - the searches run on the vector executor's threads),
+#     so it takes as long as the SLOWEST search, not the sum of them
+#   - normalizes the scores, because each search scores differently (dense = distance, lower is better;
+#     hybrid = fused RRF score, higher is better) - both go by the dense distance, on a FIXED 0-1 scale, higher
+#     is better, so a collection whose hits are all poor ranks below one with good hits whatever the search modes
+#   - drops duplicates and keeps the best k overall, so the prompt gets no more context than ONE retrieval would
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+FANOUT_K = 5 # same budget as a single extract node
+FANOUT_SEARCHES = [
+    {"collection": "evil_items", "k": 5, "mode": "dense"},
+    {"collection": "boss_plans", "k": 5, "mode": "hybrid"}
+]
+
+Search = Callable[..., Awaitable[list[dict[str, Any]]]]
+
+
+# Put one search's scores on a fixed 0-1 scale, higher is better: distance -> 1 / (1 + distance)
+# The scale doesn't depend on the other results (min-max scaling gave every search's best hit 1.0 - even when
+# all of its hits were poor - and gave a list of equal scores 1.0 across the board).
+# A fused RRF score only says where a chunk RANKED, not how close it is, so hybrid results are scored by the
+# dense distance they carry too - that's what puts both modes on one scale (a hit without one scores 0)
+def normalize_scores(results: list[dict[str, Any]], mode: str) -> list[dict[str, Any]]:
+    normalized = []
+    for item in results:
+        distance = item["score"] if mode == "dense" else item.get("distance")
+        score = 1 / (1 + max(distance, 0.0)) if distance is not None else 0.0
+        normalized.append({**item, "score": round(score, 4), "raw_score": item["score"]})
+    return normalized
+
+
+# Merge several searches' (normalized) results: best score first, no duplicates, at most k
+def merge_results(result_lists: list[list[dict[str, Any]]], k: int = FANOUT_K) -> list[dict[str, Any]]:
+    merged = sorted((item for results in result_lists for item in results), key=lambda item: item["score"], reverse=True)
+
+    kept, seen = [], set()
+    for item in merged:
+        # The same chunk can come back from more than one search - keep its best-scoring copy
+        key = " ".join(item["text"].split()).lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append(item)
+        if len(kept) == k:
+            break
+    return kept
+
+
+# Run all the searches at once, then merge
+# search is the async search function (vectordb_service.asearch) - passed in, so this works with any backend
+async def fanout_search(
+    query: str,
+    search: Search,
+    searches: list[dict[str, Any]] = FANOUT_SEARCHES,
+    k: int = FANOUT_K
+) -> list[dict[str, Any]]:
+    start = time.perf_counter()
+
+    async def timed(spec: dict[str, Any]) -> tuple[list[dict[str, Any]], float]:
+        search_start = time.perf_counter()
+        results = await search(query, k=spec["k"], collection=spec["collection"], mode=spec["mode"])
+        return results, (time.perf_counter() - search_start) * 1000
+
+    outcomes = await asyncio.gather(*(timed(spec) for spec in searches))
+
+    result_lists = [
+        [{**item, "collection": spec["collection"]} for item in normalize_scores(results, spec["mode"])]
+        for spec, (results, _) in zip(searches, outcomes)
+    ]
+    merged = merge_results(result_lists, k)
+
+    wall_ms = (time.perf_counter() - start) * 1000
+    slowest_ms = max((search_ms for _, search_ms in outcomes), default=0.0)
+    print(f"[FANOUT] {len(searches)} searches in {wall_ms:.1f}ms (slowest single search {slowest_ms:.1f}ms), "
+          f"{sum(len(results) for results, _ in outcomes)} results -> {len(merged)}")
+    return merged
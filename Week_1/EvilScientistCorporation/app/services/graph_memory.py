@@ -0,0 +1,177 @@
+# This service keeps the LangGraph conversation memory BOUNDED
+# Before: every request used thread "demo_thread", and MemorySaver keeps every checkpoint it's ever written,
+# so everybody's messages piled up in one ever-growing history that got pasted into every general chat prompt
+#
+# Now:
+#   - each chat session gets its own thread (the routers pass session_id as the thread_id)
+#   - bounded_add_messages (the message_memory reducer) keeps the newest messages word for word and folds
+#     older turns into a single, capped "summary" message
+#   - BoundedMemorySaver only keeps the last few checkpoints of each thread, caps the number of threads,
+#     and evicts threads that sat idle too long
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import add_messages
+
+GRAPH_MAX_MESSAGES = 12 # compact once a thread has more messages than this
+GRAPH_WINDOW_MESSAGES = 6 # messages kept word for word after compaction (3 user/AI turns)
+GRAPH_MAX_SUMMARY_CHARS = 2000
+GRAPH_SUMMARY_LINE_CHARS = 200 # each compacted message is cut down to this many characters
+GRAPH_MAX_CHECKPOINTS = 2 # per thread - the latest one is all the graph needs to resume
+GRAPH_MAX_THREADS = 1000
+GRAPH_IDLE_TTL_SECONDS = 30 * 60 # evict threads nobody has used for 30 minutes
+
+SUMMARY_MESSAGE_ID = "memory_summary" # add_messages replaces messages by id, so there's only ever one summary
+SUMMARY_PREFIX = "Summary of earlier conversation:\n"
+
+
+def _role(message: BaseMessage) -> str:
+    if isinstance(message, HumanMessage):
+        return "Human"
+    if isinstance(message, AIMessage):
+        return "AI"
+    return message.type
+
+
+# message_memory as plain text for a prompt (instead of the repr of a list of message objects)
+def format_memory(messages: list[BaseMessage] | None) -> str:
+    lines = []
+    for message in messages or []:
+        if message.id == SUMMARY_MESSAGE_ID:
+            lines.append(str(message.content))
+        else:
+            lines.append(f"{_role(message)}: {message.content}")
+    return "\n".join(lines)
+
+
+# Reducer for message_memory: add_messages, then compact when the thread gets too long
+# (it has to be a plain, fast function - LangGraph calls it on every update - so the "summary" is condensed text,
+# not an LLM call)
+def bounded_add_messages(left: list[BaseMessage] | None, right: Any) -> list[BaseMessage]:
+    merged = add_messages(left or [], right)
+    if len(merged) <= GRAPH_MAX_MESSAGES:
+        return merged
+
+    summary = next((message for message in merged if message.id == SUMMARY_MESSAGE_ID), None)
+    conversation = [message for message in merged if message.id != SUMMARY_MESSAGE_ID]
+    older, recent = conversation[:-GRAPH_WINDOW_MESSAGES], conversation[-GRAPH_WINDOW_MESSAGES:]
+
+    summary_text = str(summary.content).removeprefix(SUMMARY_PREFIX) if summary is not None else ""
+    new_lines = [f"{_role(message)}: {str(message.content)[:GRAPH_SUMMARY_LINE_CHARS]}" for message in older]
+    summary_text = "\n".join(line for line in [summary_text, *new_lines] if line)
+    # Too long? Keep the newest part - the oldest turns matter least
+    summary_text = summary_text[-GRAPH_MAX_SUMMARY_CHARS:]
+
+    return [SystemMessage(content=SUMMARY_PREFIX + summary_text, id=SUMMARY_MESSAGE_ID), *recent]
+
+
+class BoundedMemorySaver(MemorySaver):
+    """
+    MemorySaver that forgets:
+      - only the last max_checkpoints checkpoints of each thread are kept (MemorySaver keeps them all)
+      - at most max_threads threads, least recently used evicted first
+      - threads idle for longer than idle_ttl_seconds are evicted
+    """
+
+    def __init__(
+        self,
+        max_checkpoints: int = GRAPH_MAX_CHECKPOINTS,
+        max_threads: int = GRAPH_MAX_THREADS,
+        idle_ttl_seconds: float = GRAPH_IDLE_TTL_SECONDS,
+        **kwargs: Any
+    ):
+        super().__init__(**kwargs)
+        self.max_checkpoints = max_checkpoints
+        self.max_threads = max_threads
+        self.idle_ttl_seconds = idle_ttl_seconds
+
+        self._lock = threading.RLock()
+        # thread_id -> last used, least recently used first (so eviction is a pop from the front)
+        self._last_used: OrderedDict[str, float] = OrderedDict()
+        self.evictions = 0
+        self.pruned_checkpoints = 0
+
+    def _touch(self, thread_id: str) -> None:
+        self._last_used[thread_id] = time.monotonic()
+        self._last_used.move_to_end(thread_id)
+
+    def get_tuple(self, config):
+        with self._lock:
+            thread_id = config["configurable"]["thread_id"]
+            if thread_id not in self.storage:
+                return None # (MemorySaver's storage is a defaultdict - looking up a new thread would create it)
+            self._touch(thread_id)
+            return super().get_tuple(config)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with self._lock:
+            result = super().put(config, checkpoint, metadata, new_versions)
+            thread_id = config["configurable"]["thread_id"]
+            self._touch(thread_id)
+            self._prune(thread_id, config["configurable"]["checkpoint_ns"])
+            self.evict_idle()
+            while len(self._last_used) > self.max_threads:
+                self._evict(next(iter(self._last_used)))
+            return result
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+
+    # Drop everything but the newest checkpoints of a thread, plus the writes and channel values only they used
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.max_checkpoints:
+            return
+
+        def blob_keys(checkpoint: bytes) -> set[tuple]:
+            versions = self.serde.loads_typed(checkpoint)["channel_versions"]
+            return {(thread_id, checkpoint_ns, channel, version) for channel, version in versions.items()}
+
+        # Checkpoint ids sort by time
+        unused = set()
+        for checkpoint_id in sorted(checkpoints)[:-self.max_checkpoints]:
+            checkpoint, _, _ = checkpoints.pop(checkpoint_id)
+            unused |= blob_keys(checkpoint)
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            self.pruned_checkpoints += 1
+
+        # A channel value (blob) is only dropped if none of the checkpoints we kept points at it
+        for checkpoint, _, _ in checkpoints.values():
+            unused -= blob_keys(checkpoint)
+        for key in unused:
+            self.blobs.pop(key, None)
+
+    def _evict(self, thread_id: str) -> None:
+        self._last_used.pop(thread_id, None)
+        self.delete_thread(thread_id)
+        self.evictions += 1
+
+    # Drop threads that have been idle for longer than the TTL
+    def evict_idle(self) -> int:
+        with self._lock:
+            cutoff = time.monotonic() - self.idle_ttl_seconds
+            evicted = 0
+            # Oldest-used threads are at the front, so we can stop at the first one that's still active
+            while self._last_used:
+                thread_id, last_used = next(iter(self._last_used.items()))
+                if last_used >= cutoff:
+                    break
+                self._evict(thread_id)
+                evicted += 1
+            return evicted
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "threads": len(self._last_used),
+                "max_threads": self.max_threads,
+                "checkpoints": sum(len(checkpoints) for namespaces in self.storage.values() for checkpoints in namespaces.values()),
+                "blobs": len(self.blobs),
+                "pruned_checkpoints": self.pruned_checkpoints,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,126 @@
+# This service is an in-memory KEYWORD index (BM25) that sits next to each Chroma collection
+# Dense vector search is great for meaning, but bad at exact terms like a gadget name or plan codename
+# BM25 is the classic search-engine ranking function - it scores documents by matching terms
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any
+
+BM25_K1 = 1.5 # How quickly repeated terms stop adding score (term frequency saturation)
+BM25_B = 0.75 # How much long documents get penalized (length normalization)
+RRF_K = 60 # Reciprocal rank fusion constant - 60 is the value from the original RRF paper
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+# Lowercase + split on anything that isn't a letter or number
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    An inverted index (term -> doc IDs) with the stats BM25 needs.
+    Documents can be added (or replaced) and removed so the index stays in sync with its collection.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+
+        self._docs: dict[str, dict[str, Any]] = {} # doc ID -> {"text", "metadata", "term_counts", "length"}
+        self._postings: dict[str, set[str]] = {} # term -> IDs of the docs that contain it
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # Add documents to the index. An existing ID gets replaced (same as a Chroma upsert)
+    def add(self, ids: list[str], texts: list[str], metadatas: list[dict[str, Any]] | None = None) -> None:
+        metadatas = metadatas or [{} for _ in ids]
+
+        with self._lock:
+            for doc_id, text, metadata in zip(ids, texts, metadatas):
+                self._remove_locked(doc_id)
+
+                term_counts = Counter(tokenize(text))
+                length = sum(term_counts.values())
+
+                self._docs[doc_id] = {
+                    "text": text,
+                    "metadata": metadata or {},
+                    "term_counts": term_counts,
+                    "length": length
+                }
+                self._total_length += length
+
+                for term in term_counts:
+                    self._postings.setdefault(term, set()).add(doc_id)
+
+    def remove(self, ids: list[str]) -> None:
+        with self._lock:
+            for doc_id in ids:
+                self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: str) -> None:
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+
+        self._total_length -= doc["length"]
+        for term in doc["term_counts"]:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.discard(doc_id)
+                if not postings:
+                    del self._postings[term]
+
+    def get(self, doc_id: str) -> dict[str, Any] | None:
+        doc = self._docs.get(doc_id)
+        if doc is None:
+            return None
+        return {"id": doc_id, "text": doc["text"], "metadata": doc["metadata"]}
+
+    # Return the top k (doc ID, BM25 score) pairs for the query, best first
+    def search(self, query: str, k: int = 3) -> list[tuple[str, float]]:
+        query_terms = set(tokenize(query))
+
+        with self._lock:
+            doc_count = len(self._docs)
+            if doc_count == 0 or not query_terms:
+                return []
+
+            average_length = self._total_length / doc_count
+            scores: dict[str, float] = {}
+
+            # Only docs that contain at least one query term get scored (that's the point of an inverted index)
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+
+                # Rare terms are worth more than common ones
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+
+                for doc_id in postings:
+                    doc = self._docs[doc_id]
+                    frequency = doc["term_counts"][term]
+                    length_norm = 1 - self.b + self.b * doc["length"] / average_length
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+
+        return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)[:k]
+
+
+# Reciprocal rank fusion: combine several ranked lists of IDs into one
+# Each list contributes 1 / (RRF_K + rank) per ID, so IDs ranked high in BOTH lists win
+# Ranks are all that matter - the raw scores (Chroma distances vs BM25 scores) aren't comparable anyway
+def reciprocal_rank_fusion(rankings: list[list[str]], rrf_k: int = RRF_K) -> list[tuple[str, float]]:
+    fused: dict[str, float] = {}
+
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (rrf_k + rank)
+
+    return sorted(fused.items(), key=lambda pair: pair[1], reverse=True)
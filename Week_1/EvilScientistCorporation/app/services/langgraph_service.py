@@ -1,18 +1,33 @@
 from typing import TypedDict, Any, Annotated
-from app.services.vectordb_service import search
-from langchain_ollama import ChatOllama
-from langgraph.graph import StateGraph, add_messages
+from app.services.vectordb_service import asearch
+from langgraph.graph import StateGraph
 from langgraph.constants import END
-from langgraph.checkpoint.memory import MemorySaver
+from app.services.graph_memory import bounded_add_messages, format_memory
+from app.services.sqlite_checkpointer import SQLiteCheckpointSaver
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
+from app.services.llm_gateway import get_llm
+from app.services.metrics import llm_metrics_callback
+from app.services.semantic_router import is_items_plans_tie, keyword_route, semantic_router
+from app.services.fanout_retrieval import fanout_search
+from app.services.tracing import traced, traced_node
 
 # This service will define the State, Nodes, and Graph for our LangGraph implementation
 
 # Define the LLM we're going to use 
-llm = ChatOllama(
-    model="llama3.2:3b", # The model we're using (we installed llama3.2:3b)
-    temperature=0.2 # Temp goes from 0-1. Higher temp = more creativity
+# get_llm() gives us a ChatOllama (llama3.2:3b) that goes through the shared LLM gateway (see llm_gateway.py),
+# so every LLM call in the app shares one concurrency limit
+# llm_metrics_callback records each call's tokens and latency for GET /metrics (see metrics.py)
+llm = get_llm(
+    temperature=0.2, # Temp goes from 0-1. Higher temp = more creativity
+    callbacks=[llm_metrics_callback]
 )
+
+# The calls the nodes make, wrapped so every call shows up as a span in the run's trace (see tracing.py)
+# e.g. GET /langgraph/traces shows whether the routing, the Chroma search or the LLM call was the slow part
+traced_classify = traced("router.classify", "router", semantic_router.aclassify)
+traced_search = traced("vector.search", "vector", asearch)
+traced_llm = traced("llm", "llm", llm.ainvoke)
+
 # First, we'll define the State of our Graph 
 # You can think of State like a container for global data. The "state" of the app 
 
@@ -32,56 +47,66 @@ class GraphState(TypedDict, total = False): #total =False makes all fields optio
     # The final answer generated by the LLM
     answer: str 
 
-    # Note the langgraph reducer "add_messages"
-    # It helps us aggregate all the previous messages
-    message_memory: Annotated[list[BaseMessage], add_messages]
+    # Note the reducer "bounded_add_messages" (langgraph's add_messages + compaction, see graph_memory.py)
+    # It helps us aggregate all the previous messages, without the history growing forever
+    message_memory: Annotated[list[BaseMessage], bounded_add_messages]
 
 # ===============================(NODE DEFINITIONS)==================================
 
 # Notice each node takes in graph state AND returns graph state
 # Nodes have access to the entire state AND can modify it 
+# The nodes that do I/O (vector search, LLM calls) are async, so the graph has to be run with ainvoke()
 
 # The Route Node - decides what node to invoke based on the user's query 
 # This is a very user-facing node. It's the first to read user's query 
-def route_node(state: GraphState) -> GraphState:
+async def route_node(state: GraphState) -> GraphState:
     
-    # Get the user's query, turn it to lowercase for each of keyword matching
-    query = state.get("query", "").lower()
+    # Get the user's query
+    query = state.get("query", "")
     # WHAT is this? We're getting the user's query out of the state "qeury" field
     # How does state already know what the query is?
     # The user's query gets passed in when the graph is invoked and GraphState is initialized 
 
-    # VERY basic keyword matching (for now) to decide which node to invoke next 
-    # TODO: Use the LLM to decide which node to invoke instead of using hardcoded keyword matching 
+    # The semantic router compares the query's embedding with each route's example questions (see semantic_router.py)
+    # The embedding gets cached, so the extract node's vector search reuses it
+    decision = await traced_classify(query)
+    if decision["confident"]:
+        return {"route": decision["route"]}
 
-    if any(word in query for word in ["item", "items", "product", "buy", "purchase"]):
-        return {"route": "items"} 
-    
-    if any(word in query for word in ["boss", "boss's", "plan", "plans", "scheme", "schemes"]):
-        return {"route": "plans"}
-    
-    # Fall back route 
-    return {"route": "chat"}
+    # Torn between items and plans - search both
+    if is_items_plans_tie(decision):
+        return {"route": "both"}
+
+    # Too close to call - use the old (VERY basic) keyword matching
+    return {"route": keyword_route(query)}
 
 #The node that pulls from the "evil_items" collection in our Chroma Store 
-def extract_items_node(state: GraphState) -> GraphState:
+async def extract_items_node(state: GraphState) -> GraphState:
     # Simply search the VectorDB "evil_items" collection with the user's query in state 
     query = state.get("query", "")
-    results = search(query, k=5, collection="evil_items")
+    results = await traced_search(query, k=5, collection="evil_items")
 
     # Return the documents, adding them to state 
     return {"docs": results}
 
 # The node that pulls from the "boss_plans" collection in our Chroma Store 
-def extract_plans_node(state: GraphState) -> GraphState:
+async def extract_plans_node(state: GraphState) -> GraphState:
     #Same pattern as the node above 
 
+    # Hybrid (dense + BM25) search finds exact plan codenames, so we only need half the chunks we used to (k=10)
+    query = state.get("query", "")
+    results = await traced_search(query, k=5, collection="boss_plans", mode="hybrid")
+    return {"docs": results}
+
+# The node that searches BOTH collections at the same time (for questions about items AND the boss's plans)
+async def extract_both_node(state: GraphState) -> GraphState:
+    # The two searches run concurrently, and the merged results are cut to the same k=5 budget as one search
     query = state.get("query", "")
-    results = search(query, k=10, collection="boss_plans")
+    results = await fanout_search(query, traced_search)
     return {"docs": results}
 
 # The node that answers the user's query based on docs retrieved from either "extract" node 
-def answer_with_context_node(state: GraphState) -> GraphState:
+async def answer_with_context_node(state: GraphState) -> GraphState:
     # This should be a pretty comfortable pattern - just talking to the LLM 
 
     #First, extract the query and docs from state
@@ -101,20 +126,20 @@ def answer_with_context_node(state: GraphState) -> GraphState:
     )
 
     # Invoke the LLM with the prompt
-    response = llm.invoke(prompt)
+    response = await traced_llm(prompt)
 
     # Return the answer, which also adds it to state 
     return {"answer": response}
 
 # Here's the fallback general chat node (invoked if no particular route is identified in the router node)
-def general_chat_node(state: GraphState) -> GraphState:
+async def general_chat_node(state: GraphState) -> GraphState:
 
     # Define the prompt 
     prompt = (
         f"""
         You are an internal assistant at the Evil Scientist Corp."
         You are pretty evil yourself, but still helpful.
-        You have context from previous interactions: \n{state.get("message_memory")}
+        You have context from previous interactions: \n{format_memory(state.get("message_memory"))}
         Answer the User's query based ONLY on the extracted data below."
         If the data doesn't help, say you don't know."
         User Query: \n{state.get("query", "")}
@@ -122,7 +147,7 @@ def general_chat_node(state: GraphState) -> GraphState:
     )
 
     # Storing the LLM response cuz I'm using it twice below
-    result = llm.invoke(prompt).content
+    result = (await traced_llm(prompt)).content
 
     # Invoke the LLM and return the response (which adds it to state too)
     return {"answer": result,
@@ -145,11 +170,13 @@ def build_graph():
     build = StateGraph(GraphState)
 
     # Register each node in the graph
-    build.add_node("route", route_node)
-    build.add_node("extract_items", extract_items_node)
-    build.add_node("extract_plans", extract_plans_node)
-    build.add_node("answer_with_context_node", answer_with_context_node)
-    build.add_node("general_chat_node", general_chat_node)
+    # traced_node times every run of the node (and records the route it picked) in the current trace
+    build.add_node("route", traced_node("route", route_node))
+    build.add_node("extract_items", traced_node("extract_items", extract_items_node))
+    build.add_node("extract_plans", traced_node("extract_plans", extract_plans_node))
+    build.add_node("extract_both", traced_node("extract_both", extract_both_node))
+    build.add_node("answer_with_context_node", traced_node("answer_with_context_node", answer_with_context_node))
+    build.add_node("general_chat_node", traced_node("general_chat_node", general_chat_node))
 
     # Route node goes first, determining which node to hit based on user query 
     build.set_entry_point("route")
@@ -166,14 +193,16 @@ def build_graph():
         {
             "plans": "extract_plans",
             "items": "extract_items",
+            "both": "extract_both",
             "chat": "general_chat_node"
         }
 
 
     )
-    # After either retrieval node runs, invoke the answer node 
+    # After any retrieval node runs, invoke the answer node 
     build.add_edge("extract_plans", "answer_with_context_node")
     build.add_edge("extract_items", "answer_with_context_node") 
+    build.add_edge("extract_both", "answer_with_context_node")
 
     # Define the possible terminal (finishing) points of the graph 
     build.set_finish_point("answer_with_context_node")
@@ -182,7 +211,9 @@ def build_graph():
 
     # Compile and create the invokable graph object. We invoke this in our endpoint! 
     # NOTE: we added a checkpointer to store state ACROSS INVOCATIONS 
-    return build.compile(checkpointer=MemorySaver())
+    # SQLiteCheckpointSaver keeps recent checkpoints in memory and writes them to SQLite in the background,
+    # so conversations survive restarts (see sqlite_checkpointer.py). The app's lifespan handler opens the file
+    return build.compile(checkpointer=SQLiteCheckpointSaver(graph="chat"))
 
 # Make a single graph instance (singleton) - ensure only one instance of the graph exists 
 langgraph = build_graph()
\ No newline at end of file
@@ -0,0 +1,82 @@
+# A small, generic in-memory cache: bounded size (least recently used entries go first) + a TTL
+# The query-embedding cache (embedding_cache.py) and the support pipeline's draft cache are both built on it
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class LRUCache:
+    """
+    A bounded LRU cache from any hashable key to any value.
+    Entries are evicted when the cache is full (least recently used first) or when they are older than the TTL.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        # OrderedDict remembers insertion order, so we can move hits to the end and pop from the front
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock() # FastAPI runs sync code in a threadpool, so guard the dict
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = entry
+
+            # Expired? Drop it and treat it like a miss
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            # Mark as recently used
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+
+            # Evict the least recently used entries until we're back under the size limit
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # Drop every entry, or only the ones whose key matches - returns how many were dropped
+    def clear(self, matches: Callable[[Hashable], bool] | None = None) -> int:
+        with self._lock:
+            if matches is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+
+            stale_keys = [key for key in self._entries if matches(key)]
+            for key in stale_keys:
+                del self._entries[key]
+            return len(stale_keys)
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
@@ -0,0 +1,226 @@
+# This service measures every LLM call and exports the numbers in Prometheus' text format (GET /metrics)
+# For each call we record, tagged by the ROUTE that triggered it and the model name:
+#   - prompt and completion token counts (Ollama reports these with every response)
+#   - time to first token
+#   - total latency
+# That tells us which endpoints have the expensive prompts (e.g. /chat/data-analysis pasting in a CSV)
+#
+# How the route gets attached: RouteTagMiddleware stores the matched route in a ContextVar for each request,
+# and the LangChain callback handler below (attached to our LLMs) reads it when a call starts
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from starlette.routing import Match
+
+from app.services.llm_gateway import llm_gateway
+
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120] # seconds
+TOKEN_BUCKETS = [16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384]
+DEFAULT_ROUTE = "background" # LLM calls outside a request (startup warm-up, background tasks that outlive it...)
+
+# The route template ("/chat/data-analysis") of the request currently being handled
+current_route: ContextVar[str] = ContextVar("current_route", default=DEFAULT_ROUTE)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+class Histogram:
+
+    def __init__(self, name: str, help_text: str, label_names: list[str], buckets: list[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = sorted(buckets)
+        self._lock = threading.Lock()
+        # label values -> (count per bucket, sum, count)
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1 # cumulated when we render
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._series.items()):
+                labels = dict(zip(self.label_names, key))
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': f'{bound:g}'})} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {total:g}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Counter:
+
+    def __init__(self, name: str, help_text: str, label_names: list[str]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(dict(zip(self.label_names, key)))} {value:g}")
+        return lines
+
+
+LABELS = ["route", "model"]
+llm_request_duration = Histogram("llm_request_duration_seconds", "Total LLM call latency", LABELS, LATENCY_BUCKETS)
+llm_time_to_first_token = Histogram("llm_time_to_first_token_seconds", "Time until the LLM's first token", LABELS, LATENCY_BUCKETS)
+llm_prompt_tokens = Histogram("llm_prompt_tokens", "Prompt tokens per LLM call", LABELS, TOKEN_BUCKETS)
+llm_completion_tokens = Histogram("llm_completion_tokens", "Completion tokens per LLM call", LABELS, TOKEN_BUCKETS)
+llm_requests = Counter("llm_requests_total", "LLM calls by outcome", LABELS + ["status"])
+llm_tokens = Counter("llm_tokens_total", "Tokens used, by kind (prompt/completion)", LABELS + ["kind"])
+# Filled in by the LangGraph tracer (see tracing.py) - one series per graph node / LLM call / vector search
+graph_span_duration = Histogram("graph_span_duration_seconds", "LangGraph node and call latency", ["graph", "span", "kind"], LATENCY_BUCKETS)
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """LangChain callback handler that times and counts every call of the LLM it's attached to."""
+
+    def __init__(self):
+        # run_id -> {"route", "model", "start", "first_token"}
+        self._runs: dict[UUID, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized: dict[str, Any], messages: list, *, run_id: UUID, **kwargs: Any) -> None:
+        metadata = kwargs.get("metadata") or {}
+        invocation_params = kwargs.get("invocation_params") or {}
+        model = metadata.get("ls_model_name") or invocation_params.get("model") or "unknown"
+        with self._lock:
+            self._runs[run_id] = {"route": current_route.get(), "model": model, "start": time.perf_counter(), "first_token": None}
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None and run["first_token"] is None and token:
+                run["first_token"] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+
+        labels = {"route": run["route"], "model": run["model"]}
+        end = time.perf_counter()
+        llm_request_duration.observe(end - run["start"], **labels)
+        llm_time_to_first_token.observe((run["first_token"] or end) - run["start"], **labels)
+
+        # A call coalesced by the LLM gateway shared another call's generation - its tokens were already counted there
+        if _coalesced(response):
+            llm_requests.inc(status="coalesced", **labels)
+            return
+        llm_requests.inc(status="ok", **labels)
+
+        usage = _usage(response)
+        if usage is not None:
+            llm_prompt_tokens.observe(usage["input_tokens"], **labels)
+            llm_completion_tokens.observe(usage["output_tokens"], **labels)
+            llm_tokens.inc(usage["input_tokens"], kind="prompt", **labels)
+            llm_tokens.inc(usage["output_tokens"], kind="completion", **labels)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is not None:
+            llm_requests.inc(status=type(error).__name__, route=run["route"], model=run["model"])
+
+
+# Ollama puts the token counts on the returned message as usage_metadata
+def _usage(response: LLMResult) -> dict[str, int] | None:
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return {"input_tokens": usage.get("input_tokens", 0), "output_tokens": usage.get("output_tokens", 0)}
+    return None
+
+
+# The LLM gateway flags the generations it handed to coalesced callers (see llm_gateway.mark_coalesced)
+def _coalesced(response: LLMResult) -> bool:
+    return any((generation.generation_info or {}).get("coalesced") for generations in response.generations for generation in generations)
+
+
+# The one handler every LLM in the app reports to
+llm_metrics_callback = LLMMetricsCallback()
+
+
+# Figure out which route a request is for ("/items/{item_id}", not "/items/42" - so labels don't explode)
+def route_template(scope: dict[str, Any]) -> str:
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", scope["path"])
+    return scope["path"]
+
+
+class RouteTagMiddleware:
+    """Pure ASGI middleware: tags everything that happens during a request with that request's route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = current_route.set(route_template(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_route.reset(token)
+
+
+# Everything in Prometheus' text exposition format
+def render_metrics() -> str:
+    lines = []
+    for metric in [llm_request_duration, llm_time_to_first_token, llm_prompt_tokens, llm_completion_tokens, llm_requests, llm_tokens,
+                   graph_span_duration]:
+        lines.extend(metric.render())
+
+    # The LLM gateway's live numbers, as gauges
+    gateway = llm_gateway.stats()
+    for name, help_text in [
+        ("active", "LLM generations running right now"),
+        ("queue_depth", "Requests waiting for an LLM slot"),
+        ("wait_p50_ms", "Median wait for an LLM slot (recent requests)"),
+        ("wait_p99_ms", "p99 wait for an LLM slot (recent requests)")
+    ]:
+        lines += [f"# HELP llm_gateway_{name} {help_text}", f"# TYPE llm_gateway_{name} gauge", f"llm_gateway_{name} {gateway[name]:g}"]
+    for name in ["admitted", "rejected", "timed_out", "coalesced"]:
+        lines += [f"# TYPE llm_gateway_{name}_total counter", f"llm_gateway_{name}_total {gateway[name]:g}"]
+
+    return "\n".join(lines) + "\n"
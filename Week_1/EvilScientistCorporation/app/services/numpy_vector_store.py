@@ -0,0 +1,218 @@
+# An alternative vector store backend: plain NumPy + a memory-mapped file
+# Our collections only hold a few thousand vectors, and at that size a brute-force dot product
+# is faster than going through the Chroma client, its SQLite layer and the HNSW index.
+#
+# On disk, each collection is a folder with:
+#   vectors.f32 - a float32 matrix (one row per document), memory-mapped so the OS handles paging
+#   index.json  - the sidecar table: IDs, documents and metadata, in the same row order as the matrix
+#
+# It implements the handful of Chroma methods our vectordb_service uses, so get_vector_store() can hand out either one
+import json
+import os
+import threading
+from typing import Any
+
+import numpy as np
+from langchain_core.documents import Document
+
+INITIAL_CAPACITY = 1024 # rows allocated in the vector file up front (it doubles when it fills up)
+
+
+class NumpyVectorStore:
+    """
+    Exact (brute-force) vector search over a memory-mapped float32 matrix.
+    Scores are squared L2 distances (lower is better) - the same scores Chroma returns with its default "l2" space.
+    """
+
+    def __init__(self, collection_name: str, persist_directory: str, embedding_function: Any):
+        self.collection_name = collection_name
+        self.embedding_function = embedding_function
+
+        self._directory = os.path.join(persist_directory, "numpy", collection_name)
+        self._vectors_path = os.path.join(self._directory, "vectors.f32")
+        self._index_path = os.path.join(self._directory, "index.json")
+        os.makedirs(self._directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+
+        # Sidecar table (row i of the matrix belongs to ids[i], documents[i], metadatas[i])
+        self._ids: list[str] = []
+        self._documents: list[str] = []
+        self._metadatas: list[dict[str, Any]] = []
+        self._rows: dict[str, int] = {} # ID -> row number
+
+        self._dim: int | None = None
+        self._capacity = 0
+        self._matrix: np.memmap | None = None
+        self._norms_sq = np.zeros(0, dtype=np.float32) # squared length of every stored vector (saves work per query)
+
+        self._load()
+
+    # ===============================(PERSISTENCE)==================================
+
+    def _load(self) -> None:
+        if not os.path.exists(self._index_path):
+            return
+
+        with open(self._index_path, "r", encoding="utf-8") as index_file:
+            index = json.load(index_file)
+
+        self._ids = index["ids"]
+        self._documents = index["documents"]
+        self._metadatas = index["metadatas"]
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._dim = index["dim"]
+        self._capacity = index["capacity"]
+
+        if self._dim is not None and self._capacity:
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(self._capacity, self._dim))
+            live = self._matrix[:len(self._ids)]
+            self._norms_sq = np.einsum("ij,ij->i", live, live)
+
+    def _save_index(self) -> None:
+        index = {
+            "dim": self._dim,
+            "capacity": self._capacity,
+            "ids": self._ids,
+            "documents": self._documents,
+            "metadatas": self._metadatas
+        }
+
+        # Write to a temp file first, then swap it in, so a crash never leaves a half-written index
+        temp_path = self._index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as index_file:
+            json.dump(index, index_file)
+        os.replace(temp_path, self._index_path)
+
+        if self._matrix is not None:
+            self._matrix.flush()
+
+    # Make sure the vector file has room for at least `rows` rows
+    def _ensure_capacity(self, rows: int, dim: int) -> None:
+        if self._dim is None:
+            self._dim = dim
+        elif dim != self._dim:
+            raise ValueError(f"Collection '{self.collection_name}' stores {self._dim}-d vectors, got {dim}-d")
+
+        if rows <= self._capacity:
+            return
+
+        new_capacity = max(rows, self._capacity * 2, INITIAL_CAPACITY)
+
+        # Grow the file on disk, then re-map it (the existing rows stay where they are)
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self._vectors_path, "ab") as vectors_file:
+            vectors_file.truncate(new_capacity * self._dim * 4) # 4 bytes per float32
+
+        self._capacity = new_capacity
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(self._capacity, self._dim))
+
+    # ===============================(WRITES)==================================
+
+    def add_documents(self, documents: list[Document], ids: list[str] | None = None) -> list[str]:
+        ids = ids or [doc.id for doc in documents]
+        embeddings = self.embedding_function.embed_documents([doc.page_content for doc in documents])
+        self.add_embeddings(ids, embeddings, [doc.page_content for doc in documents], [doc.metadata for doc in documents])
+        return ids
+
+    # Upsert already-embedded rows (existing IDs are overwritten in place)
+    def add_embeddings(self, ids: list[str], embeddings: list[list[float]], documents: list[str], metadatas: list[dict[str, Any]]) -> None:
+        if not ids:
+            return
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+
+        with self._lock:
+            new_ids = [doc_id for doc_id in dict.fromkeys(ids) if doc_id not in self._rows]
+            self._ensure_capacity(len(self._ids) + len(new_ids), vectors.shape[1])
+            self._norms_sq = np.resize(self._norms_sq, len(self._ids) + len(new_ids))
+
+            for doc_id, vector, document, metadata in zip(ids, vectors, documents, metadatas):
+                row = self._rows.get(doc_id)
+                if row is None:
+                    row = len(self._ids)
+                    self._rows[doc_id] = row
+                    self._ids.append(doc_id)
+                    self._documents.append(document)
+                    self._metadatas.append(metadata or {})
+                else:
+                    self._documents[row] = document
+                    self._metadatas[row] = metadata or {}
+
+                self._matrix[row] = vector
+                self._norms_sq[row] = float(vector @ vector)
+
+            self._save_index()
+
+    def delete(self, ids: list[str] | None = None) -> None:
+        with self._lock:
+            for doc_id in ids or []:
+                row = self._rows.pop(doc_id, None)
+                if row is None:
+                    continue
+
+                # Swap the last row into the hole, so the live rows stay packed at the top of the matrix
+                last = len(self._ids) - 1
+                if row != last:
+                    moved_id = self._ids[last]
+                    self._matrix[row] = self._matrix[last]
+                    self._norms_sq[row] = self._norms_sq[last]
+                    self._ids[row] = moved_id
+                    self._documents[row] = self._documents[last]
+                    self._metadatas[row] = self._metadatas[last]
+                    self._rows[moved_id] = row
+
+                self._ids.pop()
+                self._documents.pop()
+                self._metadatas.pop()
+                self._norms_sq = self._norms_sq[:last]
+
+            self._save_index()
+
+    # ===============================(READS)==================================
+
+    # Same shape of result as Chroma's get(): {"ids": [...], "documents": [...], "metadatas": [...]}
+    # `where` supports simple equality filters like {"source": "raw_text_ingestion"}
+    def get(self, ids: list[str] | None = None, where: dict[str, Any] | None = None, include: list[str] | None = None) -> dict[str, Any]:
+        include = ["documents", "metadatas"] if include is None else include
+
+        with self._lock:
+            rows = [self._rows[doc_id] for doc_id in ids if doc_id in self._rows] if ids is not None else range(len(self._ids))
+            if where:
+                rows = [row for row in rows if all(self._metadatas[row].get(key) == value for key, value in where.items())]
+
+            return {
+                "ids": [self._ids[row] for row in rows],
+                "documents": [self._documents[row] for row in rows] if "documents" in include else None,
+                "metadatas": [self._metadatas[row] for row in rows] if "metadatas" in include else None
+            }
+
+    # Exact top-k: one matrix-vector product for every distance, then argpartition to grab the k smallest
+    def similarity_search_by_vector_with_relevance_scores(self, embedding: list[float], k: int = 4, **kwargs) -> list[tuple[Document, float]]:
+        query = np.asarray(embedding, dtype=np.float32)
+
+        with self._lock:
+            count = len(self._ids)
+            if count == 0 or k <= 0:
+                return []
+
+            # ||x - q||^2 = ||x||^2 - 2 x.q + ||q||^2
+            distances = self._norms_sq - 2.0 * (self._matrix[:count] @ query) + float(query @ query)
+            distances = np.maximum(distances, 0.0) # rounding can push exact matches slightly below 0
+
+            k = min(k, count)
+            top_rows = np.argpartition(distances, k - 1)[:k] if k < count else np.arange(count)
+            top_rows = top_rows[np.argsort(distances[top_rows], kind="stable")]
+
+            return [
+                (
+                    Document(id=self._ids[row], page_content=self._documents[row], metadata=self._metadatas[row]),
+                    float(distances[row])
+                )
+                for row in top_rows
+            ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> list[tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_relevance_scores(self.embedding_function.embed_query(query), k)
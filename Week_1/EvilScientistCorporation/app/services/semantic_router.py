@@ -0,0 +1,193 @@
+# This service decides where a LangGraph query goes ("items", "plans" or "chat") by MEANING, not keywords
+# The agentic router spent a whole llama3.2 tool-calling request on this every turn (seconds!),
+# and the plain router's keyword lists miss anything phrased differently ("what's in the catalog?")
+#
+# How it works:
+#   - every route has a handful of example questions. They're embedded ONCE, and each route's vectors are
+#     averaged into a "centroid" (the route's meaning, as one vector)
+#   - a query is embedded and compared (cosine similarity) with every centroid - the closest one wins
+#   - if the top two scores are within ROUTER_MARGIN of each other it's too close to call, and the caller
+#     falls back to its old router (the LLM for the agentic graph, keywords for the plain graph)
+#
+# The query is embedded through the shared query-embedding cache, so the vector search that follows the
+# routing decision gets the same vector for free
+import asyncio
+import os
+import threading
+import time
+from typing import Any
+
+import numpy as np
+
+from app.services.embedding_cache import get_query_embedding
+
+ROUTER_MARGIN = float(os.getenv("ROUTER_MARGIN", "0.05")) # minimum gap between the best and second-best route
+
+ROUTE_EXAMPLES: dict[str, list[str]] = {
+    "items": [
+        "What gadgets do we have for sale?",
+        "How much does the freeze ray cost?",
+        "Recommend a product for taking over a city",
+        "Which items are in stock?",
+        "I want to buy a death ray",
+        "Show me your cheapest weapons",
+        "What's the price of the moon laser?",
+        "Do you sell mind control devices?",
+        "List the products in the evil catalog",
+        "What can I purchase to destroy my enemies?"
+    ],
+    "plans": [
+        "What is the boss planning?",
+        "Tell me about the boss's latest scheme",
+        "What are the evil plans for next quarter?",
+        "When does the boss plan to attack the city?",
+        "Summarize the boss's schemes",
+        "What's the boss's plan for world domination?",
+        "Who is involved in the boss's scheme?",
+        "What are the phases of the master plan?",
+        "Is the boss plotting against the hero?",
+        "What did the boss decide at the last meeting?"
+    ],
+    "chat": [
+        "Hi, how are you?",
+        "Tell me a joke",
+        "What's your name?",
+        "Thanks for the help!",
+        "How do I become more evil?",
+        "What's the weather like in the lair?",
+        "Give me some motivation",
+        "What did I just ask you?",
+        "Write a short evil poem",
+        "Good morning!"
+    ]
+}
+
+
+# The old router: VERY basic keyword matching. Now the plain graph's fallback when the scores are too close to call
+def keyword_route(query: str) -> str:
+    query = query.lower()
+
+    about_items = any(word in query for word in ["item", "items", "product", "buy", "purchase"])
+    about_plans = any(word in query for word in ["boss", "boss's", "plan", "plans", "scheme", "schemes"])
+
+    # Both? Search both collections (see fanout_retrieval.py)
+    if about_items and about_plans:
+        return "both"
+
+    if about_items:
+        return "items"
+
+    if about_plans:
+        return "plans"
+
+    # Fall back route
+    return "chat"
+
+
+# Too close to call between items and plans? The question is probably about both
+def is_items_plans_tie(decision: dict[str, Any]) -> bool:
+    return not decision["confident"] and {decision["route"], decision["runner_up"]} == {"items", "plans"}
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class SemanticRouter:
+
+    def __init__(self, embedding: Any = None, examples: dict[str, list[str]] = ROUTE_EXAMPLES, margin: float = ROUTER_MARGIN):
+        # embedding=None means "whatever the vector DB uses" (looked up when the centroids are built)
+        self._embedding = embedding
+        self.examples = examples
+        self.margin = margin
+
+        self._lock = threading.Lock()
+        self._routes: list[str] = []
+        self._centroids: np.ndarray | None = None # one normalized row per route
+        self.build_ms = 0.0
+        self._warm_up_task: asyncio.Task | None = None
+
+        self.decisions = {route: 0 for route in examples}
+        self.fallbacks = 0
+
+    @property
+    def embedding(self) -> Any:
+        if self._embedding is None:
+            # Imported here so the router can be built (and tested) without Chroma
+            from app.services import vectordb_service
+            self._embedding = vectordb_service.EMBEDDING
+        return self._embedding
+
+    # Embed the examples and compute the centroids (once - later calls return right away)
+    def build(self) -> None:
+        with self._lock:
+            if self._centroids is not None:
+                return
+
+            start = time.perf_counter()
+            routes = list(self.examples)
+            centroids = []
+            for route in routes:
+                vectors = _normalize(np.array(self.embedding.embed_documents(self.examples[route]), dtype=np.float32))
+                centroids.append(vectors.mean(axis=0))
+
+            self._routes = routes
+            self._centroids = _normalize(np.array(centroids))
+            self.build_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    # Build in the background at startup, so the first query doesn't pay for embedding the examples
+    def warm_up(self) -> None:
+        self._warm_up_task = asyncio.get_running_loop().create_task(self._build_in_background())
+
+    async def _build_in_background(self) -> None:
+        try:
+            await asyncio.to_thread(self.build)
+        except Exception as error:
+            print(f"[ROUTER] couldn't embed the route examples yet: {error}")
+
+    # Returns {"route", "runner_up", "scores", "margin", "confident"}
+    # If confident is False the scores were too close to call, and the caller should use its fallback router
+    def classify(self, query: str) -> dict[str, Any]:
+        self.build()
+
+        vector = _normalize(np.array(get_query_embedding(query, self.embedding), dtype=np.float32))
+        similarities = self._centroids @ vector
+
+        order = np.argsort(similarities)[::-1]
+        best = float(similarities[order[0]])
+        second = float(similarities[order[1]]) if len(order) > 1 else -1.0
+        confident = best - second >= self.margin
+
+        route = self._routes[order[0]]
+        if confident:
+            self.decisions[route] += 1
+        else:
+            self.fallbacks += 1
+
+        return {
+            "route": route,
+            "runner_up": self._routes[order[1]] if len(order) > 1 else None,
+            "scores": {name: round(float(score), 4) for name, score in zip(self._routes, similarities)},
+            "margin": round(best - second, 4),
+            "confident": confident
+        }
+
+    # The query embedding may be a round trip to Ollama, so async callers run classify in a thread
+    async def aclassify(self, query: str) -> dict[str, Any]:
+        return await asyncio.to_thread(self.classify, query)
+
+    def stats(self) -> dict[str, Any]:
+        decided = sum(self.decisions.values())
+        return {
+            "built": self._centroids is not None,
+            "build_ms": self.build_ms,
+            "margin": self.margin,
+            "decisions": dict(self.decisions),
+            "fallbacks": self.fallbacks,
+            "fallback_rate": round(self.fallbacks / (decided + self.fallbacks), 4) if decided + self.fallbacks else 0.0
+        }
+
+
+# Shared by both LangGraph graphs
+semantic_router = SemanticRouter()
@@ -0,0 +1,148 @@
+# This service gives every chat SESSION its own conversation memory
+# The old ConversationSummaryMemory was one global object (everyone shared one conversation!) and it made a
+# second, blocking LLM call every turn to re-summarize the history before the answer could go back
+#
+# Here each session keeps:
+#   - a running summary of the older part of the conversation
+#   - the most recent messages, word for word
+# Answers only need those two things, so they go out right away. When the recent messages pile up,
+# the oldest ones get folded into the summary by a BACKGROUND task, after the response has been sent
+#
+# Memory stays bounded: a capped number of messages and summary characters per session, a capped number of
+# sessions, and sessions that sit idle too long are evicted
+import time
+from collections import OrderedDict
+from typing import Any
+
+SESSION_WINDOW_MESSAGES = 6 # recent messages kept word for word after compaction (3 user/AI turns)
+SESSION_COMPACT_AFTER = 10 # compact once a session has more recent messages than this
+SESSION_MAX_MESSAGES = 40 # hard cap, in case compaction keeps failing (e.g. Ollama is down)
+SESSION_MAX_SUMMARY_CHARS = 2000
+SESSION_MAX_SESSIONS = 1000
+SESSION_IDLE_TTL_SECONDS = 30 * 60 # evict sessions nobody has used for 30 minutes
+
+
+class SessionMemory:
+
+    def __init__(self):
+        self.summary = ""
+        self.messages: list[tuple[str, str]] = [] # (role, text) pairs, oldest first
+        self.last_used = time.monotonic()
+        self.compacting = False
+
+
+def format_messages(messages: list[tuple[str, str]]) -> str:
+    return "\n".join(f"{role}: {text}" for role, text in messages)
+
+
+class SessionMemoryStore:
+
+    def __init__(
+        self,
+        summarizer: Any = None,
+        window: int = SESSION_WINDOW_MESSAGES,
+        compact_after: int = SESSION_COMPACT_AFTER,
+        max_sessions: int = SESSION_MAX_SESSIONS,
+        idle_ttl_seconds: float = SESSION_IDLE_TTL_SECONDS
+    ):
+        # summarizer: a runnable that takes {"summary", "new_lines"} and returns the new summary
+        self.summarizer = summarizer
+        self.window = window
+        self.compact_after = compact_after
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+
+        # Least recently used session first, so eviction is a pop from the front
+        self._sessions: OrderedDict[str, SessionMemory] = OrderedDict()
+        self.evictions = 0
+        self.compactions = 0
+
+    def _session(self, session_id: str) -> SessionMemory:
+        self.evict_idle()
+
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = SessionMemory()
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+        session.last_used = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    # Drop sessions that have been idle for longer than the TTL
+    def evict_idle(self) -> int:
+        cutoff = time.monotonic() - self.idle_ttl_seconds
+        evicted = 0
+        # Oldest-used sessions are at the front, so we can stop at the first one that's still active
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_used >= cutoff:
+                break
+            del self._sessions[session_id]
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    # What goes into the prompt's {history}: the summary of older turns + the recent messages
+    def history(self, session_id: str) -> str:
+        session = self._session(session_id)
+        parts = []
+        if session.summary:
+            parts.append(f"Summary of earlier conversation: {session.summary}")
+        if session.messages:
+            parts.append(format_messages(session.messages))
+        return "\n".join(parts)
+
+    def add_turn(self, session_id: str, user_input: str, answer: str) -> None:
+        session = self._session(session_id)
+        session.messages.append(("Human", user_input))
+        session.messages.append(("AI", answer))
+        if len(session.messages) > SESSION_MAX_MESSAGES:
+            del session.messages[:len(session.messages) - SESSION_MAX_MESSAGES]
+
+    def needs_compaction(self, session_id: str) -> bool:
+        session = self._sessions.get(session_id)
+        return session is not None and not session.compacting and len(session.messages) > self.compact_after
+
+    # Fold the oldest messages into the summary - meant to run as a background task after the response is sent
+    async def maybe_compact(self, session_id: str) -> None:
+        if self.summarizer is None or not self.needs_compaction(session_id):
+            return
+
+        session = self._sessions[session_id]
+        session.compacting = True
+        to_compact = session.messages[:len(session.messages) - self.window]
+
+        try:
+            result = await self.summarizer.ainvoke({"summary": session.summary, "new_lines": format_messages(to_compact)})
+        except Exception as error:
+            print(f"[MEMORY] compaction of session '{session_id}' failed: {error}")
+            return
+        finally:
+            session.compacting = False
+
+        # New turns may have been added while we were summarizing - only drop the ones we actually summarized
+        if session.messages[:len(to_compact)] == to_compact:
+            del session.messages[:len(to_compact)]
+
+        summary = getattr(result, "content", result)
+        session.summary = str(summary)[:SESSION_MAX_SUMMARY_CHARS]
+        self.compactions += 1
+
+    def clear(self, session_id: str | None = None) -> None:
+        if session_id is None:
+            self._sessions.clear()
+        else:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "messages": sum(len(session.messages) for session in self._sessions.values()),
+            "compactions": self.compactions,
+            "evictions": self.evictions
+        }
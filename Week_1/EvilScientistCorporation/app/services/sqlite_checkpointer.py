@@ -0,0 +1,391 @@
+# This service makes the LangGraph conversations survive restarts
+# MemorySaver (and BoundedMemorySaver) only live in the process - every deploy wiped every conversation
+#
+# SQLiteCheckpointSaver keeps the in-memory saver for reads (so a graph turn never waits on disk) and copies
+# its threads into a local SQLite file BEHIND the requests:
+#   - puts only mark the thread as "dirty"; a background thread writes all dirty threads every
+#     GRAPH_DB_FLUSH_INTERVAL_SECONDS, in ONE transaction (a graph turn does several puts - they become one write)
+#   - SQLite runs in WAL mode, so writes don't block reads and commits are cheap
+#   - threads that aren't in memory (after a restart, or after being evicted) are loaded from the file on first use
+#     (aget_tuple does that read on a worker thread, not on the event loop).
+#     Evicting a thread doesn't write it out on the spot either: its rows wait for the writer with the dirty threads.
+#     And the saver remembers which thread ids the file has, so a brand new conversation never waits on a lookup
+#   - only the last GRAPH_MAX_CHECKPOINTS checkpoints per thread are kept (the in-memory pruning from
+#     graph_memory.py - the file only ever gets what's left), and threads nobody touched for
+#     GRAPH_DB_RETENTION_SECONDS are deleted from the file by a periodic pruning pass
+#
+# Constructing a saver doesn't touch the file - open() does that and starts the writer (main.py's lifespan handler),
+# so merely importing the graphs never creates graph_checkpoints.db
+#
+# The trade-off: a crash can lose the last GRAPH_DB_FLUSH_INTERVAL_SECONDS of conversation
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any
+
+from app.services.graph_memory import BoundedMemorySaver
+
+GRAPH_DB_PATH = os.getenv("GRAPH_CHECKPOINT_DB", "./graph_checkpoints.db") # lives next to app.db
+GRAPH_DB_FLUSH_INTERVAL_SECONDS = float(os.getenv("GRAPH_DB_FLUSH_INTERVAL_SECONDS", "0.5"))
+GRAPH_DB_PRUNE_INTERVAL_SECONDS = 10 * 60
+GRAPH_DB_RETENTION_SECONDS = 7 * 24 * 60 * 60 # conversations untouched for a week are deleted
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    graph TEXT, thread_id TEXT, updated_at REAL,
+    PRIMARY KEY (graph, thread_id)
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    graph TEXT, thread_id TEXT, checkpoint_ns TEXT, checkpoint_id TEXT,
+    checkpoint_type TEXT, checkpoint BLOB, metadata_type TEXT, metadata BLOB, parent_id TEXT,
+    PRIMARY KEY (graph, thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    graph TEXT, thread_id TEXT, checkpoint_ns TEXT, checkpoint_id TEXT, task_id TEXT, idx INTEGER,
+    channel TEXT, value_type TEXT, value BLOB, task_path TEXT,
+    PRIMARY KEY (graph, thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    graph TEXT, thread_id TEXT, checkpoint_ns TEXT, channel TEXT, version TEXT, value_type TEXT, value BLOB,
+    PRIMARY KEY (graph, thread_id, checkpoint_ns, channel, version)
+);
+"""
+TABLES = ["threads", "checkpoints", "writes", "blobs"]
+
+
+class _ThreadIndexedDict(defaultdict):
+    """
+    MemorySaver's writes/blobs dicts (every key starts with the thread id) + an index of each thread's keys,
+    so one thread's rows can be found without scanning every other thread's.
+    MemorySaver and BoundedMemorySaver only ever add keys with d[key] = ..., and remove them with del / pop.
+    """
+
+    def __init__(self, *args: Any):
+        super().__init__(*args)
+        self._thread_keys: dict[str, set[tuple]] = {}
+
+    def keys_for(self, thread_id: str) -> list[tuple]:
+        return list(self._thread_keys.get(thread_id, ()))
+
+    def __setitem__(self, key: tuple, value: Any) -> None:
+        super().__setitem__(key, value) # (defaultdict creates missing entries through here too)
+        self._thread_keys.setdefault(key[0], set()).add(key)
+
+    def __delitem__(self, key: tuple) -> None:
+        super().__delitem__(key)
+        self._unindex(key)
+
+    def pop(self, key: tuple, *default: Any) -> Any:
+        value = super().pop(key, *default)
+        self._unindex(key)
+        return value
+
+    def _unindex(self, key: tuple) -> None:
+        keys = self._thread_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._thread_keys[key[0]]
+
+
+class SQLiteCheckpointSaver(BoundedMemorySaver):
+    """
+    BoundedMemorySaver + a write-behind copy of every thread in SQLite.
+    `graph` namespaces the rows, so several graphs can share one database file.
+    Nothing touches the file until open() - until then it's just a BoundedMemorySaver.
+    """
+
+    def __init__(
+        self,
+        graph: str,
+        path: str = GRAPH_DB_PATH,
+        flush_interval: float = GRAPH_DB_FLUSH_INTERVAL_SECONDS,
+        prune_interval: float = GRAPH_DB_PRUNE_INTERVAL_SECONDS,
+        retention_seconds: float = GRAPH_DB_RETENTION_SECONDS,
+        **kwargs: Any
+    ):
+        super().__init__(**kwargs)
+        # Indexed by thread, so flushing / evicting a thread only touches that thread's rows
+        self.writes = _ThreadIndexedDict(dict)
+        self.blobs = _ThreadIndexedDict()
+        self.graph = graph
+        self.path = path
+        self.flush_interval = flush_interval
+        self.prune_interval = prune_interval
+        self.retention_seconds = retention_seconds
+
+        # One connection, shared by the request threads (loads) and the writer thread, guarded by _db_lock
+        self._db_lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None # opened by open()
+
+        self._dirty: set[str] = set() # threads whose rows in the file are out of date
+        # Threads evicted from memory before the writer got to them: thread_id -> the rows to write
+        # (they stay here until a flush has really written them)
+        self._evicted: dict[str, dict[str, list[tuple]]] = {}
+        self._flushing: set[str] = set() # threads in the batch a flush is writing right now
+        self._flush_generation = 0 # bumped by every flush, so a load can tell the file changed while it read
+        # Thread ids the file has rows for - any other thread id is new, no need to ask the file
+        # (only changed with _db_lock held, see open(), flush() and prune())
+        self._stored_threads: set[str] = set()
+        self.flushes = 0
+        self.rows_written = 0
+        self.loaded_threads = 0
+        self.pruned_threads = 0
+        self.last_flush_ms = 0.0
+
+        self._stop = threading.Event()
+        self._last_prune = time.monotonic()
+        self._writer: threading.Thread | None = None
+
+    # Open the file and start the writer thread (the app does this in its lifespan handler, not at import)
+    def open(self) -> "SQLiteCheckpointSaver":
+        with self._db_lock:
+            if self._db is not None:
+                return self
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL") # with WAL: durable across app crashes, fast commits
+            self._db.executescript(SCHEMA)
+            self._stored_threads.update(row[0] for row in self._db.execute(
+                "SELECT thread_id FROM threads WHERE graph = ?", (self.graph,)))
+
+        self._writer = threading.Thread(target=self._run_writer, name=f"checkpoint-writer-{self.graph}", daemon=True)
+        self._writer.start()
+        return self
+
+    # READS ------------------------------------------------------------------------------------------
+
+    # A thread that has to come from the file is read WITHOUT holding _lock, so graph turns on other threads
+    # (and the flush snapshot) don't wait for the read - or for a flush transaction the read is waiting behind
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        while True:
+            with self._lock:
+                if not self._needs_file(thread_id):
+                    return super().get_tuple(config)
+                generation = self._flush_generation
+
+            rows = self._read(thread_id)
+
+            with self._lock:
+                # A flush started while we read - the thread may have been loaded, changed, evicted and written
+                # by someone else in the meantime, so what we read could be stale. Look again
+                if self._flush_generation != generation:
+                    continue
+                if self._needs_file(thread_id):
+                    self._restore(thread_id, rows)
+                    self.loaded_threads += 1
+                return super().get_tuple(config)
+
+    # MemorySaver's aget_tuple just calls get_tuple - on the event loop. Reading from the file goes to a worker thread
+    async def aget_tuple(self, config):
+        with self._lock:
+            needs_file = self._needs_file(config["configurable"]["thread_id"])
+        if needs_file:
+            return await asyncio.to_thread(self.get_tuple, config)
+        return self.get_tuple(config)
+
+    # Is the thread only in the file? (caller holds _lock)
+    # Evicted rows still waiting for the writer are taken straight back into memory - they never made it to the file
+    def _needs_file(self, thread_id: str) -> bool:
+        if thread_id in self.storage:
+            return False
+        rows = self._evicted.pop(thread_id, None)
+        if rows is not None:
+            self._dirty.add(thread_id)
+            self._restore(thread_id, rows)
+            return False
+        return thread_id in self._stored_threads
+
+    def _read(self, thread_id: str) -> dict[str, list[tuple]]:
+        with self._db_lock:
+            return {table: self._db.execute(f"SELECT * FROM {table} WHERE graph = ? AND thread_id = ?",
+                                            (self.graph, thread_id)).fetchall() for table in TABLES}
+
+    # Put a thread's rows (same shapes as the tables) back into memory (caller holds _lock)
+    def _restore(self, thread_id: str, rows: dict[str, list[tuple]]) -> None:
+        if not rows["checkpoints"]:
+            return
+
+        # Same shapes MemorySaver uses (see langgraph.checkpoint.memory)
+        for _, _, ns, checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata, parent_id in rows["checkpoints"]:
+            self.storage[thread_id][ns][checkpoint_id] = ((checkpoint_type, checkpoint), (metadata_type, metadata), parent_id)
+        for _, _, ns, checkpoint_id, task_id, idx, channel, value_type, value, task_path in rows["writes"]:
+            self.writes[(thread_id, ns, checkpoint_id)][(task_id, idx)] = (task_id, channel, (value_type, value), task_path)
+        for _, _, ns, channel, version, value_type, value in rows["blobs"]:
+            self.blobs[(thread_id, ns, channel, version)] = (value_type, value)
+
+        self._touch(thread_id)
+
+    # WRITES (in memory now, to the file later) -----------------------------------------------------
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with self._lock:
+            self._dirty.add(config["configurable"]["thread_id"])
+            return super().put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with self._lock:
+            self._dirty.add(config["configurable"]["thread_id"])
+            super().put_writes(config, writes, task_id, task_path)
+
+    # Deleting a thread deletes it from the file too (on the next flush)
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._forget(thread_id)
+            self._evicted.pop(thread_id, None)
+            self._last_used.pop(thread_id, None)
+            self._dirty.add(thread_id)
+
+    # Evicting (LRU/idle) only drops the thread from MEMORY - it stays in the file.
+    # Unwritten changes are handed to the writer (this runs inside put(), so no disk I/O here)
+    def _evict(self, thread_id: str) -> None:
+        # (a thread the running flush is writing counts too - that write might still fail)
+        if thread_id in self._dirty or thread_id in self._flushing:
+            self._dirty.discard(thread_id)
+            self._evicted[thread_id] = self._rows(thread_id)
+        self._last_used.pop(thread_id, None)
+        self._forget(thread_id)
+        self.evictions += 1
+
+    # Drop a thread from memory (MemorySaver.delete_thread does the same, but scans every thread's writes and blobs)
+    def _forget(self, thread_id: str) -> None:
+        self.storage.pop(thread_id, None)
+        for key in self.writes.keys_for(thread_id):
+            del self.writes[key]
+        for key in self.blobs.keys_for(thread_id):
+            del self.blobs[key]
+
+    # A thread's current rows, from memory (an empty dict means "delete it from the file")
+    def _rows(self, thread_id: str) -> dict[str, list[tuple]]:
+        rows: dict[str, list[tuple]] = {table: [] for table in TABLES}
+        if thread_id not in self.storage:
+            return rows
+
+        rows["threads"].append((self.graph, thread_id, time.time()))
+        for ns, checkpoints in self.storage[thread_id].items():
+            for checkpoint_id, ((checkpoint_type, checkpoint), (metadata_type, metadata), parent_id) in checkpoints.items():
+                rows["checkpoints"].append(
+                    (self.graph, thread_id, ns, checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata, parent_id))
+        for key in self.writes.keys_for(thread_id):
+            _, ns, checkpoint_id = key
+            for (task_id, idx), (_, channel, (value_type, value), task_path) in self.writes[key].items():
+                rows["writes"].append((self.graph, thread_id, ns, checkpoint_id, task_id, idx, channel, value_type, value, task_path))
+        for key in self.blobs.keys_for(thread_id):
+            _, ns, channel, version = key
+            value_type, value = self.blobs[key]
+            rows["blobs"].append((self.graph, thread_id, ns, channel, str(version), value_type, value))
+        return rows
+
+    # Replace the file's copy of each thread with its current rows - all in one transaction (caller holds _db_lock)
+    def _write(self, threads: dict[str, dict[str, list[tuple]]]) -> None:
+        start = time.perf_counter()
+        with self._db:
+            for thread_id, rows in threads.items():
+                for table in TABLES:
+                    self._db.execute(f"DELETE FROM {table} WHERE graph = ? AND thread_id = ?", (self.graph, thread_id))
+                    if rows[table]:
+                        placeholders = ", ".join("?" * len(rows[table][0]))
+                        self._db.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows[table])
+                        self.rows_written += len(rows[table])
+        self.flushes += 1
+        self.last_flush_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    # Write every dirty thread now (the writer thread calls this on a timer; also handy on shutdown)
+    def flush(self) -> int:
+        # Snapshot the rows under the lock, but write them without it, so graph turns don't wait on the disk
+        # (we take the database lock BEFORE letting go, so nobody can load a thread from the file in between)
+        with self._lock:
+            evicted = dict(self._evicted)
+            dirty, self._dirty = self._dirty, set()
+            threads = {**evicted, **{thread_id: self._rows(thread_id) for thread_id in dirty}}
+            self._flushing = set(threads)
+            self._flush_generation += 1
+            self._db_lock.acquire()
+            # Only touched with the database lock held, so a prune() can't undo this before the write lands
+            stored_before = self._stored_threads & self._flushing
+            for thread_id, rows in threads.items():
+                if rows["threads"]:
+                    self._stored_threads.add(thread_id)
+                else:
+                    self._stored_threads.discard(thread_id)
+
+        written = False
+        try:
+            if threads:
+                self._write(threads)
+            written = True
+        except Exception:
+            # Nothing reached the file (the transaction rolled back) - undo the bookkeeping
+            self._stored_threads.difference_update(threads)
+            self._stored_threads.update(stored_before)
+            raise
+        finally:
+            self._db_lock.release()
+            with self._lock:
+                self._flushing = set()
+                if written:
+                    # Evicted rows are done - unless they were replaced (or taken back into memory) meanwhile
+                    for thread_id, rows in evicted.items():
+                        if self._evicted.get(thread_id) is rows:
+                            del self._evicted[thread_id]
+                else:
+                    # The whole batch goes again on the next flush (evicted rows never left _evicted,
+                    # and a thread evicted during the write is in there now too)
+                    self._dirty.update(thread_id for thread_id in dirty if thread_id not in self._evicted)
+        return len(threads)
+
+    # Delete threads nobody has touched for retention_seconds from the file
+    def prune(self) -> int:
+        cutoff = time.time() - self.retention_seconds
+        with self._db_lock, self._db:
+            stale = [row[0] for row in self._db.execute(
+                "SELECT thread_id FROM threads WHERE graph = ? AND updated_at < ?", (self.graph, cutoff))]
+            for thread_id in stale:
+                for table in TABLES:
+                    self._db.execute(f"DELETE FROM {table} WHERE graph = ? AND thread_id = ?", (self.graph, thread_id))
+            self._stored_threads.difference_update(stale)
+        self.pruned_threads += len(stale)
+        return len(stale)
+
+    def _run_writer(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                if time.monotonic() - self._last_prune >= self.prune_interval:
+                    self._last_prune = time.monotonic()
+                    self.prune()
+                    self.evict_idle()
+            except Exception as error:
+                print(f"[CHECKPOINTS] writing to {self.path} failed: {error}")
+
+    # Stop the writer and write out whatever is left (call on shutdown)
+    def close(self) -> None:
+        if self._writer is None or self._stop.is_set():
+            return
+        self._stop.set()
+        self._writer.join()
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+    def stats(self) -> dict[str, Any]:
+        stats = super().stats()
+        with self._lock:
+            pending = len(self._dirty) + len(self._evicted)
+        with self._db_lock:
+            stored = len(self._stored_threads)
+        return {
+            **stats,
+            "db_path": self.path,
+            "stored_threads": stored,
+            "pending_threads": pending,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "last_flush_ms": self.last_flush_ms,
+            "loaded_threads": self.loaded_threads,
+            "pruned_threads": self.pruned_threads
+        }
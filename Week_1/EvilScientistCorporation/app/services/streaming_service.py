@@ -0,0 +1,97 @@
+# This service helps us STREAM LLM responses to the client token by token
+# We use Server-Sent Events (SSE): a plain HTTP response that stays open, where each message looks like
+#   data: {"token": "Hello"}\n\n
+# The frontend can render each token the moment it arrives instead of waiting for the whole completion
+import json
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
+
+from app.services.llm_gateway import LLMOverloadedError
+
+
+# Format one SSE message (optionally with a named event type)
+def sse_event(data: dict[str, Any], event: str | None = None) -> str:
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data)}\n\n"
+
+
+# What a stream sends when the LLM gateway turned the request away
+def overloaded_event(error: LLMOverloadedError) -> str:
+    return sse_event({"error": str(error), "retry_after": error.retry_after}, event="error")
+
+
+# What a stream sends when anything else broke halfway (Ollama down, connection dropped...)
+# The details go to the log, not to the client
+def failed_event(route: str, error: Exception) -> str:
+    print(f"[STREAM] {route or 'stream'} failed: {type(error).__name__}: {error}")
+    return sse_event({"error": "Something went wrong while generating the answer"}, event="error")
+
+
+# Pull the text out of whatever a chain streams back (AIMessageChunk, str, dict...)
+def chunk_text(chunk: Any) -> str:
+    if isinstance(chunk, str):
+        return chunk
+    if isinstance(chunk, dict):
+        return chunk.get("output") or chunk.get("response") or chunk.get("text") or ""
+    return getattr(chunk, "content", "") or ""
+
+
+# Turn a chain's astream() output into SSE messages
+# Each token is flushed as its own "data" message, then a final "done" event reports timings:
+#   ttft_ms  - time to first token (how long the user waited before seeing anything)
+#   total_ms - time until the full completion finished
+# on_complete gets the full text at the end (e.g. to save it to conversation memory)
+async def stream_tokens(
+    token_stream: AsyncIterator[Any],
+    on_complete: Callable[[str], Awaitable[None]] | None = None,
+    route: str = ""
+) -> AsyncIterator[str]:
+    start = time.perf_counter()
+    first_token_at = None
+    parts = []
+
+    try:
+        async for chunk in token_stream:
+            text = chunk_text(chunk)
+            if not text:
+                continue
+
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+
+            parts.append(text)
+            yield sse_event({"token": text})
+    except LLMOverloadedError as error:
+        # The 200 + headers are already sent by now, so we can't answer 503 - tell the client in the stream instead
+        yield overloaded_event(error)
+        return
+    except Exception as error:
+        # Same deal for any other failure - otherwise the client just sees the stream stop
+        yield failed_event(route, error)
+        return
+
+    total_ms = (time.perf_counter() - start) * 1000
+    ttft_ms = (first_token_at - start) * 1000 if first_token_at is not None else total_ms
+
+    if on_complete is not None:
+        await on_complete("".join(parts))
+
+    print(f"[STREAM] {route or 'stream'}: ttft={ttft_ms:.1f}ms total={total_ms:.1f}ms tokens={len(parts)}")
+    yield sse_event({"ttft_ms": round(ttft_ms, 1), "total_ms": round(total_ms, 1), "tokens": len(parts)}, event="done")
+
+
+# Wrap an SSE generator in a StreamingResponse with the right headers
+# background (optional) runs after the last event has been sent
+def sse_response(events: AsyncIterator[str], background: BackgroundTask | None = None) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        background=background,
+        headers={
+            "Cache-Control": "no-cache", # don't let anything cache a live stream
+            "X-Accel-Buffering": "no" # tell proxies like nginx not to buffer the tokens
+        }
+    )
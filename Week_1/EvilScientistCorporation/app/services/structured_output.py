@@ -0,0 +1,178 @@
+# This service turns LLM output into Pydantic models RELIABLY
+# Asking the model nicely for JSON isn't enough - llama3.2 sometimes adds prose, code fences,
+# commas in numbers (1,000.50) or a trailing comma, and the parser throws a 500 at the user
+#
+# Three layers of defense:
+#   1. The chain passes the model's JSON schema to Ollama (format=...), so generation is constrained to that shape
+#   2. Whatever comes back gets repaired (fences/prose stripped, number commas and trailing commas removed,
+#      cut-off JSON closed) before parsing
+#   3. If it STILL doesn't parse, we regenerate - but only up to STRUCTURED_MAX_ATTEMPTS times
+# Parse failures and retry latency are counted so we can see how often each layer is needed
+import json
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from app.services.streaming_service import chunk_text
+
+STRUCTURED_MAX_ATTEMPTS = 3 # the first try + 2 retries
+STRUCTURED_LATENCY_WINDOW = 500 # how many recent retry latencies we keep for the percentiles
+
+Model = TypeVar("Model", bound=BaseModel)
+
+_CODE_FENCE = re.compile(r"```(?:json)?", re.IGNORECASE)
+# A number written with thousands separators right after a colon, e.g. "price": 1,000.50
+_NUMBER_WITH_COMMAS = re.compile(r"(:\s*)(-?\d{1,3}(?:,\d{3})+(?:\.\d+)?)(?=\s*[,}\]])")
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+
+
+class StructuredOutputError(Exception):
+    """Raised when the LLM didn't produce valid output within the retry budget."""
+
+
+# Strip everything outside the JSON, and fix the mistakes we've seen the model make
+def repair_json(text: str) -> str:
+    text = _CODE_FENCE.sub("", text)
+
+    # Drop any prose before the first { (or [) - "Sure! Here's your JSON: {..."
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    if not starts:
+        return text.strip()
+    text = text[min(starts):]
+
+    text = _NUMBER_WITH_COMMAS.sub(lambda match: match.group(1) + match.group(2).replace(",", ""), text)
+    text = _TRAILING_COMMA.sub(r"\1", text)
+
+    # Find where the JSON really ends (drops prose AFTER it), or close it if it was cut off
+    open_brackets, end = _scan_brackets(text)
+    if end is not None:
+        return text[:end]
+
+    # Cut off mid-way: back up to the last complete value (a } or ]), then close whatever is still open
+    cut = max(text.rfind("}"), text.rfind("]"))
+    if cut == -1:
+        return text
+    text = text[:cut + 1]
+    open_brackets, _ = _scan_brackets(text)
+    return text + "".join(reversed(open_brackets))
+
+
+# Walk the text, skipping over strings, and track which brackets are open
+# Returns (closing brackets still needed, index right after the top-level value closed - or None if it never did)
+def _scan_brackets(text: str) -> tuple[list[str], int | None]:
+    stack, in_string, escaped = [], False, False
+
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+            if not stack:
+                return stack, index + 1
+
+    return stack, None
+
+
+# Parse text into the model - first as-is, then repaired
+# Returns (model, was_repaired), raises ValueError if neither works
+def parse_structured(text: str, model_class: type[Model]) -> tuple[Model, bool]:
+    try:
+        return model_class.model_validate_json(text), False
+    except ValidationError:
+        pass
+
+    try:
+        return model_class.model_validate(json.loads(repair_json(text))), True
+    except (ValueError, ValidationError) as error: # json.JSONDecodeError is a ValueError
+        raise ValueError(f"could not parse {model_class.__name__}: {error}") from error
+
+
+class StructuredOutputMetrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.attempts = 0
+        self.parse_failures = 0 # attempts whose output couldn't be parsed even after repair
+        self.repaired = 0 # attempts that only parsed thanks to repair_json
+        self.exhausted = 0 # requests that ran out of retries
+        self.retry_latencies_ms = deque(maxlen=STRUCTURED_LATENCY_WINDOW) # extra time spent on retries, per request
+
+    def record(self, attempts: int, failures: int, repaired: bool, retry_ms: float, exhausted: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            self.attempts += attempts
+            self.parse_failures += failures
+            self.repaired += int(repaired)
+            self.exhausted += int(exhausted)
+            if attempts > 1:
+                self.retry_latencies_ms.append(retry_ms)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self.retry_latencies_ms)
+
+            def percentile(pct: float) -> float:
+                return round(latencies[min(len(latencies) - 1, int(pct / 100 * len(latencies)))], 1) if latencies else 0.0
+
+            return {
+                "requests": self.requests,
+                "attempts": self.attempts,
+                "parse_failures": self.parse_failures,
+                "parse_failure_rate": round(self.parse_failures / self.attempts, 4) if self.attempts else 0.0,
+                "repaired": self.repaired,
+                "exhausted": self.exhausted,
+                "retry_latency_p50_ms": percentile(50),
+                "retry_latency_p99_ms": percentile(99)
+            }
+
+
+# One set of metrics for the whole app
+structured_metrics = StructuredOutputMetrics()
+
+
+# Invoke a (schema-constrained) chain and parse its output into model_class, regenerating on failure
+async def generate_structured(
+    chain: Any,
+    inputs: dict[str, Any],
+    model_class: type[Model],
+    max_attempts: int = STRUCTURED_MAX_ATTEMPTS
+) -> Model:
+    failures = 0
+    first_attempt_done = None
+    last_error = None
+
+    for attempt in range(1, max_attempts + 1):
+        text = chunk_text(await chain.ainvoke(inputs))
+
+        if first_attempt_done is None:
+            first_attempt_done = time.perf_counter()
+
+        try:
+            parsed, repaired = parse_structured(text, model_class)
+        except ValueError as error:
+            failures += 1
+            last_error = error
+            print(f"[STRUCTURED] attempt {attempt}/{max_attempts} failed: {error}")
+            continue
+
+        retry_ms = (time.perf_counter() - first_attempt_done) * 1000
+        structured_metrics.record(attempt, failures, repaired, retry_ms, exhausted=False)
+        return parsed
+
+    retry_ms = (time.perf_counter() - first_attempt_done) * 1000
+    structured_metrics.record(max_attempts, failures, False, retry_ms, exhausted=True)
+    raise StructuredOutputError(f"no valid {model_class.__name__} after {max_attempts} attempts: {last_error}")
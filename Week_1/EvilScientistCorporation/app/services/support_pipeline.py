@@ -0,0 +1,96 @@
+# This service runs the customer support chain (draft -> refine) as a PIPELINE
+# The plain sequential chain (draft_chain | final_chain) makes the caller wait for BOTH LLM calls before seeing anything
+#
+# The pipelined version:
+#   - streams the draft's tokens to the client as they're generated ("draft" events)
+#   - starts the refine call the moment the draft's last token arrives, and streams the refined answer too
+#   - caches drafts, so a repeated question skips straight to the refine stage
+#   - reports per-stage timings so we can see how much of the work the client got to watch instead of wait for
+#
+# Note: the refine prompt needs the WHOLE draft, so the refine call can't start generating halfway through the draft -
+# the win is that the client's wait is overlapped with the draft instead of sitting in front of both calls
+import time
+from typing import Any, AsyncIterator
+
+from app.services.embedding_cache import normalize_query
+from app.services.llm_gateway import LLMOverloadedError
+from app.services.lru_cache import LRUCache
+from app.services.streaming_service import chunk_text, failed_event, overloaded_event, sse_event
+
+DRAFT_CACHE_MAX_SIZE = 256 # drafts are small, but there's no point keeping every question ever asked
+DRAFT_CACHE_TTL_SECONDS = 10 * 60 # drafts go stale eventually (10 minutes)
+
+
+class SupportPipeline:
+
+    def __init__(self, draft_chain: Any, final_chain: Any):
+        self.draft_chain = draft_chain
+        self.final_chain = final_chain
+        # Normalized question -> draft text, in a bounded LRU + TTL cache
+        self.draft_cache = LRUCache(max_size=DRAFT_CACHE_MAX_SIZE, ttl_seconds=DRAFT_CACHE_TTL_SECONDS)
+
+    # Yields ("draft", token), ("final", token) pairs, then ("done", timings)
+    async def astream(self, user_input: str) -> AsyncIterator[tuple[str, Any]]:
+        start = time.perf_counter()
+        timings: dict[str, Any] = {}
+
+        def elapsed_ms() -> float:
+            return round((time.perf_counter() - start) * 1000, 1)
+
+        # STAGE 1: the draft (from the cache if we've answered this before)
+        cache_key = normalize_query(user_input).lower() # a draft doesn't care about case
+        draft = self.draft_cache.get(cache_key)
+        timings["draft_cached"] = draft is not None
+
+        if draft is None:
+            parts = []
+            async for chunk in self.draft_chain.astream({"input": user_input}):
+                text = chunk_text(chunk)
+                if not text:
+                    continue
+                if not parts:
+                    timings["draft_ttft_ms"] = elapsed_ms()
+                parts.append(text)
+                yield "draft", text
+            draft = "".join(parts)
+            self.draft_cache.put(cache_key, draft)
+        else:
+            yield "draft", draft
+
+        timings["draft_ms"] = elapsed_ms()
+
+        # STAGE 2: refine - the prompt's {input} is the finished draft
+        refine_started = time.perf_counter()
+        first_final = None
+        async for chunk in self.final_chain.astream({"input": draft}):
+            text = chunk_text(chunk)
+            if not text:
+                continue
+            if first_final is None:
+                first_final = time.perf_counter()
+                timings["refine_ttft_ms"] = round((first_final - refine_started) * 1000, 1)
+            yield "final", text
+
+        timings["refine_ms"] = round((time.perf_counter() - refine_started) * 1000, 1)
+        timings["total_ms"] = elapsed_ms()
+
+        # The blocking chain shows nothing until total_ms - here the client sees the first draft token much sooner
+        timings["first_output_ms"] = timings.get("draft_ttft_ms", timings["draft_ms"])
+        timings["overlapped_ms"] = round(timings["total_ms"] - timings["first_output_ms"], 1)
+        yield "done", timings
+
+    # Same pipeline as Server-Sent Events: "draft" events, plain token messages for the refined answer, then "done"
+    async def astream_sse(self, user_input: str) -> AsyncIterator[str]:
+        try:
+            async for stage, payload in self.astream(user_input):
+                if stage == "draft":
+                    yield sse_event({"token": payload}, event="draft")
+                elif stage == "final":
+                    yield sse_event({"token": payload})
+                else:
+                    print(f"[PIPELINE] support-chat: {payload}")
+                    yield sse_event(payload, event="done")
+        except LLMOverloadedError as error:
+            yield overloaded_event(error)
+        except Exception as error:
+            yield failed_event("/chat/support-chat/stream", error)
@@ -0,0 +1,172 @@
+# This service chunks raw text for the vector DB - the whole-document splitter AND its streaming twin
+#
+# StreamingTextSplitter produces EXACTLY the chunks TEXT_SPLITTER.split_text() gives for the whole (stripped) document,
+# while only holding the unfinished paragraph and the chunk being built in memory. The unfinished paragraph is capped
+# at STREAM_MAX_BUFFER_CHARS - a longer stretch of text without a paragraph break raises TextTooLongError.
+# That matters because raw-text chunk IDs are positional (chunk_{index}_{hash}): if /ingest-text-stream chunked a
+# document differently than /ingest-text, the same document would get two sets of IDs and be stored twice.
+#
+# How the recursive splitter works on a document that has paragraph breaks ("\n\n"):
+#   1. cut the document into paragraphs, each one starting with its "\n\n" (keep_separator)
+#   2. walk the paragraphs left to right: short ones (< chunk_size) are greedily merged into chunks, keeping up to
+#      chunk_overlap characters of the previous chunk; a paragraph that's too long on its own ends the current merge
+#      and gets split by the next separators ("\n", " ", "")
+# Step 2 only ever looks at one paragraph at a time plus the chunk it's building, so we can run it as the
+# paragraphs arrive - that's what StreamingTextSplitter does, mirroring the splitter's merge step exactly
+import re
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+CHUNK_SIZE = 500 # max size of each chunk (~2 paragraphs)
+CHUNK_OVERLAP = 50 # how much each chunk overlaps (helps retain context)
+CHUNK_SEPARATORS = ["\n\n", "\n", " ", ""] # preferred split points (double new line, single newline, space, then any char)
+
+# How much new text the streaming splitter buffers before looking for finished paragraphs
+STREAM_SPLIT_WINDOW = 8 * 1024 # characters
+# The most text the streaming splitter holds while waiting for a paragraph break (~1 MB of English text)
+# That's also the longest paragraph - or whole document, if it has no paragraph breaks at all - it accepts
+STREAM_MAX_BUFFER_CHARS = 1024 * 1024
+
+# Using a LangChain Transformer (RecursiveCharacterTextSplitter) to chunk raw text - built once and shared
+TEXT_SPLITTER = RecursiveCharacterTextSplitter(
+    chunk_size=CHUNK_SIZE,
+    chunk_overlap=CHUNK_OVERLAP,
+    separators=CHUNK_SEPARATORS
+)
+
+# What TEXT_SPLITTER falls back to for a single paragraph that's too long to be a chunk on its own
+_PARAGRAPH_SPLITTER = RecursiveCharacterTextSplitter(
+    chunk_size=CHUNK_SIZE,
+    chunk_overlap=CHUNK_OVERLAP,
+    separators=CHUNK_SEPARATORS[1:]
+)
+
+_PARAGRAPH_BREAK = re.compile(re.escape(CHUNK_SEPARATORS[0]))
+
+
+# Cut text into paragraphs the way the splitter does: every paragraph after the first starts with its "\n\n"
+class TextTooLongError(Exception):
+    """Raised when a streamed document goes longer than STREAM_MAX_BUFFER_CHARS without a paragraph break."""
+
+
+def split_paragraphs(text: str) -> list[str]:
+    parts = _PARAGRAPH_BREAK.split(text)
+    paragraphs = [parts[0]] + [CHUNK_SEPARATORS[0] + part for part in parts[1:]]
+    return [paragraph for paragraph in paragraphs if paragraph]
+
+
+class StreamingTextSplitter:
+    """
+    Splits a document that arrives in pieces into the same chunks as TEXT_SPLITTER.split_text(document.strip()).
+    Call feed() with each piece of text and finish() once at the end - both return the chunks that are now final.
+
+    Until the first paragraph break shows up we can't know how the splitter will cut the document
+    (a document with no "\n\n" at all is split by lines instead), so that first stretch of text is buffered whole.
+    Either way, at most max_buffer characters are buffered - past that, feed() raises TextTooLongError.
+    """
+
+    def __init__(self, window: int = STREAM_SPLIT_WINDOW, max_buffer: int = STREAM_MAX_BUFFER_CHARS):
+        self.window = window
+        self.max_buffer = max_buffer
+        self._buffer = "" # text from the start of the unfinished paragraph onwards...
+        self._pieces: list[str] = [] # ...plus the pieces fed since we last looked (joined only when we look again)
+        self._size = 0 # length of both together
+        self._scanned = 0 # how far into _buffer we've already looked for paragraph breaks
+        self._last_break = 0 # where the last break we found starts
+        self._split_at = window # size at which we next look for finished paragraphs
+        self._split_once = False # have we handed any paragraphs to the merge step yet?
+
+        # The merge step's state: the paragraphs of the chunk being built, and their total length
+        self._current: list[str] = []
+        self._total = 0
+
+    def feed(self, text: str) -> list[str]:
+        # Same as split_text(text.strip()): whitespace at the start of the document is dropped
+        if not self._size:
+            text = text.lstrip()
+        if text:
+            self._pieces.append(text)
+            self._size += len(text)
+
+        if self._size < self._split_at and self._size <= self.max_buffer:
+            return []
+
+        chunks = self._split_buffer()
+        if self._size > self.max_buffer:
+            raise TextTooLongError(f"More than {self.max_buffer} characters without a paragraph break")
+        # A paragraph longer than the window stays in the buffer - wait until the buffer has grown by another window
+        # (or doubled, whichever is more) before looking again, so a long paragraph isn't copied over and over
+        self._split_at = self._size + max(self.window, self._size)
+        return chunks
+
+    def finish(self) -> list[str]:
+        text = (self._buffer + "".join(self._pieces)).rstrip()
+        self._buffer, self._pieces, self._size = "", [], 0
+
+        # Never saw a paragraph break (or the document was small) - the buffer IS the whole document
+        if not self._split_once:
+            return TEXT_SPLITTER.split_text(text)
+
+        return self._add_paragraphs(split_paragraphs(text)) + self._flush()
+
+    # Hand every finished paragraph in the buffer to the merge step
+    # The paragraph after the last break might continue in the next piece, so it stays in the buffer.
+    # Breaks in trailing whitespace don't count either - strip() might remove them at the end of the document
+    # Only the text after what we scanned last time gets searched, so a long paragraph isn't rescanned from the start
+    # (content_end always follows a non-whitespace character, so no break can straddle the old and new text)
+    def _split_buffer(self) -> list[str]:
+        self._buffer += "".join(self._pieces)
+        self._pieces = []
+
+        content_end = len(self._buffer)
+        while content_end > self._scanned and self._buffer[content_end - 1].isspace():
+            content_end -= 1
+        for match in _PARAGRAPH_BREAK.finditer(self._buffer, self._scanned, content_end):
+            self._last_break = match.start()
+        self._scanned = max(self._scanned, content_end)
+
+        if self._last_break == 0:
+            return []
+
+        cut = self._last_break
+        finished, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        self._size = len(self._buffer)
+        self._scanned -= cut
+        self._last_break = 0
+        self._split_once = True
+        return self._add_paragraphs(split_paragraphs(finished))
+
+    # The splitter's loop over paragraphs: merge the short ones, split the long ones on their own
+    def _add_paragraphs(self, paragraphs: list[str]) -> list[str]:
+        chunks = []
+        for paragraph in paragraphs:
+            if len(paragraph) < CHUNK_SIZE:
+                chunks.extend(self._merge(paragraph))
+            else:
+                chunks.extend(self._flush())
+                chunks.extend(_PARAGRAPH_SPLITTER.split_text(paragraph))
+        return chunks
+
+    # One step of the splitter's greedy merge (TextSplitter._merge_splits, with the separators kept on the paragraphs)
+    def _merge(self, paragraph: str) -> list[str]:
+        chunks = []
+        if self._total + len(paragraph) > CHUNK_SIZE:
+            if self._current:
+                chunks.extend(self._join())
+                # Drop paragraphs from the front until what's left fits in the overlap (and leaves room for this one)
+                while self._total > CHUNK_OVERLAP or (self._total + len(paragraph) > CHUNK_SIZE and self._total > 0):
+                    self._total -= len(self._current.pop(0))
+
+        self._current.append(paragraph)
+        self._total += len(paragraph)
+        return chunks
+
+    # Emit the chunk being built and start over
+    def _flush(self) -> list[str]:
+        chunks = self._join()
+        self._current, self._total = [], 0
+        return chunks
+
+    def _join(self) -> list[str]:
+        chunk = "".join(self._current).strip()
+        return [chunk] if chunk else []
@@ -0,0 +1,189 @@
+# This service TRACES the LangGraph graphs: when /langgraph/chat is slow, which part was it?
+# Routing? The Chroma search? The answer LLM call?
+#
+# Every graph run is a "trace", made of "spans":
+#   - one span per node that ran (traced_node wraps the node functions when the graph is built)
+#   - one span per LLM call / vector search / routing decision inside a node (traced() wraps those functions)
+# Each span has its duration, input/output sizes, and any other attributes (the route a node picked, the collection...)
+#
+# The current trace and span live in ContextVars, so nested spans find their parent without passing it around -
+# even across the asyncio tasks LangGraph runs the nodes in (tasks start with a copy of the caller's context)
+#
+# The recent traces are kept in memory for GET /langgraph/traces, and every span's duration also goes into the
+# graph_span_duration_seconds histogram in GET /metrics
+import inspect
+import json
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable
+
+from app.services.metrics import graph_span_duration
+
+TRACE_MAX_TRACES = 200 # recent traces kept for the debug endpoint
+TRACE_STATS_WINDOW = 1000 # recent durations kept per span name for the percentiles
+
+current_trace: ContextVar[dict[str, Any] | None] = ContextVar("current_trace", default=None)
+current_span: ContextVar[dict[str, Any] | None] = ContextVar("current_span", default=None)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+# How "big" something is: characters for text/state, number of items for lists of results
+def size_of(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return len(value)
+    content = getattr(value, "content", None) # LLM messages
+    if isinstance(content, str):
+        return len(content)
+    return len(json.dumps(value, default=str))
+
+
+class Tracer:
+
+    def __init__(self, max_traces: int = TRACE_MAX_TRACES):
+        self._traces: deque[dict[str, Any]] = deque(maxlen=max_traces)
+        # (graph, span name) -> recent durations in ms
+        self._durations: dict[tuple[str, str], deque[float]] = {}
+
+    # Open a trace around one graph run
+    @asynccontextmanager
+    async def trace(self, graph: str, **attributes: Any) -> AsyncIterator[dict[str, Any]]:
+        trace = {
+            "trace_id": uuid.uuid4().hex[:16],
+            "graph": graph,
+            "started_at": time.time(),
+            "duration_ms": None,
+            "route": None,
+            "error": None,
+            "attributes": attributes,
+            "spans": []
+        }
+        start = time.perf_counter()
+        trace["_start"] = start
+        trace_token = current_trace.set(trace)
+        span_token = current_span.set(None)
+        try:
+            yield trace
+        except BaseException as error:
+            trace["error"] = repr(error)
+            raise
+        finally:
+            current_span.reset(span_token)
+            current_trace.reset(trace_token)
+            trace["duration_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            trace.pop("_start")
+            self._traces.append(trace)
+
+    # Time one piece of work. Yields the span, so the caller can add attributes (output sizes...)
+    # Outside a trace the span isn't stored anywhere, but its duration still counts in the histograms
+    @asynccontextmanager
+    async def span(self, name: str, kind: str, **attributes: Any) -> AsyncIterator[dict[str, Any]]:
+        trace = current_trace.get()
+        parent = current_span.get()
+        start = time.perf_counter()
+        span = {
+            "name": name,
+            "kind": kind,
+            "start_ms": round((start - trace["_start"]) * 1000, 2) if trace else 0.0,
+            "duration_ms": None,
+            "error": None,
+            "attributes": attributes,
+            "children": []
+        }
+        if parent is not None:
+            parent["children"].append(span)
+        elif trace is not None:
+            trace["spans"].append(span)
+
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as error:
+            span["error"] = repr(error)
+            raise
+        finally:
+            current_span.reset(token)
+            duration = time.perf_counter() - start
+            span["duration_ms"] = round(duration * 1000, 2)
+
+            graph = trace["graph"] if trace else "none"
+            graph_span_duration.observe(duration, graph=graph, span=name, kind=kind)
+            self._durations.setdefault((graph, name), deque(maxlen=TRACE_STATS_WINDOW)).append(duration * 1000)
+
+    # Newest first
+    def recent(self, limit: int = 20, graph: str | None = None) -> list[dict[str, Any]]:
+        traces = [trace for trace in reversed(self._traces) if graph is None or trace["graph"] == graph]
+        return traces[:limit]
+
+    def get(self, trace_id: str) -> dict[str, Any] | None:
+        return next((trace for trace in self._traces if trace["trace_id"] == trace_id), None)
+
+    # Latency percentiles per (graph, span) over the recent window
+    def stats(self) -> list[dict[str, Any]]:
+        rows = []
+        for (graph, name), durations in sorted(self._durations.items()):
+            values = list(durations)
+            rows.append({
+                "graph": graph,
+                "span": name,
+                "count": len(values),
+                "p50_ms": round(_percentile(values, 50), 2),
+                "p95_ms": round(_percentile(values, 95), 2),
+                "p99_ms": round(_percentile(values, 99), 2),
+                "max_ms": round(max(values), 2)
+            })
+        return rows
+
+    def clear(self) -> None:
+        self._traces.clear()
+        self._durations.clear()
+
+
+# The one tracer both graphs report to
+tracer = Tracer()
+
+
+# Wrap a node function so every run of it gets a span (the graphs' build functions do this for every node)
+def traced_node(name: str, node: Callable) -> Callable:
+    # (no type hint on state - LangGraph would read it as the node's input schema)
+    async def run_node(state):
+        async with tracer.span(f"node:{name}", "node", input_chars=size_of(state)) as span:
+            result = node(state)
+            if inspect.isawaitable(result):
+                result = await result
+
+            span["attributes"]["output_chars"] = size_of(result or {})
+            route = (result or {}).get("route")
+            if route is not None:
+                # Record the routing decision on the span AND on the whole trace
+                span["attributes"]["route"] = route
+                trace = current_trace.get()
+                if trace is not None:
+                    trace["route"] = route
+            return result
+
+    run_node.__name__ = getattr(node, "__name__", name)
+    return run_node
+
+
+# Wrap an async function (an LLM call, a vector search...) so every call gets a span
+# The first argument's size is the span's input size; keyword arguments that are plain values become attributes
+def traced(name: str, kind: str, func: Callable) -> Callable:
+    async def call(*args: Any, **kwargs: Any) -> Any:
+        attributes = {key: value for key, value in kwargs.items() if isinstance(value, (str, int, float, bool))}
+        if args:
+            attributes["input_size"] = size_of(args[0])
+        async with tracer.span(name, kind, **attributes) as span:
+            result = await func(*args, **kwargs)
+            span["attributes"]["output_size"] = size_of(result)
+            return result
+
+    return call
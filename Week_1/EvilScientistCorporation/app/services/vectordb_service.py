@@ -3,54 +3,191 @@ from langchain_chroma import Chroma
 from langchain_community.embeddings import OllamaEmbeddings
 from langchain_core.documents import Document
 from typing import Any
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import asyncio
+import codecs
+import functools
 import hashlib
+import json
+import os
+import threading
+import time
 import spacy
+from app.services.embedding_cache import get_query_embedding
+from app.services.answer_cache import answer_cache
+from app.services.keyword_index import BM25Index, reciprocal_rank_fusion
+from app.services.numpy_vector_store import NumpyVectorStore
+from app.services.fake_embeddings import HashEmbeddings
+from app.services.text_chunking import TEXT_SPLITTER, StreamingTextSplitter
 
 
 PERSIST_DIRECTORY = "app/chroma_store" # Where the DB will be stored on disk
 COLLECTION = "evil_items" # What kind of data we're storing (like the tables in SQL)
 EMBEDDING = OllamaEmbeddings(model="nomic-embed-text") # The embedding model to use 
 
+# Set FAKE_EMBEDDINGS=1 to swap in the deterministic hash-based embedder (no Ollama needed - benchmarks use this)
+if os.getenv("FAKE_EMBEDDINGS"):
+    EMBEDDING = HashEmbeddings()
+
+# Which backend each collection lives in: "chroma" (default) or "numpy" (exact search over a memory-mapped matrix)
+# e.g. VECTOR_BACKENDS = {"evil_items": "numpy"} - NOTE: switching a collection means re-ingesting its data
+DEFAULT_VECTOR_BACKEND = "chroma"
+VECTOR_BACKENDS: dict[str, str] = {}
+
+# Bulk ingestion settings - big payloads get split into batches that are embedded in parallel
+INGEST_BATCH_SIZE = 64 # How many documents we embed + write per batch
+INGEST_MAX_WORKERS = 4 # How many batches can talk to Ollama at the same time
+
+# Async settings - the async functions (asearch, aingest_items, ...) run the blocking Chroma/Ollama calls
+# on this dedicated, bounded thread pool so they never block the event loop
+VECTOR_MAX_WORKERS = 8
+_vector_executor = ThreadPoolExecutor(max_workers=VECTOR_MAX_WORKERS, thread_name_prefix="vectordb")
+
+# NER settings - we only need the "ner" pipe (and the tok2vec it depends on), so skip the rest
+NER_MODEL_NAME = "en_core_web_sm"
+NER_DISABLED_PIPES = ["tagger", "parser", "attribute_ruler", "lemmatizer"]
+NER_BATCH_SIZE = 32 # How many chunks spaCy processes per nlp.pipe batch
+
+# Raw text gets chunked by TEXT_SPLITTER (a RecursiveCharacterTextSplitter, ~2 paragraphs per chunk)
+# See text_chunking.py - it also has the streaming version of the splitter
+
+# Hybrid search settings - how many candidates each retriever (dense + BM25) hands to the fusion step
+HYBRID_CANDIDATE_MULTIPLIER = 4
+HYBRID_MIN_CANDIDATES = 20
+
 
 # The actual chroma vector store itself  is a dict that holds Chroma instances
+# (or NumpyVectorStore instances, for collections configured in VECTOR_BACKENDS)
 # This allows us to manage multiple collections at once 
-vector_store: dict[str, Chroma] = {}
+vector_store: dict[str, Chroma | NumpyVectorStore] = {}
 
 
 
-# Get an instance of the Chroma vector store (lets us interact with the DB instance)
+# Get an instance of the vector store (lets us interact with the DB instance)
 # Takes in a collection to use, or defaults to COLLECTION ("evil_items")
-def get_vector_store(collection: str = COLLECTION) -> Chroma:
+def get_vector_store(collection: str = COLLECTION) -> Chroma | NumpyVectorStore:
     # Get (or create) the vector store instsance
     # If creating, define the collection name, persist directory, and embedding function
     if collection not in vector_store:
-        vector_store[collection] = Chroma(
-            collection_name=collection,
-            persist_directory=PERSIST_DIRECTORY,
-            embedding_function=EMBEDDING
-        )  
+        backend = VECTOR_BACKENDS.get(collection, DEFAULT_VECTOR_BACKEND)
+
+        if backend == "numpy":
+            vector_store[collection] = NumpyVectorStore(
+                collection_name=collection,
+                persist_directory=PERSIST_DIRECTORY,
+                embedding_function=EMBEDDING
+            )
+        elif backend == "chroma":
+            vector_store[collection] = Chroma(
+                collection_name=collection,
+                persist_directory=PERSIST_DIRECTORY,
+                embedding_function=EMBEDDING
+            )  
+        else:
+            raise ValueError(f"Unknown vector backend '{backend}' for collection '{collection}'")
     
     return vector_store[collection]
 
+# Same idea for the BM25 keyword indexes - one in-memory index per collection
+keyword_indexes: dict[str, BM25Index] = {}
+_keyword_index_lock = threading.Lock()
+
+# Get the keyword index for a collection
+# The first call loads every document already stored in Chroma, after that it's kept in sync on ingest
+def get_keyword_index(collection: str = COLLECTION) -> BM25Index:
+    if collection not in keyword_indexes:
+        with _keyword_index_lock:
+            if collection not in keyword_indexes:
+                index = BM25Index()
+                stored = get_vector_store(collection).get(include=["documents", "metadatas"])
+                index.add(stored["ids"], stored["documents"], stored["metadatas"])
+                keyword_indexes[collection] = index
+
+    return keyword_indexes[collection]
+
 # Ingest documents into the vector store (this is where the embeddings happen)
+# Returns just the count - see ingest_items_batched() for the per-batch report
 def ingest_items(items: list[dict[str, Any]], collection:str=COLLECTION) -> int:
-    # Get an instance of the vector store 
-    db_instance = get_vector_store(collection)
+    return ingest_items_batched(items, collection)["ingested"]
+
+# Embed and write a single batch, timing it so we can report throughput
+def _ingest_batch(db_instance: Chroma | NumpyVectorStore, collection: str, batch: list[dict[str, Any]], batch_number: int) -> dict[str, Any]:
+    start = time.perf_counter()
 
-    # Turn the input into a list of documents to get inserted 
+    # Only build the Document objects for THIS batch (not the whole payload)
     docs = [
-        Document(page_content=item["text"], metadata=item.get("metadata", {}))
-        for item in items
-                 
+        Document(page_content=item["text"], metadata=item.get("metadata") or {})
+        for item in batch
     ]
-    # Also, append IDs to the documents (also found in the sample data)
-    ids = [item["id"] for item in items]
+    ids = [item["id"] for item in batch]
 
-
-    # Add the documents, return the length of the ingested items 
+    # add_documents embeds the batch through Ollama and writes it to Chroma
     db_instance.add_documents(docs, ids=ids)
-    return len(items)
+
+    # Keep the BM25 keyword index in sync with what's in Chroma
+    get_keyword_index(collection).add(ids, [doc.page_content for doc in docs], [doc.metadata for doc in docs])
+
+    # Any cached LLM answer built from these chunk IDs is stale now
+    answer_cache.invalidate(collection, ids)
+
+    seconds = time.perf_counter() - start
+    return {
+        "batch": batch_number,
+        "size": len(batch),
+        "seconds": round(seconds, 4),
+        "docs_per_sec": round(len(batch) / seconds, 2) if seconds > 0 else None
+    }
+
+# Bulk ingestion pipeline: split the items into batches and embed them on a bounded worker pool
+# Each batch is written to Chroma as soon as its embeddings are ready
+def ingest_items_batched(
+    items: list[dict[str, Any]],
+    collection: str = COLLECTION,
+    batch_size: int = INGEST_BATCH_SIZE,
+    max_workers: int = INGEST_MAX_WORKERS
+) -> dict[str, Any]:
+    # Get an instance of the vector store
+    db_instance = get_vector_store(collection)
+
+    batch_size = max(1, batch_size)
+    max_workers = max(1, max_workers)
+
+    # Slice the input into batches (slices just point at the existing dicts, no copies of the text)
+    batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+
+    start = time.perf_counter()
+    batch_reports = []
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest") as executor:
+        in_flight = set()
+
+        for batch_number, batch in enumerate(batches):
+            # Keep at most 2 batches per worker queued up, so we never hold every batch's Documents at once
+            if len(in_flight) >= max_workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                batch_reports.extend(future.result() for future in done)
+
+            in_flight.add(executor.submit(_ingest_batch, db_instance, collection, batch, batch_number))
+
+        # Collect whatever is still running
+        batch_reports.extend(future.result() for future in in_flight)
+
+    seconds = time.perf_counter() - start
+    batch_reports.sort(key=lambda report: report["batch"])
+
+    for report in batch_reports:
+        print(f"[VECTORDB] batch {report['batch']} -> '{collection}': "
+              f"{report['size']} docs in {report['seconds']}s ({report['docs_per_sec']} docs/s)")
+
+    return {
+        "ingested": len(items),
+        "collection": collection,
+        "batch_size": batch_size,
+        "max_workers": max_workers,
+        "seconds": round(seconds, 4),
+        "docs_per_sec": round(len(items) / seconds, 2) if seconds > 0 else None,
+        "batches": batch_reports
+    }
 
 # Different ingest function for ingesting plain text (we'll need to make IDs/metadata)
 def ingest_text(text:str) -> int:
@@ -61,52 +198,191 @@ def ingest_text(text:str) -> int:
     
 
     # Chunk the raw text into smaller pieces for better embedding
-
-    # Using a LangChain Transformer (RecursiveCharacterTExtSplitter)
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500, # max size of each chunk (~2 paragraphs)
-        chunk_overlap=50, # how much each chunk overlaps - 100 chars (helps retain context)
-        separators=["\n\n", "\n", " ", ""] # preferred split points
-        # (double new line, single newline, space, then any char )
-    )
-
     # Get our chunks as a list[str] so we can iterate over them and reformat them 
-    chunks = splitter.split_text(text)
+    chunks = TEXT_SPLITTER.split_text(text)
 
     # Finally, call ingest_items() no that we have a structured object for embedding
+    items = _build_chunk_items(chunks)
+
+    # Finally, send the new structured 
+    return ingest_items(items, collection="boss_plans")
+
+# Turn a list of text chunks into structured items (ID + metadata) ready for ingest_items()
+# start_index is the position of the first chunk in the whole document (streaming ingestion passes this in)
+# content_addressed chunks (incremental re-ingestion) get content-hash IDs and NO chunk_index:
+# a kept chunk isn't rewritten when text above it moves, so a stored position would go stale
+def _build_chunk_items(chunks: list[str], start_index: int = 0, content_addressed: bool = False) -> list[dict[str, Any]]:
+    # Run NER over every chunk up front (batched with nlp.pipe) so queries don't have to later
+    chunk_entities = extract_entities_batch(chunks)
+
     items = []
 
     # What's enumerate? Give us a (index, value) pair when iterating over the list
-    for index, chunk in enumerate(chunks):
-        # Define and attach a stable-ish ID so reingestion doesn't create duplicates 
-        content_hash = hashlib.md5(chunk.encode("utf-8")).hexdigest()[:8]
-        chunk_id = f"chunk_{index}_{content_hash}"
-        # This^ will look like "chunk_a1b2c3d4"
+    for offset, chunk in enumerate(chunks):
+        metadata = {
+            "source": "raw_text_ingestion", # Helps with filtering information in queries 
+            # Chroma metadata values have to be primitives, so the entity list is stored as JSON
+            "entities": json.dumps(chunk_entities[offset])
+        }
+
+        if content_addressed:
+            # ID depends ONLY on the content, so a chunk keeps its ID when text above it changes
+            chunk_id = content_chunk_id(chunk)
+        else:
+            # Define and attach a stable-ish ID so reingestion doesn't create duplicates 
+            index = start_index + offset
+            content_hash = hashlib.md5(chunk.encode("utf-8")).hexdigest()[:8]
+            chunk_id = f"chunk_{index}_{content_hash}"
+            # This^ will look like "chunk_a1b2c3d4"
+            metadata["chunk_index"] = index
 
         # Append the chunk to the items list with ID and metadata
         items.append({
             "id": chunk_id,
             "text": chunk,
-            "metadata": {
-                "chunk_index": index,
-                "source": "raw_text_ingestion" # Helps with filtering information in queries 
-            }
+            "metadata": metadata
         })
-    # Finally, send the new structured 
-    return ingest_items(items, collection="boss_plans")
+
+    return items
+
+# Content-addressed chunk ID: a hash of the chunk text and nothing else
+def content_chunk_id(chunk: str) -> str:
+    return f"chunk_{hashlib.sha256(chunk.encode('utf-8')).hexdigest()[:16]}"
+
+# Delete documents from a collection, keeping the keyword index and answer cache in sync
+def delete_items(ids: list[str], collection: str = COLLECTION) -> int:
+    if not ids:
+        return 0
+
+    get_vector_store(collection).delete(ids=ids)
+    get_keyword_index(collection).remove(ids)
+    answer_cache.invalidate(collection, ids)
+
+    return len(ids)
+
+# Incremental re-ingestion for raw text (e.g. an edited boss_plans.txt)
+# Chunks are keyed purely by content hash and diffed against what the collection already holds:
+#   - new chunks get embedded + written
+#   - chunks that are already stored are left alone (no re-embedding)
+#   - stored chunks that vanished from the text get deleted
+# So the work is proportional to the edit, not the size of the file
+def reingest_text(text: str, collection: str = "boss_plans") -> dict[str, int]:
+    text = text.strip()
+    chunks = TEXT_SPLITTER.split_text(text) if text else []
+
+    # Map content ID -> chunk. Identical chunks collapse into one entry
+    wanted: dict[str, str] = {}
+    for chunk in chunks:
+        wanted.setdefault(content_chunk_id(chunk), chunk)
+
+    # Only look at chunks that came from raw text ingestion - anything else in the collection is left alone
+    db_instance = get_vector_store(collection)
+    existing_ids = set(db_instance.get(where={"source": "raw_text_ingestion"}, include=[])["ids"])
+
+    new_ids = [chunk_id for chunk_id in wanted if chunk_id not in existing_ids]
+    removed_ids = [chunk_id for chunk_id in existing_ids if chunk_id not in wanted]
+    kept = len(wanted) - len(new_ids)
+
+    # Embed (and run NER on) ONLY the new chunks
+    if new_ids:
+        items = _build_chunk_items([wanted[chunk_id] for chunk_id in new_ids], content_addressed=True)
+        ingest_items(items, collection=collection)
+
+    # This also cleans up stale duplicates left behind by the old position-based IDs
+    delete_items(removed_ids, collection=collection)
+
+    return {
+        "added": len(new_ids),
+        "kept": kept,
+        "removed": len(removed_ids)
+    }
+
+class StreamingTextIngestor:
+    """
+    Ingests a (potentially huge) document that arrives in pieces, e.g. a streamed request body.
+    Only the unfinished paragraph of raw text, one batch of chunks and one batch of vectors live in memory at a time,
+    so peak memory stays flat no matter how big the document is. The unfinished paragraph is capped at
+    STREAM_MAX_BUFFER_CHARS: feed() raises TextTooLongError for a paragraph (or a document without paragraph
+    breaks) longer than that - the batches before it are already stored by then.
+
+    Call feed() with each piece of bytes as it arrives, then finish() once at the end.
+    The chunks (and so the chunk IDs) are the same ones ingest_text() makes for the whole document,
+    so streaming a document and posting it in one go store the same chunks.
+    """
+
+    def __init__(self, collection: str = "boss_plans", batch_size: int = INGEST_BATCH_SIZE):
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+
+        # Decodes UTF-8 incrementally, so a multi-byte character split across two pieces still decodes correctly
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._splitter = StreamingTextSplitter() # holds the raw text that hasn't been turned into finished chunks yet
+        self._pending_chunks: list[str] = [] # finished chunks waiting for a full batch
+        self._next_index = 0 # chunk_index of the next chunk we ingest
+
+        self.bytes_read = 0
+        self.chunks_ingested = 0
+        self.batches = 0
+
+    def feed(self, data: bytes) -> None:
+        self.bytes_read += len(data)
+        self._pending_chunks.extend(self._splitter.feed(self._decoder.decode(data)))
+
+        while len(self._pending_chunks) >= self.batch_size:
+            self._ingest_pending_batch()
+
+    def finish(self) -> dict[str, Any]:
+        # Whatever is left is the end of the document
+        self._pending_chunks.extend(self._splitter.feed(self._decoder.decode(b"", final=True)))
+        self._pending_chunks.extend(self._splitter.finish())
+
+        # Ingest the last (possibly partial) batch
+        while self._pending_chunks:
+            self._ingest_pending_batch()
+
+        return {
+            "bytes_read": self.bytes_read,
+            "ingested_chunks": self.chunks_ingested,
+            "batches": self.batches
+        }
+
+    def _ingest_pending_batch(self) -> None:
+        batch = self._pending_chunks[:self.batch_size]
+        del self._pending_chunks[:self.batch_size]
+
+        ingest_items(_build_chunk_items(batch, start_index=self._next_index), collection=self.collection)
+
+        self._next_index += len(batch)
+        self.chunks_ingested += len(batch)
+        self.batches += 1
 
 
 # Search the vector store for similar or relevant documents
-def search(query: str, k: int = 3, collection:str = COLLECTION) -> list[dict[str, Any]]:
+# mode="dense" is plain Chroma similarity search (score = distance, lower is better)
+# mode="hybrid" fuses dense + BM25 keyword rankings (score = fused RRF score, higher is better;
+#   each result also carries its dense "distance", since the fused score only says where it ranked)
+def search(query: str, k: int = 3, collection:str = COLLECTION, mode: str = "dense") -> list[dict[str, Any]]:
+    if mode == "hybrid":
+        return hybrid_search(query, k, collection)
+    if mode != "dense":
+        raise ValueError(f"Unknown search mode: {mode}")
+
+    return _dense_search(query, k, collection)
+
+def _dense_search(query: str, k: int, collection: str) -> list[dict[str, Any]]:
     # Get an instance of the vector store 
     db_instance = get_vector_store(collection)
 
-    # Save the results of the similarity search
-    results = db_instance.similarity_search_with_score(query, k=k)
+    # Embed the query (or grab the vector from the query-embedding cache if we've seen it recently)
+    query_vector = get_query_embedding(query, EMBEDDING)
+
+    # Save the results of the similarity search (same scores as similarity_search_with_score)
+    results = db_instance.similarity_search_by_vector_with_relevance_scores(query_vector, k=k)
 
     # Return the  results as a list of dicts with the expected fields 
     return [
         {
+            "id": result[0].id,
             "text": result[0].page_content,
             "metadata": result[0].metadata,
             "score": result[1]
@@ -114,19 +390,59 @@ def search(query: str, k: int = 3, collection:str = COLLECTION) -> list[dict[str
         for result in results
     ]
 
-# Function that uses NER (Name Entity Recognition) 
-# To identify and extract "entities" from the text in our DB 
-def extract_entities(text: str):
+# Hybrid search: run dense AND keyword search, then merge the two rankings with reciprocal rank fusion
+# Exact-term queries (gadget names, plan codenames) get found by BM25 even when the embedding misses them,
+# so we can use a smaller k and still get good recall
+def hybrid_search(query: str, k: int = 3, collection: str = COLLECTION) -> list[dict[str, Any]]:
+    candidates = max(k * HYBRID_CANDIDATE_MULTIPLIER, HYBRID_MIN_CANDIDATES)
 
-    # Get the NER model from spacy 
+    dense_results = _dense_search(query, candidates, collection)
+    keyword_index = get_keyword_index(collection)
+    keyword_results = keyword_index.search(query, candidates)
 
-    ner_model = spacy.load("en_core_web_sm")
+    fused = reciprocal_rank_fusion([
+        [item["id"] for item in dense_results],
+        [doc_id for doc_id, _ in keyword_results]
+    ])
 
-    # Process the text with the NER model to extract entities 
-    doc = ner_model(text)
+    # Look up the text/metadata for each fused ID (dense results first, then the keyword index)
+    by_id = {item["id"]: item for item in dense_results}
+    # Keyword-only hits weren't among the dense candidates, so they're at least as far away as the farthest one
+    farthest = max((item["score"] for item in dense_results), default=None)
 
-    # Create and return a list of entities found in the text 
-    entities = [
+    results = []
+    for doc_id, fused_score in fused[:k]:
+        item = by_id.get(doc_id) or keyword_index.get(doc_id)
+        if item is None:
+            continue
+        results.append({
+            "id": doc_id,
+            "text": item["text"],
+            "metadata": item["metadata"],
+            "score": fused_score,
+            "distance": by_id[doc_id]["score"] if doc_id in by_id else farthest
+        })
+
+    return results
+
+# The spaCy NER model is loaded ONCE per process (loading it takes way longer than running it)
+_ner_model = None
+_ner_model_lock = threading.Lock()
+
+def get_ner_model():
+    global _ner_model
+
+    # Double-checked so concurrent first requests don't both load the model
+    if _ner_model is None:
+        with _ner_model_lock:
+            if _ner_model is None:
+                _ner_model = spacy.load(NER_MODEL_NAME, disable=NER_DISABLED_PIPES)
+
+    return _ner_model
+
+# Turn a spaCy Doc into our list of {"text", "label"} dicts
+def _doc_entities(doc) -> list[dict[str, str]]:
+    return [
         {
             "text": entity.text,
             "label": entity.label_
@@ -134,6 +450,90 @@ def extract_entities(text: str):
         for entity in doc.ents # for every entity found by the model
     ]
 
-    return entities 
+# Function that uses NER (Name Entity Recognition) 
+# To identify and extract "entities" from the text in our DB 
+def extract_entities(text: str):
+
+    # Get the (shared) NER model from spacy 
+    ner_model = get_ner_model()
+
+    # Process the text with the NER model to extract entities 
+    doc = ner_model(text)
+
+    # Create and return a list of entities found in the text 
+    return _doc_entities(doc)
+
+# Batched version of extract_entities - nlp.pipe streams the texts through the model in batches
+# Returns one entity list per input text (same order)
+def extract_entities_batch(texts: list[str]) -> list[list[dict[str, str]]]:
+    ner_model = get_ner_model()
+    return [_doc_entities(doc) for doc in ner_model.pipe(texts, batch_size=NER_BATCH_SIZE)]
+
+# Collect the entities for a list of search results
+# Chunks ingested through ingest_text() carry precomputed entities in their metadata,
+# so the NER model only runs for older chunks that don't have them yet
+def entities_for_results(results: list[dict[str, Any]]) -> list[dict[str, str]]:
+    per_result: list[list[dict[str, str]] | None] = []
+    missing_texts = []
+
+    for item in results:
+        stored = (item.get("metadata") or {}).get("entities")
+        if stored is None:
+            per_result.append(None)
+            missing_texts.append(item["text"])
+        else:
+            per_result.append(json.loads(stored))
+
+    # One batched NER pass for everything that wasn't precomputed
+    computed = iter(extract_entities_batch(missing_texts)) if missing_texts else iter([])
+
+    # Flatten into a single list, dropping duplicate (text, label) pairs but keeping the order
+    entities = []
+    seen = set()
+    for chunk_entities in per_result:
+        if chunk_entities is None:
+            chunk_entities = next(computed)
+        for entity in chunk_entities:
+            key = (entity["text"], entity["label"])
+            if key not in seen:
+                seen.add(key)
+                entities.append(entity)
+
+    return entities
+
+# ===============================(ASYNC VERSIONS)==================================
+# Our routers and LangGraph nodes are async, so they should await these instead of calling the sync functions.
+# Each one hands the blocking work to the vector executor and awaits the result,
+# so the event loop keeps serving other requests while Chroma/Ollama do their thing
+
+# Run any blocking function on the vector executor and await it
+async def run_in_vector_executor(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_vector_executor, functools.partial(func, *args, **kwargs))
+
+async def asearch(query: str, k: int = 3, collection: str = COLLECTION, mode: str = "dense") -> list[dict[str, Any]]:
+    return await run_in_vector_executor(search, query, k, collection, mode)
+
+# On a cache miss this is a round trip to Ollama, so routes that need the query vector await this
+async def aget_query_embedding(query: str) -> list[float]:
+    return await run_in_vector_executor(get_query_embedding, query, EMBEDDING)
+
+async def aingest_items(items: list[dict[str, Any]], collection: str = COLLECTION) -> int:
+    return await run_in_vector_executor(ingest_items, items, collection)
+
+async def aingest_items_batched(
+    items: list[dict[str, Any]],
+    collection: str = COLLECTION,
+    batch_size: int = INGEST_BATCH_SIZE,
+    max_workers: int = INGEST_MAX_WORKERS
+) -> dict[str, Any]:
+    return await run_in_vector_executor(ingest_items_batched, items, collection, batch_size, max_workers)
+
+async def aingest_text(text: str) -> int:
+    return await run_in_vector_executor(ingest_text, text)
 
+async def areingest_text(text: str, collection: str = "boss_plans") -> dict[str, int]:
+    return await run_in_vector_executor(reingest_text, text, collection)
 
+async def aentities_for_results(results: list[dict[str, Any]]) -> list[dict[str, str]]:
+    return await run_in_vector_executor(entities_for_results, results)
@@ -0,0 +1,55 @@
+# Graph helpers for the tests (app/benchmarks/graph_checkpointer.py uses the echo graph too)
+# The echo graph is a tiny LangGraph graph - no Ollama, no vector DB. Its only node echoes the query back,
+# so running it exercises just LangGraph itself and whatever checkpointer it was compiled with
+import asyncio
+from typing import Annotated, Callable, TypedDict
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.graph import StateGraph
+
+from app.services.graph_memory import bounded_add_messages
+
+
+class EchoState(TypedDict, total=False):
+    query: str
+    answer: str
+    message_memory: Annotated[list[BaseMessage], bounded_add_messages]
+
+
+def echo_answer(query: str) -> str:
+    return f"echo {query}"
+
+
+# Build a graph that runs the given nodes one after the other, in order
+def build_linear_graph(state: type, nodes: dict[str, Callable], checkpointer=None):
+    build = StateGraph(state)
+    for name, node in nodes.items():
+        build.add_node(name, node)
+
+    names = list(nodes)
+    build.set_entry_point(names[0])
+    for before, after in zip(names, names[1:]):
+        build.add_edge(before, after)
+    build.set_finish_point(names[-1])
+    return build.compile(checkpointer=checkpointer)
+
+
+# answer(query) is what the "LLM" says - pass a longer one to get realistically sized checkpoints
+def build_echo_graph(checkpointer=None, answer: Callable[[str], str] = echo_answer):
+    def echo_node(state: EchoState) -> EchoState:
+        query = state.get("query", "")
+        reply = answer(query)
+        return {"answer": reply, "message_memory": [HumanMessage(content=query), AIMessage(content=reply)]}
+
+    return build_linear_graph(EchoState, {"echo": echo_node}, checkpointer)
+
+
+# Send one thread a few queries in a row, returns the state after the last one
+def run_turns(graph, thread_id: str, queries: list[str]) -> EchoState:
+    async def scenario():
+        result = None
+        for query in queries:
+            result = await graph.ainvoke({"query": query}, config={"configurable": {"thread_id": thread_id}})
+        return result
+
+    return asyncio.run(scenario())
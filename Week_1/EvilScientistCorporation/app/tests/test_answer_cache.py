@@ -0,0 +1,29 @@
+from app.services.answer_cache import AnswerCache
+
+# Green test - a similar query that retrieved the same chunks gets the cached answer
+def test_similar_query_same_chunks_hits():
+    cache = AnswerCache(threshold=0.9)
+    cache.store("search-plans", "boss_plans", [1.0, 0.0], ["a", "b"], "cached answer")
+
+    # Order of the chunk IDs doesn't matter, only the set
+    assert cache.lookup("search-plans", [0.99, 0.05], ["b", "a"]) == "cached answer"
+    assert cache.stats()["hits"] == 1
+
+# Red tests - different chunks, a different question, or a different endpoint should all miss
+def test_misses():
+    cache = AnswerCache(threshold=0.9)
+    cache.store("search-plans", "boss_plans", [1.0, 0.0], ["a", "b"], "cached answer")
+
+    assert cache.lookup("search-plans", [1.0, 0.0], ["a", "c"]) is None
+    assert cache.lookup("search-plans", [0.0, 1.0], ["a", "b"]) is None
+    assert cache.lookup("ner-search-plans", [1.0, 0.0], ["a", "b"]) is None
+
+# Writing one of the chunks invalidates the entries built from it (and only those)
+def test_invalidate_affected_entries():
+    cache = AnswerCache()
+    cache.store("search-plans", "boss_plans", [1.0, 0.0], ["a", "b"], "answer 1")
+    cache.store("search-plans", "boss_plans", [0.0, 1.0], ["c"], "answer 2")
+
+    assert cache.invalidate("boss_plans", ["b"]) == 1
+    assert cache.lookup("search-plans", [1.0, 0.0], ["a", "b"]) is None
+    assert cache.lookup("search-plans", [0.0, 1.0], ["c"]) == "answer 2"
@@ -0,0 +1,42 @@
+import asyncio
+
+from app.services.content_filter import ContentFilter, censor_stream
+
+# These tests use small made-up blocklists, so they don't depend on blocked_terms.txt
+
+
+# Green test - any term is found, case-insensitively, anywhere in the text (like the old `in` check)
+def test_finds_terms_anywhere():
+    content_filter = ContentFilter(["javascript", "java", "hero"])
+
+    assert content_filter.first_match("I love JavaScript") == "java"
+    assert content_filter.is_blocked("the superheroes are coming")
+    assert not content_filter.is_blocked("build a moon laser")
+
+# Terms that are suffixes of other partial matches still get caught (this is what the fail links are for)
+def test_overlapping_terms():
+    content_filter = ContentFilter(["abcd", "bce"])
+
+    assert content_filter.first_match("xabce") == "bce"
+
+# A term split across streamed tokens is caught, and none of it reaches the client
+def test_stream_catches_split_terms():
+    content_filter = ContentFilter(["javascript"])
+
+    async def tokens():
+        for token in ["Use ", "Java", "Scr", "ipt for that"]:
+            yield token
+
+    async def collect():
+        return [text async for text in censor_stream(tokens(), "BLOCKED", content_filter)]
+
+    assert asyncio.run(collect()) == ["Use ", "BLOCKED"]
+
+# Held-back characters that turn out to be harmless are released
+def test_stream_releases_held_back_text():
+    content_filter = ContentFilter(["javascript"])
+    scanner = content_filter.scanner()
+
+    assert scanner.feed("I like jav") == ("I like ", False)
+    assert scanner.feed("a beans") == ("java beans", False)
+    assert scanner.flush() == ""
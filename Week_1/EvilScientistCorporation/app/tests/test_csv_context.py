@@ -0,0 +1,68 @@
+import pandas as pd
+
+from app.services.csv_context import CSV_CONTEXT_MAX_ROWS, build_csv_context, load_table
+
+# These tests build their own CSV files, so they don't depend on what's in files_to_load
+
+
+def write_sales_csv(path, rows=500):
+    lines = ["Item Name\tCategory\tUnits Sold\tRevenue per Unit"]
+    for index in range(rows):
+        lines.append(f"Gadget {index}\t{'Lasers' if index % 2 else 'Robots'}\t{index % 50}\t{1000 + index}")
+    lines.append("Moon Vaporizer\tLasers\t10\t5000")
+    path.write_text("\n".join(lines) + "\n")
+
+# Green test - a big file gets squeezed under the cap, and the row the question asks about is kept
+def test_context_is_capped_and_keeps_matching_rows(tmp_path):
+    path = tmp_path / "sales.csv"
+    write_sales_csv(path)
+
+    context, stats = build_csv_context(str(path), "How many Moon Vaporizers did we sell?", max_chars=1500)
+
+    assert len(context) <= 1500
+    assert "Moon Vaporizer\tLasers\t10\t5000" in context
+    assert stats["saved_tokens"] > 0
+    assert stats["rows"] == 1
+
+# Aggregates are computed over the whole table, including group-by totals for low-cardinality columns
+def test_aggregates_cover_all_rows(tmp_path):
+    path = tmp_path / "sales.csv"
+    write_sales_csv(path, rows=60)
+
+    context, _ = build_csv_context(str(path), "total units sold per category", max_chars=5000)
+
+    assert "Units Sold: total=1280" in context # (0..49) + (0..9) + 10
+    assert "Category=Lasers: Units Sold=660" in context # odd gadgets + the Moon Vaporizer
+
+# The delimiter is sniffed (our real sales_data.csv is tab-separated), and the table is only loaded once
+def test_table_is_loaded_once(tmp_path):
+    path = tmp_path / "sales.csv"
+    write_sales_csv(path, rows=3)
+
+    first = load_table(str(path))
+
+    assert list(first.table.columns) == ["Item Name", "Category", "Units Sold", "Revenue per Unit"]
+    assert load_table(str(path)) is first
+
+# Aggregates and the whole-file size are worked out when the file is parsed - a request doesn't go over all rows again
+def test_aggregates_are_precomputed(tmp_path, monkeypatch):
+    path = tmp_path / "sales.csv"
+    write_sales_csv(path, rows=500)
+    build_csv_context(str(path), "total units sold per category")
+
+    full_table_calls = []
+    for name in ["to_csv", "groupby", "sum"]:
+        original = getattr(pd.DataFrame, name)
+
+        def counted(self, *args, _original=original, _name=name, **kwargs):
+            if len(self) > CSV_CONTEXT_MAX_ROWS:
+                full_table_calls.append(_name)
+            return _original(self, *args, **kwargs)
+
+        monkeypatch.setattr(pd.DataFrame, name, counted)
+
+    context, stats = build_csv_context(str(path), "total units sold per category")
+
+    assert full_table_calls == []
+    assert "Category=Lasers: Units Sold=" in context
+    assert stats["full_tokens"] > stats["context_tokens"]
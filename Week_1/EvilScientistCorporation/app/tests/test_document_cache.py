@@ -0,0 +1,66 @@
+import os
+
+from app.services.document_cache import DocumentCache
+
+# These tests use a temp file so we can change it on disk and watch the cache notice
+
+# Green test - the second load of an unchanged file is served from memory
+def test_unchanged_file_is_a_hit(tmp_path):
+    path = tmp_path / "plans.txt"
+    path.write_text("Step 1: build a moon laser")
+    cache = DocumentCache()
+
+    first = cache.load(str(path))
+    second = cache.load(str(path))
+
+    assert first[0].page_content == second[0].page_content == "Step 1: build a moon laser"
+    assert cache.stats() == {"files": 1, "hits": 1, "misses": 1, "reloads": 0}
+
+# Editing the file (new size and mtime) makes the next load read it again
+def test_changed_file_is_reloaded(tmp_path):
+    path = tmp_path / "plans.txt"
+    path.write_text("Step 1: build a moon laser")
+    cache = DocumentCache()
+    cache.load(str(path))
+
+    path.write_text("Step 1: build a BIGGER moon laser")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000)) # make sure the mtime moved
+
+    docs = cache.load(str(path))
+
+    assert docs[0].page_content == "Step 1: build a BIGGER moon laser"
+    assert cache.stats()["reloads"] == 1
+
+# Callers get their own list, so they can't change what's cached
+def test_returned_list_is_a_copy(tmp_path):
+    path = tmp_path / "plans.txt"
+    path.write_text("Step 1: build a moon laser")
+    cache = DocumentCache()
+
+    cache.load(str(path)).clear()
+
+    assert len(cache.load(str(path))) == 1
+
+# Any parsed form of a file (e.g. a DataFrame) gets the same revalidation - parsed once, reparsed after a change
+def test_load_parsed(tmp_path):
+    path = tmp_path / "plans.txt"
+    path.write_text("build a moon laser")
+    cache = DocumentCache()
+    parsed = []
+
+    def count_words(file_path):
+        parsed.append(file_path)
+        with open(file_path) as file:
+            return len(file.read().split())
+
+    assert cache.load_parsed(str(path), count_words) == 4
+    assert cache.load_parsed(str(path), count_words) == 4
+    assert len(parsed) == 1
+
+    path.write_text("build a BIGGER moon laser")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cache.load_parsed(str(path), count_words) == 5
+    assert cache.stats() == {"files": 1, "hits": 1, "misses": 1, "reloads": 1}
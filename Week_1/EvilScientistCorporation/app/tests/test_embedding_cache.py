@@ -0,0 +1,67 @@
+from app.services.embedding_cache import EmbeddingCache, get_query_embedding, query_embedding_cache
+
+# These tests don't need Ollama - we use a tiny fake embedding object that counts its calls
+
+class CountingEmbedding:
+    model = "fake-embed"
+
+    def __init__(self):
+        self.calls = 0
+        self.texts = []
+
+    def embed_query(self, text):
+        self.calls += 1
+        self.texts.append(text)
+        return [float(len(text)), 1.0]
+
+# Green test - the second lookup of the same (normalized) query should be a cache hit
+def test_repeated_query_is_embedded_once():
+    query_embedding_cache.clear()
+    embedding = CountingEmbedding()
+
+    first = get_query_embedding("Moon Vaporizer", embedding)
+    second = get_query_embedding("  Moon   Vaporizer ", embedding)
+
+    assert first == second
+    assert embedding.calls == 1
+    assert query_embedding_cache.stats()["hits"] >= 1
+
+# The text that gets embedded IS the cache key - a different casing is a different query, whatever was asked first
+def test_cached_vector_matches_its_key():
+    query_embedding_cache.clear()
+    embedding = CountingEmbedding()
+
+    get_query_embedding("  Moon   Vaporizer ", embedding)
+    get_query_embedding("moon vaporizer", embedding)
+
+    assert embedding.texts == ["Moon Vaporizer", "moon vaporizer"]
+
+# The least recently used entry gets evicted when the cache is full
+def test_lru_eviction():
+    cache = EmbeddingCache(max_size=2)
+
+    cache.put("m", "a", [1.0])
+    cache.put("m", "b", [2.0])
+    cache.get("m", "a") # "a" is now the most recently used
+    cache.put("m", "c", [3.0]) # so "b" gets evicted
+
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == [1.0]
+    assert cache.stats()["evictions"] == 1
+
+# Expired entries are treated as misses
+def test_ttl_expiry():
+    cache = EmbeddingCache(ttl_seconds=0)
+
+    cache.put("m", "a", [1.0])
+
+    assert cache.get("m", "a") is None
+
+# Flushing one model leaves the other model's entries alone
+def test_clear_by_model():
+    cache = EmbeddingCache()
+    cache.put("old-model", "a", [1.0])
+    cache.put("new-model", "a", [2.0])
+
+    assert cache.clear("old-model") == 1
+    assert cache.get("new-model", "a") == [2.0]
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+from app.services.fanout_retrieval import fanout_search, merge_results, normalize_scores
+
+# These tests don't need Chroma - the "searches" are canned results
+
+
+def result(doc_id: str, text: str, score: float) -> dict:
+    return {"id": doc_id, "text": text, "metadata": {}, "score": score}
+
+
+# A hybrid result: the fused RRF score, plus the dense distance hybrid search carries along
+def hybrid_result(doc_id: str, text: str, fused_score: float, distance: float | None) -> dict:
+    return {**result(doc_id, text, fused_score), "distance": distance}
+
+
+# Dense scores are distances (lower is better), hybrid scores are higher-is-better - both end up 0-1, higher is better,
+# going by the dense distance
+def test_normalize_scores():
+    dense = normalize_scores([result("a", "a", 0.0), result("b", "b", 0.25), result("c", "c", 1.0)], "dense")
+    hybrid = normalize_scores([hybrid_result("x", "x", 0.032, 0.25), hybrid_result("y", "y", 0.016, None)], "hybrid")
+
+    assert [item["score"] for item in dense] == [1.0, 0.8, 0.5]
+    assert [item["score"] for item in hybrid] == [0.8, 0.0]
+    assert dense[1]["raw_score"] == 0.25
+    assert hybrid[0]["raw_score"] == 0.032
+
+    # Equal scores stay what they are - nobody gets a free 1.0
+    assert [item["score"] for item in normalize_scores([result("d", "d", 3.0), result("e", "e", 3.0)], "dense")] == [0.25, 0.25]
+
+
+# A collection whose hits are ALL poor doesn't crowd out a collection with good ones
+def test_poor_collection_ranks_below_a_good_one():
+    distances = {
+        "evil_items": [1.6, 1.7, 1.8], # nothing in here is about the question
+        "boss_plans": [0.2, 0.3, 0.5]
+    }
+
+    async def search(query, k, collection, mode):
+        return [result(f"{collection}-{index}", f"{collection} {index}", distance) for index, distance in enumerate(distances[collection])]
+
+    searches = [{"collection": collection, "k": 3, "mode": "dense"} for collection in distances]
+    merged = asyncio.run(fanout_search("scheme", search, searches, k=3))
+
+    assert [item["id"] for item in merged] == ["boss_plans-0", "boss_plans-1", "boss_plans-2"]
+
+
+# Same with the real mix of modes: the hybrid search's top fused hits only say where they RANKED,
+# so poor hybrid hits must not beat good dense ones (and the other way around)
+def test_poor_hybrid_collection_ranks_below_a_good_dense_one():
+    def fused(rank: int) -> float:
+        return 2 / (60 + rank) # first in both rankings, second in both, ...
+
+    def search_with(distances: dict[str, list[float]]):
+        async def search(query, k, collection, mode):
+            if mode == "dense":
+                return [result(f"{collection}-{index}", f"{collection} {index}", distance) for index, distance in enumerate(distances[collection])]
+            return [hybrid_result(f"{collection}-{index}", f"{collection} {index}", fused(index + 1), distance)
+                    for index, distance in enumerate(distances[collection])]
+        return search
+
+    searches = [{"collection": "evil_items", "k": 3, "mode": "dense"}, {"collection": "boss_plans", "k": 3, "mode": "hybrid"}]
+
+    poor_plans = asyncio.run(fanout_search("scheme", search_with({"evil_items": [0.2, 0.3, 0.5], "boss_plans": [1.6, 1.7, 1.8]}), searches, k=3))
+    assert [item["collection"] for item in poor_plans] == ["evil_items"] * 3
+
+    poor_items = asyncio.run(fanout_search("scheme", search_with({"evil_items": [1.6, 1.7, 1.8], "boss_plans": [0.2, 0.3, 0.5]}), searches, k=3))
+    assert [item["collection"] for item in poor_items] == ["boss_plans"] * 3
+
+
+# Best first, duplicates dropped, never more than k
+def test_merge_results():
+    items = [result("i1", "Freeze ray", 1.0), result("i2", "Moon laser", 0.4)]
+    plans = [result("p1", "Phase one: freeze the city", 0.9), result("p2", "freeze  RAY", 0.8), result("p3", "Phase two", 0.1)]
+
+    merged = merge_results([items, plans], k=3)
+
+    assert [item["id"] for item in merged] == ["i1", "p1", "i2"]
+
+
+# Both searches run at the same time, so the fan-out takes about as long as the slowest one
+def test_searches_run_concurrently():
+    async def slow_search(query, k, collection, mode):
+        await asyncio.sleep(0.2)
+        return [hybrid_result(f"{collection}-{index}", f"{collection} {query} {index}", index, index) for index in range(k)]
+
+    start = time.perf_counter()
+    merged = asyncio.run(fanout_search("scheme", slow_search, k=5))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.35
+    assert len(merged) == 5
+    assert {item["collection"] for item in merged} == {"evil_items", "boss_plans"}
@@ -0,0 +1,71 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.services.graph_memory import (
+    GRAPH_MAX_MESSAGES,
+    SUMMARY_MESSAGE_ID,
+    BoundedMemorySaver,
+    bounded_add_messages,
+    format_memory,
+)
+from app.tests.graph_helpers import build_echo_graph, run_turns
+
+# These tests don't need Ollama - the echo graph's only node echoes the query back
+
+
+# Older turns get folded into one summary message, the newest stay word for word
+def test_reducer_compacts_old_turns():
+    messages = []
+    for turn in range(20):
+        messages = bounded_add_messages(messages, [HumanMessage(content=f"question {turn}"), AIMessage(content=f"answer {turn}")])
+
+    assert len(messages) <= GRAPH_MAX_MESSAGES
+    assert messages[0].id == SUMMARY_MESSAGE_ID
+    assert "Human: question 0" in messages[0].content # the oldest turn survives in the summary
+    assert messages[-1].content == "answer 19"
+
+    text = format_memory(messages)
+    assert text.startswith("Summary of earlier conversation:")
+    assert text.endswith("Human: question 19\nAI: answer 19")
+
+
+# Each thread keeps its own history, and a long conversation stays bounded in both memory and checkpoints
+def test_threads_are_separate_and_bounded():
+    checkpointer = BoundedMemorySaver(max_checkpoints=2)
+    graph = build_echo_graph(checkpointer)
+
+    result = run_turns(graph, "alice", [f"alice {turn}" for turn in range(30)])
+    run_turns(graph, "bob", ["bob 0"])
+
+    assert len(result["message_memory"]) <= GRAPH_MAX_MESSAGES
+    assert result["message_memory"][-1].content == "echo alice 29"
+
+    # Bob's thread knows nothing about Alice's conversation
+    bob = graph.get_state({"configurable": {"thread_id": "bob"}}).values["message_memory"]
+    assert [message.content for message in bob] == ["bob 0", "echo bob 0"]
+
+    stats = checkpointer.stats()
+    assert stats["threads"] == 2
+    assert stats["checkpoints"] <= 4
+    assert stats["pruned_checkpoints"] > 0
+
+    # Pruning didn't lose anything the graph needs to carry on
+    result = run_turns(graph, "alice", ["alice 30"])
+    assert result["message_memory"][-3].content == "echo alice 29"
+
+
+# Least recently used threads are evicted past max_threads, idle threads once the TTL is up
+def test_thread_eviction():
+    checkpointer = BoundedMemorySaver(max_threads=2)
+    graph = build_echo_graph(checkpointer)
+
+    for thread_id in ["one", "two", "three"]:
+        run_turns(graph, thread_id, ["hi"])
+
+    assert checkpointer.stats()["threads"] == 2
+    assert "one" not in checkpointer.storage
+    assert graph.get_state({"configurable": {"thread_id": "one"}}).values == {}
+
+    checkpointer.idle_ttl_seconds = 0
+    assert checkpointer.evict_idle() == 2
+    assert checkpointer.stats()["threads"] == 0
+    assert checkpointer.stats()["blobs"] == 0
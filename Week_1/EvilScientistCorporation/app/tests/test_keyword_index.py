@@ -0,0 +1,39 @@
+from app.services.keyword_index import BM25Index, reciprocal_rank_fusion
+
+# Green test - an exact codename match should rank first
+def test_bm25_ranks_exact_term_first():
+    index = BM25Index()
+    index.add(
+        ["a", "b", "c"],
+        [
+            "Project Zorvex: deploy the freeze ray before the full moon",
+            "Project Kramul: deploy the shrink ray before the full moon",
+            "Buy more minions for the lab"
+        ]
+    )
+
+    results = index.search("what about project zorvex?", k=2)
+
+    assert results[0][0] == "a"
+
+# Re-adding an ID replaces the old text, removing an ID drops it from the index
+def test_add_replaces_and_remove_deletes():
+    index = BM25Index()
+    index.add(["a"], ["moon vaporizer"])
+    index.add(["a"], ["sun dimmer"])
+
+    assert index.search("moon") == []
+    assert index.search("sun")[0][0] == "a"
+
+    index.remove(["a"])
+
+    assert len(index) == 0
+    assert index.search("sun") == []
+
+# IDs ranked high in both lists beat IDs that only one list liked
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["x", "y", "z"], ["y", "x", "w"]])
+    fused_ids = [doc_id for doc_id, _ in fused]
+
+    assert set(fused_ids[:2]) == {"x", "y"}
+    assert fused_ids[-1] in {"z", "w"}
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_gateway import LLMGateway, LLMOverloadedError
+
+# These tests don't need Ollama - the "generations" are just sleeps
+
+
+# Green test - no more than max_concurrency generations run at once, the rest wait their turn
+def test_concurrency_limit():
+    gateway = LLMGateway(max_concurrency=2, max_queue=10, queue_timeout=5)
+    running, peak = 0, 0
+
+    async def generation():
+        nonlocal running, peak
+        async with gateway.admit():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    async def scenario():
+        await asyncio.gather(*(generation() for _ in range(6)))
+
+    asyncio.run(scenario())
+
+    assert peak == 2
+    assert gateway.stats()["admitted"] == 6
+    assert gateway.stats()["active"] == 0
+
+# When the line is full, new requests are turned away right away
+def test_full_queue_sheds_load():
+    gateway = LLMGateway(max_concurrency=1, max_queue=1, queue_timeout=5)
+
+    async def generation():
+        async with gateway.admit():
+            await asyncio.sleep(0.05)
+
+    async def scenario():
+        return await asyncio.gather(*(generation() for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert sum(isinstance(result, LLMOverloadedError) for result in results) == 1
+    assert gateway.stats()["rejected"] == 1
+
+# Identical prompts that arrive while one is generating share that generation
+def test_identical_prompts_are_coalesced():
+    gateway = LLMGateway(max_concurrency=2, max_queue=10, queue_timeout=5)
+    calls = 0
+
+    async def generate():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return "muahaha"
+
+    async def scenario():
+        return await asyncio.gather(*(gateway.coalesce("same prompt", generate) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["muahaha"] * 5
+    assert calls == 1
+    assert gateway.stats()["coalesced"] == 4
+
+# Waiting too long counts as overload too
+def test_queue_timeout():
+    gateway = LLMGateway(max_concurrency=1, max_queue=5, queue_timeout=0.01)
+
+    async def scenario():
+        async with gateway.admit():
+            with pytest.raises(LLMOverloadedError):
+                async with gateway.admit():
+                    pass
+
+    asyncio.run(scenario())
+    assert gateway.stats()["timed_out"] == 1
+    assert gateway.stats()["active"] == 0
@@ -0,0 +1,29 @@
+from app.services.lru_cache import LRUCache
+
+# The generic cache behind the embedding cache and the support pipeline's draft cache
+
+
+# Any hashable key works, and the least recently used entry goes first when the cache is full
+def test_lru_eviction_with_any_key():
+    cache = LRUCache(max_size=2, ttl_seconds=60)
+
+    cache.put(("model", "a"), [1.0])
+    cache.put("b", "a draft")
+    cache.get(("model", "a")) # now the most recently used
+    cache.put(3, {"three": 3}) # so "b" gets evicted
+
+    assert cache.get("b") is None
+    assert cache.get(("model", "a")) == [1.0]
+    assert cache.get(3) == {"three": 3}
+    assert cache.stats()["evictions"] == 1
+
+
+# clear() drops everything, or only the keys that match
+def test_clear_matching_keys():
+    cache = LRUCache(max_size=10, ttl_seconds=60)
+    cache.put(("old", "a"), 1)
+    cache.put(("new", "a"), 2)
+
+    assert cache.clear(lambda key: key[0] == "old") == 1
+    assert cache.get(("new", "a")) == 2
+    assert cache.clear() == 1
@@ -0,0 +1,97 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_ollama import ChatOllama
+
+from app.services.llm_gateway import GatewayChatOllama
+
+from app.services.metrics import Histogram, LLMMetricsCallback, RouteTagMiddleware, current_route, render_metrics
+
+# These tests don't need Ollama - a fake chat model stands in for it
+
+
+# Buckets are rendered cumulatively, with a +Inf bucket, a _sum and a _count per label set
+def test_histogram_render():
+    histogram = Histogram("test_latency_seconds", "Test latency", ["route"], [1, 5])
+    for value in [0.5, 2, 10]:
+        histogram.observe(value, route="/chat/")
+
+    lines = histogram.render()
+
+    assert 'test_latency_seconds_bucket{route="/chat/",le="1"} 1' in lines
+    assert 'test_latency_seconds_bucket{route="/chat/",le="5"} 2' in lines
+    assert 'test_latency_seconds_bucket{route="/chat/",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_sum{route="/chat/"} 12.5' in lines
+    assert 'test_latency_seconds_count{route="/chat/"} 3' in lines
+
+
+# An LLM call made while handling a request shows up under that request's route, with Ollama's token counts
+def test_llm_call_is_tagged_with_its_route():
+    reply = AIMessage(content="Muahaha", usage_metadata={"input_tokens": 300, "output_tokens": 7, "total_tokens": 307})
+    llm = GenericFakeChatModel(messages=iter([reply]), callbacks=[LLMMetricsCallback()])
+
+    app = FastAPI()
+    app.add_middleware(RouteTagMiddleware)
+
+    @app.get("/scheme/{scheme_id}")
+    async def scheme(scheme_id: int):
+        return {"answer": (await llm.ainvoke("plan")).content, "route": current_route.get()}
+
+    response = TestClient(app).get("/scheme/42")
+
+    # Labelled by the route template, not the raw path
+    assert response.json() == {"answer": "Muahaha", "route": "/scheme/{scheme_id}"}
+
+    metrics = render_metrics()
+    assert 'llm_tokens_total{route="/scheme/{scheme_id}",model="unknown",kind="prompt"} 300' in metrics
+    assert 'llm_tokens_total{route="/scheme/{scheme_id}",model="unknown",kind="completion"} 7' in metrics
+    assert 'llm_request_duration_seconds_count{route="/scheme/{scheme_id}",model="unknown"} 1' in metrics
+    assert 'llm_requests_total{route="/scheme/{scheme_id}",model="unknown",status="ok"} 1' in metrics
+
+
+# Streamed calls record the time to the first token
+def test_streamed_call_records_ttft():
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content="one two three")]), callbacks=[LLMMetricsCallback()])
+
+    async def scenario():
+        token = current_route.set("/stream-test")
+        try:
+            return [chunk.content async for chunk in llm.astream("plan")]
+        finally:
+            current_route.reset(token)
+
+    assert "".join(asyncio.run(scenario())) == "one two three"
+    assert 'llm_time_to_first_token_seconds_count{route="/stream-test",model="unknown"} 1' in render_metrics()
+
+
+# Callers coalesced by the LLM gateway get the same reply (usage_metadata and all) as the one call that ran -
+# they're counted as requests, but the tokens are only counted once
+def test_coalesced_calls_dont_count_tokens(monkeypatch):
+    async def fake_agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(0.05) # long enough for the other callers to pile onto this generation
+        reply = AIMessage(content="Muahaha", usage_metadata={"input_tokens": 300, "output_tokens": 7, "total_tokens": 307})
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    monkeypatch.setattr(ChatOllama, "_agenerate", fake_agenerate)
+    llm = GatewayChatOllama(model="coalesce-test", callbacks=[LLMMetricsCallback()])
+
+    async def scenario():
+        token = current_route.set("/coalesce-test")
+        try:
+            return await asyncio.gather(*(llm.ainvoke("plan") for _ in range(3)))
+        finally:
+            current_route.reset(token)
+
+    assert [reply.content for reply in asyncio.run(scenario())] == ["Muahaha"] * 3
+
+    metrics = render_metrics()
+    assert 'llm_tokens_total{route="/coalesce-test",model="coalesce-test",kind="prompt"} 300' in metrics
+    assert 'llm_tokens_total{route="/coalesce-test",model="coalesce-test",kind="completion"} 7' in metrics
+    assert 'llm_prompt_tokens_count{route="/coalesce-test",model="coalesce-test"} 1' in metrics
+    assert 'llm_requests_total{route="/coalesce-test",model="coalesce-test",status="ok"} 1' in metrics
+    assert 'llm_requests_total{route="/coalesce-test",model="coalesce-test",status="coalesced"} 2' in metrics
+    assert 'llm_request_duration_seconds_count{route="/coalesce-test",model="coalesce-test"} 3' in metrics
@@ -0,0 +1,73 @@
+import random
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from app.services.numpy_vector_store import NumpyVectorStore
+
+# A tiny deterministic fake embedding so we don't need Ollama for these tests
+class FakeEmbedding:
+    def embed_query(self, text):
+        rng = random.Random(text)
+        return [rng.uniform(-1, 1) for _ in range(8)]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+def make_docs(count):
+    return [Document(page_content=f"evil document {index}", metadata={"index": index}) for index in range(count)]
+
+# Green test - top-k matches a brute-force reference computed separately
+def test_top_k_matches_brute_force(tmp_path):
+    store = NumpyVectorStore("items", str(tmp_path), FakeEmbedding())
+    docs = make_docs(50)
+    store.add_documents(docs, ids=[f"id_{index}" for index in range(50)])
+
+    query = FakeEmbedding().embed_query("moon vaporizer")
+    results = store.similarity_search_by_vector_with_relevance_scores(query, k=5)
+
+    matrix = np.array(FakeEmbedding().embed_documents([doc.page_content for doc in docs]), dtype=np.float32)
+    expected = np.argsort(((matrix - np.array(query, dtype=np.float32)) ** 2).sum(axis=1))[:5]
+
+    assert [doc.id for doc, _ in results] == [f"id_{index}" for index in expected]
+    assert all(results[i][1] <= results[i + 1][1] for i in range(4))
+
+# Upserts overwrite, deletes remove, and everything survives a reload from disk
+def test_upsert_delete_and_reload(tmp_path):
+    store = NumpyVectorStore("plans", str(tmp_path), FakeEmbedding())
+    store.add_documents(make_docs(3), ids=["a", "b", "c"])
+    store.add_documents([Document(page_content="new text", metadata={"source": "raw_text_ingestion"})], ids=["a"])
+    store.delete(ids=["b"])
+
+    reloaded = NumpyVectorStore("plans", str(tmp_path), FakeEmbedding())
+    stored = reloaded.get()
+
+    assert sorted(stored["ids"]) == ["a", "c"]
+    assert reloaded.get(where={"source": "raw_text_ingestion"})["ids"] == ["a"]
+
+    # An exact-match query should come back first with distance ~0
+    top_doc, top_score = reloaded.similarity_search_with_score("new text", k=1)[0]
+    assert top_doc.id == "a"
+    assert top_score == pytest.approx(0.0, abs=1e-5)
+
+# Same data in Chroma and in the NumPy store should give the same results
+def test_matches_chroma(tmp_path):
+    chromadb = pytest.importorskip("chromadb")
+
+    embedding = FakeEmbedding()
+    docs = make_docs(40)
+    ids = [f"id_{index}" for index in range(40)]
+
+    store = NumpyVectorStore("items", str(tmp_path / "numpy"), embedding)
+    store.add_documents(docs, ids=ids)
+
+    collection = chromadb.EphemeralClient().create_collection("items")
+    collection.add(ids=ids, embeddings=embedding.embed_documents([doc.page_content for doc in docs]), documents=[doc.page_content for doc in docs])
+
+    query = embedding.embed_query("freeze ray")
+    chroma_results = collection.query(query_embeddings=[query], n_results=5)
+    numpy_results = store.similarity_search_by_vector_with_relevance_scores(query, k=5)
+
+    assert [doc.id for doc, _ in numpy_results] == chroma_results["ids"][0]
+    assert [score for _, score in numpy_results] == pytest.approx(chroma_results["distances"][0], rel=1e-4)
@@ -0,0 +1,71 @@
+from app.services.embedding_cache import query_embedding_cache
+from app.services.fake_embeddings import HashEmbeddings
+from app.services.semantic_router import SemanticRouter, keyword_route
+
+# These tests don't need Ollama - the hash-based fake embeddings make texts that share words look similar
+
+EXAMPLES = {
+    "items": ["buy a freeze ray gadget", "price of the laser gadget", "gadget catalog for sale"],
+    "plans": ["the boss scheme to flood the city", "boss plan for world domination", "phases of the boss scheme"],
+    "chat": ["tell me a joke", "good morning friend", "write me a poem"]
+}
+
+
+class CountingEmbeddings(HashEmbeddings):
+    def __init__(self):
+        super().__init__()
+        self.documents_embedded = 0
+        self.queries_embedded = 0
+
+    def embed_documents(self, texts):
+        self.documents_embedded += len(texts)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.queries_embedded += 1
+        return super().embed_query(text)
+
+
+# A query goes to the route whose examples it's closest to
+def test_routes_by_similarity():
+    router = SemanticRouter(HashEmbeddings(), EXAMPLES, margin=0.05)
+
+    assert router.classify("which gadget is for sale")["route"] == "items"
+    assert router.classify("what is the boss scheme")["route"] == "plans"
+
+    decision = router.classify("tell me a poem")
+    assert decision["route"] == "chat"
+    assert decision["confident"]
+    assert set(decision["scores"]) == {"items", "plans", "chat"}
+
+
+# When the top two routes score about the same, the router says so (and the caller falls back)
+def test_too_close_to_call():
+    router = SemanticRouter(HashEmbeddings(), EXAMPLES, margin=0.05)
+
+    # Nothing in common with any route - every score is about 0
+    decision = router.classify("zebra xylophone")
+    assert not decision["confident"]
+    assert decision["margin"] < 0.05
+    assert router.stats()["fallbacks"] == 1
+
+
+# Examples are embedded once; query vectors go through the shared cache, so retrieval can reuse them
+def test_embeds_examples_once_and_caches_queries():
+    query_embedding_cache.clear()
+    embedding = CountingEmbeddings()
+    router = SemanticRouter(embedding, EXAMPLES)
+
+    router.classify("which gadget is for sale")
+    router.classify("which gadget is for sale")
+
+    assert embedding.documents_embedded == 9
+    assert embedding.queries_embedded == 1
+
+
+# The old keyword router is still there as the fallback
+def test_keyword_route():
+    assert keyword_route("I want to BUY something") == "items"
+    assert keyword_route("what are the boss's plans") == "plans"
+    assert keyword_route("hello") == "chat"
+    assert keyword_route("which items does the boss's plan need?") == "both"
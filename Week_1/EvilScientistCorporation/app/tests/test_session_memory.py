@@ -0,0 +1,56 @@
+import asyncio
+
+from app.services.session_memory import SessionMemoryStore
+
+# These tests don't need Ollama - the "summarizer" just counts how many lines it was handed
+
+
+class FakeSummarizer:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        return f"{inputs['summary']}+{len(inputs['new_lines'].splitlines())} lines"
+
+# Green test - sessions don't see each other's conversations
+def test_sessions_are_separate():
+    store = SessionMemoryStore()
+
+    store.add_turn("igor", "Where is the lab?", "In the basement")
+
+    assert "basement" in store.history("igor")
+    assert store.history("frankenstein") == ""
+
+# Compaction folds the oldest messages into the summary and keeps the recent window word for word
+def test_compaction_keeps_recent_window():
+    summarizer = FakeSummarizer()
+    store = SessionMemoryStore(summarizer=summarizer, window=2, compact_after=4)
+
+    for turn in range(3): # 6 messages
+        store.add_turn("igor", f"question {turn}", f"answer {turn}")
+    asyncio.run(store.maybe_compact("igor"))
+
+    history = store.history("igor")
+    assert summarizer.calls == 1
+    assert "Summary of earlier conversation: +4 lines" in history
+    assert "question 2" in history and "question 1" not in history
+
+    # Nothing new to compact - no extra LLM call
+    asyncio.run(store.maybe_compact("igor"))
+    assert summarizer.calls == 1
+
+# Too many sessions -> the least recently used one is evicted; idle sessions are evicted too
+def test_session_eviction():
+    store = SessionMemoryStore(max_sessions=2)
+    store.add_turn("a", "hi", "hello")
+    store.add_turn("b", "hi", "hello")
+    store.history("a") # "a" is now the most recently used
+    store.add_turn("c", "hi", "hello")
+
+    assert "hello" in store.history("a")
+    assert store.history("b") == "" # "b" was evicted (asking for it starts a fresh session)
+
+    store.idle_ttl_seconds = -1 # everyone is idle now
+    assert store.evict_idle() == 2
+    assert store.stats()["sessions"] == 0
@@ -0,0 +1,178 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from app.services.sqlite_checkpointer import SQLiteCheckpointSaver
+from app.tests.graph_helpers import build_echo_graph, run_turns
+
+# These tests don't need Ollama - the echo graph's only node echoes the query back
+
+
+def count_rows(path: str, table: str) -> int:
+    with sqlite3.connect(path) as db:
+        return db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+# Conversations written by one saver are picked up by the next one (i.e. after a restart)
+def test_threads_survive_a_restart(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+
+    saver = SQLiteCheckpointSaver(graph="echo", path=path, max_checkpoints=2).open()
+    run_turns(build_echo_graph(saver), "alice", ["first", "second"])
+    saver.close() # flushes whatever the writer thread hasn't written yet
+
+    # Only the last max_checkpoints checkpoints ever reach the file
+    assert count_rows(path, "checkpoints") == 2
+
+    restarted = SQLiteCheckpointSaver(graph="echo", path=path).open()
+    graph = build_echo_graph(restarted)
+    result = run_turns(graph, "alice", ["third"])
+
+    assert [message.content for message in result["message_memory"]] == [
+        "first", "echo first", "second", "echo second", "third", "echo third"
+    ]
+    assert restarted.stats()["loaded_threads"] == 1
+    # Another graph sharing the file doesn't see this graph's threads
+    other = SQLiteCheckpointSaver(graph="other", path=path).open()
+    assert build_echo_graph(other).get_state({"configurable": {"thread_id": "alice"}}).values == {}
+    restarted.close()
+    other.close()
+
+
+# Building a saver (which importing the graphs does) leaves the file alone until open()
+def test_file_is_only_opened_by_open(tmp_path):
+    path = tmp_path / "checkpoints.db"
+    saver = SQLiteCheckpointSaver(graph="echo", path=str(path))
+    run_turns(build_echo_graph(saver), "alice", ["hi"])
+    saver.close()
+
+    assert not path.exists()
+    assert saver.stats()["threads"] == 1
+
+
+# Puts are only written by the background writer, and several turns become one write per thread
+def test_writes_are_batched(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    saver = SQLiteCheckpointSaver(graph="echo", path=path, max_checkpoints=2, flush_interval=60).open() # the writer won't get to it
+
+    graph = build_echo_graph(saver)
+    for thread_id in ["one", "two", "three"]:
+        run_turns(graph, thread_id, ["hi", "again"])
+
+    # A flush finds each thread's writes and blobs through the per-thread index (kept right through pruning)
+    for thread_id in ["one", "two", "three"]:
+        assert sorted(saver.writes.keys_for(thread_id)) == sorted(key for key in saver.writes if key[0] == thread_id)
+        assert sorted(saver.blobs.keys_for(thread_id)) == sorted(key for key in saver.blobs if key[0] == thread_id)
+        assert saver.blobs.keys_for(thread_id)
+
+    assert count_rows(path, "threads") == 0
+    assert saver.stats()["pending_threads"] == 3
+
+    assert saver.flush() == 3
+    assert saver.flushes == 1
+    assert count_rows(path, "threads") == 3
+    saver.close()
+
+
+# Memory eviction keeps the thread in the file; retention pruning deletes it from the file
+def test_eviction_and_pruning(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    saver = SQLiteCheckpointSaver(graph="echo", path=path, max_threads=1, flush_interval=60).open()
+    graph = build_echo_graph(saver)
+
+    run_turns(graph, "one", ["hi"])
+    run_turns(graph, "two", ["hi"]) # evicts "one" from memory - its rows wait for the writer, put() doesn't write them
+
+    assert "one" not in saver.storage
+    assert count_rows(path, "threads") == 0
+    assert saver.stats()["pending_threads"] == 2
+
+    # Coming back before the writer ran gets the thread from the waiting rows (evicting "two" in turn)
+    state = graph.get_state({"configurable": {"thread_id": "one"}}).values
+    assert state["message_memory"][-1].content == "echo hi"
+
+    assert saver.flush() == 2
+    assert count_rows(path, "threads") == 2
+    result = run_turns(graph, "one", ["again"])
+    assert [message.content for message in result["message_memory"]] == ["hi", "echo hi", "again", "echo again"]
+
+    saver.flush()
+    saver.retention_seconds = -1
+    assert saver.prune() == 2
+    assert count_rows(path, "blobs") == 0
+    saver.close()
+
+
+# Thread ids the file doesn't have are answered from memory - a new conversation never queries SQLite
+def test_new_threads_dont_query_the_file(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    saver = SQLiteCheckpointSaver(graph="echo", path=path).open()
+    run_turns(build_echo_graph(saver), "alice", ["hi"])
+    saver.close()
+
+    restarted = SQLiteCheckpointSaver(graph="echo", path=path, flush_interval=60).open()
+    statements = []
+    restarted._db.set_trace_callback(statements.append)
+
+    assert restarted.get_tuple({"configurable": {"thread_id": "bob"}}) is None
+    assert statements == []
+
+    assert restarted.get_tuple({"configurable": {"thread_id": "alice"}}) is not None
+    assert any("SELECT" in statement for statement in statements)
+    restarted.close()
+
+
+# A write that fails (e.g. SQLITE_BUSY) loses nothing - the whole batch, evicted threads included, goes again next flush
+def test_failed_flush_is_retried(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    saver = SQLiteCheckpointSaver(graph="echo", path=path, max_threads=1, flush_interval=60).open()
+    graph = build_echo_graph(saver)
+    run_turns(graph, "one", ["hi"])
+    run_turns(graph, "two", ["hi"]) # "one" is evicted, its rows wait for the writer
+
+    write = saver._write
+
+    def busy(threads):
+        raise sqlite3.OperationalError("database is locked")
+
+    saver._write = busy
+    with pytest.raises(sqlite3.OperationalError):
+        saver.flush()
+
+    assert saver.stats()["pending_threads"] == 2
+    assert saver._stored_threads == set()
+
+    saver._write = write
+    assert saver.flush() == 2
+    assert count_rows(path, "threads") == 2
+    assert saver.stats()["pending_threads"] == 0
+    saver.close()
+
+    restarted = SQLiteCheckpointSaver(graph="echo", path=path).open()
+    state = build_echo_graph(restarted).get_state({"configurable": {"thread_id": "one"}}).values
+    assert state["message_memory"][-1].content == "echo hi"
+    restarted.close()
+
+
+# Loading a stored thread from the file happens on a worker thread, not on the event loop
+def test_aget_tuple_reads_the_file_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "checkpoints.db")
+    saver = SQLiteCheckpointSaver(graph="echo", path=path).open()
+    run_turns(build_echo_graph(saver), "alice", ["hi"])
+    saver.close()
+
+    restarted = SQLiteCheckpointSaver(graph="echo", path=path, flush_interval=60).open()
+    reading_threads = []
+    restarted._db.set_trace_callback(lambda statement: reading_threads.append(threading.current_thread()))
+
+    async def load():
+        return await restarted.aget_tuple({"configurable": {"thread_id": "alice"}}), threading.current_thread()
+
+    loaded, loop_thread = asyncio.run(load())
+
+    assert loaded.checkpoint["channel_values"]["message_memory"][-1].content == "echo hi"
+    assert reading_threads and loop_thread not in reading_threads
+    assert restarted.loaded_threads == 1
+    restarted.close()
@@ -0,0 +1,51 @@
+import asyncio
+
+from app.services.llm_gateway import LLMOverloadedError
+from app.services.streaming_service import stream_tokens
+
+# These tests don't need Ollama - the "token streams" are plain async generators
+
+
+async def collect(events) -> list[str]:
+    return [event async for event in events]
+
+
+async def tokens_then(error: Exception):
+    yield "Muahaha"
+    raise error
+
+
+# Tokens go out as they come, then a "done" event with the timings
+def test_stream_ends_with_done():
+    async def tokens():
+        for token in ["Mua", "haha"]:
+            yield token
+
+    events = asyncio.run(collect(stream_tokens(tokens())))
+
+    assert events[:2] == ['data: {"token": "Mua"}\n\n', 'data: {"token": "haha"}\n\n']
+    assert events[-1].startswith("event: done\n")
+
+
+# A busy gateway ends the stream with an error event that says when to retry
+def test_overload_becomes_an_error_event():
+    events = asyncio.run(collect(stream_tokens(tokens_then(LLMOverloadedError("queue is full", retry_after=5)))))
+
+    assert events[-1].startswith("event: error\n")
+    assert '"retry_after": 5' in events[-1]
+
+
+# Any other failure halfway (e.g. Ollama went away) also ends with an error event - and on_complete never runs
+def test_failure_becomes_an_error_event(capsys):
+    completed = []
+
+    async def on_complete(text):
+        completed.append(text)
+
+    events = asyncio.run(collect(stream_tokens(tokens_then(ConnectionError("ollama is down")), on_complete, route="/chat/stream")))
+
+    assert events[0] == 'data: {"token": "Muahaha"}\n\n'
+    assert events[-1].startswith("event: error\n")
+    assert "ollama is down" not in events[-1]
+    assert completed == []
+    assert "/chat/stream failed: ConnectionError: ollama is down" in capsys.readouterr().out
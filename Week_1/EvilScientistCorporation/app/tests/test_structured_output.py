@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from app.models.item_model import ItemModel
+from app.routers.chat import ItemListModel
+from app.services.structured_output import StructuredOutputError, generate_structured, parse_structured, repair_json
+
+# These tests don't need Ollama - a fake chain hands back canned LLM outputs, one per call
+
+VALID = '{"items": [{"id": 1, "name": "Moon Laser", "description": "Vaporizes the moon", "inventory": 3, "price": 1000.5}]}'
+
+
+class FakeChain:
+    def __init__(self, outputs):
+        self.outputs = list(outputs)
+        self.calls = 0
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        return self.outputs.pop(0)
+
+# Green test - prose, code fences, number commas and trailing commas all get repaired
+def test_repair_fixes_common_mistakes():
+    messy = ('Sure! Here are the items:\n```json\n'
+             '{"items": [{"id": 1, "name": "Moon Laser", "description": "Vaporizes the moon", '
+             '"inventory": 3, "price": 1,000.50,},]}\n```\nEnjoy your evil!')
+
+    parsed, repaired = parse_structured(messy, ItemListModel)
+
+    assert repaired
+    assert parsed.items[0].price == 1000.5
+
+# Output that got cut off mid-item keeps the complete items
+def test_repair_closes_truncated_json():
+    truncated = VALID[:-2] + ', {"id": 2, "name": "Shrink R'
+
+    assert repair_json(truncated) == VALID
+
+# Unparseable output is regenerated, within the retry budget
+def test_generate_retries_then_succeeds():
+    chain = FakeChain(["I refuse to answer in JSON", VALID])
+
+    result = asyncio.run(generate_structured(chain, {"input": "..."}, ItemListModel, max_attempts=3))
+
+    assert chain.calls == 2
+    assert isinstance(result.items[0], ItemModel)
+
+def test_generate_gives_up_after_budget():
+    chain = FakeChain(["nope", "still nope", "never"])
+
+    with pytest.raises(StructuredOutputError):
+        asyncio.run(generate_structured(chain, {"input": "..."}, ItemListModel, max_attempts=2))
+
+    assert chain.calls == 2
@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+import os
+
+from app.services import summary_cache as summary_cache_module
+from app.services.summary_cache import SummaryCache
+
+# These tests don't need Ollama - the "summarizer" just counts its calls and shouts the text back
+
+
+def make_cache(path):
+    calls = []
+
+    async def summarize(text):
+        calls.append(text)
+        await asyncio.sleep(0.01) # pretend to be a slow LLM
+        return text.upper()
+
+    cache = SummaryCache()
+    cache.register("plans", str(path), summarize)
+    return cache, calls
+
+# Green test - the first request waits for the summary, the next ones are served from the cache
+def test_summary_is_computed_once(tmp_path):
+    path = tmp_path / "plans.txt"
+    path.write_text("build a moon laser")
+    cache, calls = make_cache(path)
+
+    async def scenario():
+        first = await cache.get("plans")
+        second = await cache.get("plans")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first == ("BUILD A MOON LASER", "cold")
+    assert second == ("BUILD A MOON LASER", "fresh")
+    assert len(calls) == 1
+
+# When the file changes, the old summary is served while the new one is computed in the background
+def test_changed_file_serves_stale_then_refreshes(tmp_path):
+    path = tmp_path / "plans.txt"
+    path.write_text("build a moon laser")
+    cache, calls = make_cache(path)
+
+    async def scenario():
+        await cache.get("plans")
+        path.write_text("build TWO moon lasers")
+        stale = await cache.get("plans")
+        await asyncio.sleep(0.05) # let the background refresh finish
+        fresh = await cache.get("plans")
+        return stale, fresh
+
+    stale, fresh = asyncio.run(scenario())
+
+    assert stale == ("BUILD A MOON LASER", "stale")
+    assert fresh == ("BUILD TWO MOON LASERS", "fresh")
+    assert len(calls) == 2
+
+# A request that arrives while the startup warm-up is running waits for that same summary
+def test_warm_up_is_shared_with_first_request(tmp_path):
+    path = tmp_path / "plans.txt"
+    path.write_text("build a moon laser")
+    cache, calls = make_cache(path)
+
+    async def scenario():
+        cache.warm_up()
+        return await cache.get("plans")
+
+    assert asyncio.run(scenario()) == ("BUILD A MOON LASER", "cold")
+    assert len(calls) == 1
+
+# The content hash is cached with the text - it's only recomputed when the file changes
+def test_unchanged_file_is_hashed_once(tmp_path, monkeypatch):
+    path = tmp_path / "plans.txt"
+    path.write_text("build a moon laser")
+    cache, calls = make_cache(path)
+    hashed = []
+    sha256 = hashlib.sha256
+
+    def counting_sha256(data):
+        hashed.append(data)
+        return sha256(data)
+
+    monkeypatch.setattr(summary_cache_module.hashlib, "sha256", counting_sha256)
+
+    async def scenario():
+        for _ in range(3):
+            await cache.get("plans")
+        path.write_text("build TWO moon lasers")
+        os.utime(path, ns=(0, 0)) # a different mtime, however fast the test runs
+        await cache.get("plans")
+
+    asyncio.run(scenario())
+
+    assert hashed == [b"build a moon laser", b"build TWO moon lasers"]
@@ -0,0 +1,48 @@
+import asyncio
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.services.support_pipeline import SupportPipeline
+
+# These tests don't need Ollama - LangChain's fake chat model streams canned answers word by word
+
+
+def make_pipeline():
+    draft_llm = GenericFakeChatModel(messages=iter([AIMessage(content="use the moon laser")] * 5))
+    final_llm = GenericFakeChatModel(messages=iter([AIMessage(content="Obviously, use the laser")] * 5))
+    draft_chain = ChatPromptTemplate.from_messages([("user", "{input}")]) | draft_llm
+    final_chain = ChatPromptTemplate.from_messages([("user", "Initial Reply: {input}")]) | final_llm
+    return SupportPipeline(draft_chain, final_chain), draft_llm
+
+
+def collect(pipeline, user_input):
+    async def run():
+        return [event async for event in pipeline.astream(user_input)]
+    return asyncio.run(run())
+
+# Green test - draft tokens come first, then the refined tokens, then the stage timings
+def test_pipeline_streams_both_stages():
+    pipeline, _ = make_pipeline()
+
+    events = collect(pipeline, "How do I stop the hero?")
+
+    stages = [stage for stage, _ in events]
+    assert stages.index("final") > stages.index("draft")
+    assert "".join(token for stage, token in events if stage == "draft") == "use the moon laser"
+    assert "".join(token for stage, token in events if stage == "final") == "Obviously, use the laser"
+    timings = events[-1][1]
+    assert events[-1][0] == "done"
+    assert timings["first_output_ms"] <= timings["total_ms"]
+
+# A repeated question reuses the cached draft instead of calling the draft LLM again
+def test_repeated_input_uses_cached_draft():
+    pipeline, draft_llm = make_pipeline()
+
+    collect(pipeline, "How do I stop the hero?")
+    events = collect(pipeline, "how do i stop the HERO?")
+
+    assert events[-1][1]["draft_cached"] is True
+    assert ("draft", "use the moon laser") in events
+    assert pipeline.draft_cache.stats()["hits"] == 1
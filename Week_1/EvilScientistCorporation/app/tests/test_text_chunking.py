@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from app.services import text_chunking
+from app.services.text_chunking import TEXT_SPLITTER, StreamingTextSplitter, TextTooLongError
+
+# The streaming splitter has to give EXACTLY the chunks TEXT_SPLITTER gives for the whole document,
+# however the document is cut into pieces - otherwise the chunk IDs don't match /ingest-text's
+
+
+def make_document(seed: int, paragraphs: int = 400, paragraph_break: bool = True) -> str:
+    rng = random.Random(seed)
+    words = "evil moon laser boss plan phase freeze ray minion volcano".split()
+
+    text = "  \n" # leading whitespace gets stripped
+    for _ in range(paragraphs):
+        # Short and long paragraphs (some longer than a chunk, so they get split by lines/words), some with line breaks
+        lines = [" ".join(rng.choice(words) for _ in range(rng.randint(1, rng.choice([3, 10, 40, 90, 150]))))
+                 for _ in range(rng.randint(1, 3))]
+        separator = rng.choice(["\n\n", "\n\n\n", "\n\n\n\n", "\n\n \n\n"]) if paragraph_break else "\n"
+        text += "\n".join(lines) + separator
+    return text + " \n\n \n" # and so does trailing whitespace
+
+
+def stream(text: str, piece_size: int, window: int = 8 * 1024) -> list[str]:
+    splitter = StreamingTextSplitter(window)
+    chunks = []
+    for start in range(0, len(text), piece_size):
+        chunks.extend(splitter.feed(text[start:start + piece_size]))
+    return chunks + splitter.finish()
+
+
+def test_streamed_chunks_match_split_text():
+    for seed in range(5):
+        text = make_document(seed)
+        expected = TEXT_SPLITTER.split_text(text.strip())
+
+        for piece_size in [1, 7, 1000, 5000]:
+            assert stream(text, piece_size) == expected, (seed, piece_size)
+
+
+# A window smaller than a paragraph means every split happens mid-paragraph
+def test_small_window():
+    text = make_document(42)
+    assert stream(text, 97, window=20) == TEXT_SPLITTER.split_text(text.strip())
+
+
+# Without a single paragraph break the splitter cuts by lines instead - still the same chunks
+def test_no_paragraph_breaks():
+    text = make_document(7, paragraphs=60, paragraph_break=False)
+    assert stream(text, 1000) == TEXT_SPLITTER.split_text(text.strip())
+
+
+def test_empty_document():
+    assert stream("  \n\n  ", 1) == []
+
+
+# Each character is searched for paragraph breaks once, not once per window (that was quadratic for long paragraphs)
+def test_long_paragraph_is_scanned_once(monkeypatch):
+    pattern = text_chunking._PARAGRAPH_BREAK
+    scanned = []
+
+    class CountingPattern:
+        def finditer(self, text, pos, endpos):
+            scanned.append(endpos - pos)
+            return pattern.finditer(text, pos, endpos)
+
+    monkeypatch.setattr(text_chunking, "_PARAGRAPH_BREAK", CountingPattern())
+    text = make_document(3, paragraphs=200, paragraph_break=False) # ~100k characters, no paragraph break at all
+
+    assert stream(text, 100, window=1000) == TEXT_SPLITTER.split_text(text.strip())
+    assert sum(scanned) <= len(text)
+
+
+# Past max_buffer characters without a paragraph break the splitter gives up instead of growing forever
+def test_buffer_is_capped():
+    splitter = StreamingTextSplitter(window=100, max_buffer=1000)
+    splitter.feed("a short paragraph\n\n" * 50) # plenty of breaks - fine
+
+    with pytest.raises(TextTooLongError):
+        for _ in range(20):
+            splitter.feed("no break in sight " * 10)
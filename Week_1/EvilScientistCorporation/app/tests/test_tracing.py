@@ -0,0 +1,99 @@
+import asyncio
+from typing import TypedDict
+
+from app.services.metrics import render_metrics
+from app.services.tracing import Tracer, traced, traced_node, tracer
+from app.tests.graph_helpers import build_linear_graph
+
+# These tests don't need Ollama or Chroma - a tiny graph with the same traced nodes/calls as the real ones
+
+
+class State(TypedDict, total=False):
+    query: str
+    route: str
+    docs: list[str]
+
+
+async def fake_search(query, k, collection):
+    await asyncio.sleep(0.01)
+    return [f"{collection} {query} {index}" for index in range(k)]
+
+
+traced_fake_search = traced("vector.search", "vector", fake_search)
+
+
+async def route_node(state):
+    return {"route": "items"}
+
+
+async def extract_node(state):
+    return {"docs": await traced_fake_search(state["query"], k=3, collection="evil_items")}
+
+
+def build_test_graph():
+    return build_linear_graph(State, {"route": traced_node("route", route_node), "extract": traced_node("extract", extract_node)})
+
+
+async def run_traced(graph, query: str) -> dict:
+    async with tracer.trace("test_graph", query_chars=len(query)) as trace:
+        await graph.ainvoke({"query": query})
+    return trace
+
+
+# One span per node, the calls made inside a node nest under it, and the route ends up on the trace
+def test_spans_per_node_and_call():
+    tracer.clear()
+    trace = asyncio.run(run_traced(build_test_graph(), "freeze ray"))
+
+    assert trace["route"] == "items"
+    assert trace["duration_ms"] > 0
+    assert [span["name"] for span in trace["spans"]] == ["node:route", "node:extract"]
+
+    route_span, extract_span = trace["spans"]
+    assert route_span["attributes"]["route"] == "items"
+
+    [search_span] = extract_span["children"]
+    assert search_span["kind"] == "vector"
+    assert search_span["attributes"] == {"k": 3, "collection": "evil_items", "input_size": 10, "output_size": 3}
+    assert search_span["duration_ms"] >= 10
+    assert extract_span["duration_ms"] >= search_span["duration_ms"]
+
+
+# Finished traces are kept for the debug endpoint (newest first), with per-span percentiles
+def test_recent_traces_and_stats():
+    tracer.clear()
+    graph = build_test_graph()
+    first = asyncio.run(run_traced(graph, "one"))
+    second = asyncio.run(run_traced(graph, "two"))
+
+    assert [trace["trace_id"] for trace in tracer.recent()] == [second["trace_id"], first["trace_id"]]
+    assert tracer.get(first["trace_id"]) is first
+    assert tracer.recent(graph="other_graph") == []
+
+    stats = {row["span"]: row for row in tracer.stats()}
+    assert set(stats) == {"node:route", "node:extract", "vector.search"}
+    assert stats["vector.search"]["count"] == 2
+    assert stats["vector.search"]["p50_ms"] <= stats["vector.search"]["max_ms"]
+
+    assert 'graph_span_duration_seconds_count{graph="test_graph",span="node:extract",kind="node"}' in render_metrics()
+
+
+# A failing call marks its span and the trace, and the trace is still kept
+def test_errors_are_recorded():
+    local = Tracer()
+
+    async def broken():
+        async with local.trace("test_graph") as trace:
+            async with local.span("llm", "llm"):
+                raise RuntimeError("Ollama is down")
+        return trace
+
+    try:
+        asyncio.run(broken())
+    except RuntimeError:
+        pass
+
+    [trace] = local.recent()
+    assert "Ollama is down" in trace["error"]
+    assert "Ollama is down" in trace["spans"][0]["error"]
+    assert "_start" not in trace
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any
+
+import pytest
+
+from app.services import vectordb_service
+from app.services.embedding_cache import query_embedding_cache
+from app.services.fake_embeddings import HashEmbeddings
+
+# These tests don't need Ollama, Chroma or the spaCy model:
+# every collection lives in a NumPy store under tmp_path, embedded with the hash-based fake embeddings
+
+
+@pytest.fixture
+def vectordb(monkeypatch, tmp_path):
+    monkeypatch.setattr(vectordb_service, "PERSIST_DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(vectordb_service, "EMBEDDING", HashEmbeddings())
+    monkeypatch.setattr(vectordb_service, "DEFAULT_VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(vectordb_service, "vector_store", {})
+    monkeypatch.setattr(vectordb_service, "keyword_indexes", {})
+    # No NER model here - every chunk just gets no entities
+    monkeypatch.setattr(vectordb_service, "extract_entities_batch", lambda texts: [[] for _ in texts])
+    return vectordb_service
+
+
+def make_items(count: int) -> list[dict]:
+    return [{"id": f"item_{index}", "text": f"evil gadget number {index}", "metadata": {"index": index}} for index in range(count)]
+
+
+# Counts how many batches were submitted but not finished yet, every time a batch is submitted
+class CountingExecutor(vectordb_service.ThreadPoolExecutor):
+    max_in_flight = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._in_flight = 0
+        self._count_lock = threading.Lock()
+
+    def submit(self, *args, **kwargs):
+        with self._count_lock:
+            self._in_flight += 1
+            CountingExecutor.max_in_flight = max(CountingExecutor.max_in_flight, self._in_flight)
+        future = super().submit(*args, **kwargs)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._count_lock:
+            self._in_flight -= 1
+
+
+# Items are split into batch_size batches, no more than 2 batches per worker are queued at once,
+# and the report has one entry per batch
+def test_ingest_items_batched(vectordb, monkeypatch):
+    store = vectordb.get_vector_store("evil_items")
+    batch_sizes = []
+    add_documents = store.add_documents
+
+    def slow_add_documents(documents, ids=None):
+        time.sleep(0.02) # long enough for the submitting loop to hit the in-flight cap
+        batch_sizes.append(len(documents))
+        return add_documents(documents, ids=ids)
+
+    monkeypatch.setattr(store, "add_documents", slow_add_documents)
+    monkeypatch.setattr(vectordb, "ThreadPoolExecutor", CountingExecutor)
+    CountingExecutor.max_in_flight = 0
+
+    report = vectordb.ingest_items_batched(make_items(25), "evil_items", batch_size=2, max_workers=2)
+
+    assert sorted(batch_sizes) == [1] + [2] * 12
+    assert CountingExecutor.max_in_flight == 4
+
+    assert report["ingested"] == 25
+    assert [batch["batch"] for batch in report["batches"]] == list(range(13))
+    assert [batch["size"] for batch in report["batches"]] == [2] * 12 + [1]
+
+    # Everything made it into the store AND the keyword index
+    assert len(store.get(include=[])["ids"]) == 25
+    assert vectordb.get_keyword_index("evil_items").search("gadget 7", 1)[0][0] == "item_7"
+
+
+# Streaming a document stores exactly the chunks (and chunk IDs) ingest_text() stores for it,
+# even when multi-byte characters are cut in half between pieces
+def test_streamed_ingestion_matches_ingest_text(vectordb):
+    text = "\n\n".join(f"Phase {index}: freeze the café at {index}°C " + "and then the moon " * (index % 40) for index in range(300))
+
+    vectordb.ingest_text(text)
+    whole = sorted(vectordb.get_vector_store("boss_plans").get(include=[])["ids"])
+    vectordb.delete_items(whole, collection="boss_plans")
+
+    data = text.encode("utf-8")
+    ingestor = vectordb.StreamingTextIngestor(batch_size=16)
+    for start in range(0, len(data), 777):
+        ingestor.feed(data[start:start + 777])
+    report = ingestor.finish()
+
+    streamed = sorted(vectordb.get_vector_store("boss_plans").get(include=[])["ids"])
+    assert streamed == whole
+    assert report["ingested_chunks"] == len(whole)
+    assert report["bytes_read"] == len(data)
+
+
+# Each paragraph is long enough to be a chunk of its own
+def plan_paragraph(name: str) -> str:
+    return f"Operation {name}: " + f"the boss will deploy the {name} device over the city. " * 5
+
+
+class CountingHashEmbeddings(HashEmbeddings):
+    documents_embedded = 0
+
+    def embed_documents(self, texts):
+        CountingHashEmbeddings.documents_embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+# Only the edited chunk is embedded again, the vanished one is deleted from the store, the keyword index
+# and the answer cache, and chunks that didn't come from raw text are left alone
+def test_reingest_text_diff(vectordb, monkeypatch):
+    monkeypatch.setattr(vectordb, "EMBEDDING", CountingHashEmbeddings())
+    vectordb.ingest_items([{"id": "manual", "text": "a hand-written plan", "metadata": {"source": "manual"}}], "boss_plans")
+
+    original = "\n\n".join(plan_paragraph(name) for name in ["blackout", "tsunami", "moonshot"])
+    assert vectordb.reingest_text(original) == {"added": 3, "kept": 0, "removed": 0}
+
+    store = vectordb.get_vector_store("boss_plans")
+    stored = store.get(where={"source": "raw_text_ingestion"})
+    tsunami_id = next(doc_id for doc_id, text in zip(stored["ids"], stored["documents"]) if "tsunami" in text)
+    blackout_id = next(doc_id for doc_id, text in zip(stored["ids"], stored["documents"]) if "blackout" in text)
+    # Content-addressed chunks don't store a position - it would go stale when text above them changes
+    assert all("chunk_index" not in metadata for metadata in stored["metadatas"])
+
+    vectordb.answer_cache.clear()
+    vectordb.answer_cache.store("search-plans", "boss_plans", [1.0], [tsunami_id], "stale answer")
+    vectordb.answer_cache.store("search-plans", "boss_plans", [1.0], [blackout_id], "still good")
+
+    CountingHashEmbeddings.documents_embedded = 0
+    edited = "\n\n".join(plan_paragraph(name) for name in ["blackout", "earthquake", "moonshot"])
+    assert vectordb.reingest_text(edited) == {"added": 1, "kept": 2, "removed": 1}
+    assert CountingHashEmbeddings.documents_embedded == 1
+
+    stored = store.get(where={"source": "raw_text_ingestion"})
+    assert sorted(stored["ids"]) == sorted(vectordb.content_chunk_id(chunk) for chunk in vectordb.TEXT_SPLITTER.split_text(edited))
+    assert store.get(ids=["manual"])["ids"] == ["manual"]
+
+    keyword_index = vectordb.get_keyword_index("boss_plans")
+    assert keyword_index.get(tsunami_id) is None
+    assert keyword_index.search("earthquake", 1)
+
+    assert vectordb.answer_cache.lookup("search-plans", [1.0], [tsunami_id]) is None
+    assert vectordb.answer_cache.lookup("search-plans", [1.0], [blackout_id]) == "still good"
+
+    # Same text again - nothing to do
+    assert vectordb.reingest_text(edited) == {"added": 0, "kept": 3, "removed": 0}
+
+
+# Embedding a query takes a while (like a real round trip to Ollama) - and remembers which thread did it
+class SlowHashEmbeddings(HashEmbeddings):
+    threads: list[str] = []
+
+    def embed_query(self, text):
+        SlowHashEmbeddings.threads.append(threading.current_thread().name)
+        time.sleep(0.2)
+        return super().embed_query(text)
+
+
+# Await a coroutine while a ticker runs on the same event loop
+# If the coroutine blocked the loop, the ticker barely gets to tick
+async def ticks_while_awaiting(coroutine) -> tuple[Any, int]:
+    ticks = 0
+    finished = asyncio.Event()
+
+    async def ticker():
+        nonlocal ticks
+        while not finished.is_set():
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0) # let the ticker start
+    result = await coroutine
+    finished.set()
+    await task
+    return result, ticks
+
+
+# The async wrappers do the slow embedding on the vector executor's threads, so the event loop keeps going
+def test_async_wrappers_run_off_the_event_loop(vectordb, monkeypatch):
+    monkeypatch.setattr(vectordb, "EMBEDDING", SlowHashEmbeddings())
+    SlowHashEmbeddings.threads = []
+    query_embedding_cache.clear()
+
+    async def scenario():
+        await vectordb.aingest_items(make_items(5), "evil_items")
+        results, search_ticks = await ticks_while_awaiting(vectordb.asearch("evil gadget number 3", k=1))
+        vector, embedding_ticks = await ticks_while_awaiting(vectordb.aget_query_embedding("a brand new question"))
+        return results, search_ticks, vector, embedding_ticks
+
+    results, search_ticks, vector, embedding_ticks = asyncio.run(scenario())
+
+    assert results[0]["id"] == "item_3"
+    assert len(vector) == vectordb.EMBEDDING.dimensions
+    assert search_ticks >= 5 and embedding_ticks >= 5
+    assert SlowHashEmbeddings.threads and all(name.startswith("vectordb") for name in SlowHashEmbeddings.threads)
+
+
+# Stored entities are used as-is, only chunks without them go through NER (in one batch), duplicates are dropped
+def test_aentities_for_results(vectordb, monkeypatch):
+    batches = []
+
+    def fake_ner(texts):
+        batches.append(texts)
+        return [[{"text": "Moon", "label": "LOC"}, {"text": "Dr. Evil", "label": "PERSON"}] for _ in texts]
+
+    monkeypatch.setattr(vectordb, "extract_entities_batch", fake_ner)
+    results = [
+        {"id": "a", "text": "stored", "metadata": {"entities": json.dumps([{"text": "Dr. Evil", "label": "PERSON"}])}},
+        {"id": "b", "text": "old chunk", "metadata": {}}
+    ]
+
+    entities = asyncio.run(vectordb.aentities_for_results(results))
+
+    assert batches == [["old chunk"]]
+    assert entities == [{"text": "Dr. Evil", "label": "PERSON"}, {"text": "Moon", "label": "LOC"}]
+
+
+# The LangGraph extract nodes await the async search - they return the docs without blocking the loop
+def test_graph_extract_nodes(vectordb, monkeypatch):
+    from app.services import langgraph_service
+
+    vectordb.ingest_items(make_items(5), "evil_items")
+    vectordb.ingest_text("\n\n".join(plan_paragraph(name) for name in ["blackout", "tsunami"]))
+    monkeypatch.setattr(vectordb, "EMBEDDING", SlowHashEmbeddings())
+    query_embedding_cache.clear()
+
+    items, item_ticks = asyncio.run(ticks_while_awaiting(langgraph_service.extract_items_node({"query": "evil gadget number 2"})))
+    plans, plan_ticks = asyncio.run(ticks_while_awaiting(langgraph_service.extract_plans_node({"query": "operation tsunami"})))
+
+    assert items["docs"][0]["id"] == "item_2"
+    assert "tsunami" in plans["docs"][0]["text"]
+    assert item_ticks >= 5 and plan_ticks >= 5
+
+
+# Hybrid results carry their dense distance (keyword-only hits get the farthest dense candidate's)
+def test_hybrid_search_carries_the_dense_distance(vectordb):
+    vectordb.ingest_items(make_items(30), "evil_items")
+
+    dense = {item["id"]: item["score"] for item in vectordb.search("evil gadget number 7", k=30, collection="evil_items")}
+    hybrid = vectordb.search("evil gadget number 7", k=5, collection="evil_items", mode="hybrid")
+
+    assert hybrid[0]["id"] == "item_7"
+    assert all(item["distance"] == dense[item["id"]] for item in hybrid)
@@ -0,0 +1,83 @@
+# Shared helpers for the benchmark scripts in this package
+import os
+import random
+import statistics
+import tempfile
+from types import ModuleType
+
+from app.services.embedding_cache import query_embedding_cache
+from app.services.fake_embeddings import HashEmbeddings
+
+SYLLABLES = ["zor", "vex", "kra", "mul", "tig", "nox", "pra", "dru", "vel", "qua", "sni", "gor", "lum", "dax", "fen", "rop"]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+# p50/p95/p99/mean for a list of latencies in milliseconds
+def latency_summary(latencies_ms: list[float]) -> dict[str, float]:
+    return {
+        "count": len(latencies_ms),
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p95_ms": round(percentile(latencies_ms, 95), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "mean_ms": round(statistics.mean(latencies_ms), 3)
+    }
+
+
+# Total size (bytes) of everything under a directory
+def directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+# Point a vectordb_service module at a fresh temp directory so benchmarks never touch the real data
+# Returns the temp directory path
+def isolated_vector_store(vectordb_service: ModuleType, prefix: str) -> str:
+    directory = tempfile.mkdtemp(prefix=prefix)
+    vectordb_service.PERSIST_DIRECTORY = directory
+    vectordb_service.vector_store.clear()
+    if hasattr(vectordb_service, "keyword_indexes"):
+        vectordb_service.keyword_indexes.clear()
+    query_embedding_cache.clear()
+    return directory
+
+
+# Swap the real (Ollama) embedding model for the deterministic hash-based one
+def use_fake_embeddings(vectordb_service: ModuleType) -> None:
+    vectordb_service.EMBEDDING = HashEmbeddings()
+    vectordb_service.vector_store.clear() # existing stores captured the old embedding function
+    query_embedding_cache.clear()
+
+
+# A made-up vocabulary of evil-sounding words, the same every run for the same seed
+def make_vocabulary(size: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+# Synthetic corpus: `count` chunks of `words_per_chunk` random vocabulary words
+def make_corpus(count: int, seed: int, words_per_chunk: int = 60, vocabulary_size: int = 5000) -> list[str]:
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(vocabulary_size, seed)
+    return [" ".join(rng.choices(vocabulary, k=words_per_chunk)) for _ in range(count)]
+
+
+# Queries are short phrases lifted from random corpus chunks, so every query has a "right" answer
+def make_queries(corpus: list[str], count: int, seed: int, words_per_query: int = 6) -> list[str]:
+    rng = random.Random(seed + 1)
+    queries = []
+    for _ in range(count):
+        words = rng.choice(corpus).split()
+        start = rng.randint(0, max(0, len(words) - words_per_query))
+        queries.append(" ".join(words[start:start + words_per_query]))
+    return queries
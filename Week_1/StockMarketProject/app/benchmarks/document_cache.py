@@ -0,0 +1,66 @@
+# Benchmark: loading the /chatbot files cold (a new loader every request, like the routes used to do)
+# vs warm (served from the document cache)
+# Run it from the project root:
+#   python -m app.benchmarks.document_cache --rounds 200
+import argparse
+import json
+import time
+
+from langchain_community.document_loaders import CSVLoader, TextLoader
+
+from app.benchmarks.common import latency_summary
+from app.services.document_cache import DocumentCache
+
+DEFAULT_FILES = ["app/files_to_load/warren_buffet.txt", "app/files_to_load/tech_performance.csv"]
+
+
+def loader_for(path: str) -> type:
+    return CSVLoader if path.endswith(".csv") else TextLoader
+
+
+def bench_cold(path: str, rounds: int) -> dict:
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        loader_for(path)(path).load()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latency_summary(latencies)
+
+
+def bench_warm(path: str, rounds: int) -> dict:
+    cache = DocumentCache()
+    cache.load(path, loader_for(path)) # the first request pays for the load
+
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        cache.load(path, loader_for(path))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    result = latency_summary(latencies)
+    result["cache"] = cache.stats()
+    return result
+
+
+def run(files: list[str], rounds: int) -> dict:
+    report = {"rounds": rounds, "results": {}}
+
+    for path in files:
+        cold = bench_cold(path, rounds)
+        warm = bench_warm(path, rounds)
+        report["results"][path] = {
+            "cold": cold,
+            "warm": warm,
+            "p50_speedup": round(cold["p50_ms"] / max(warm["p50_ms"], 1e-6), 1)
+        }
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold vs warm latency for the file-backed document cache")
+    parser.add_argument("--files", nargs="+", default=DEFAULT_FILES)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.files, args.rounds), indent=2))
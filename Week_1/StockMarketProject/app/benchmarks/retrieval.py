@@ -0,0 +1,91 @@
+# Offline retrieval benchmark suite - no Ollama needed (uses the deterministic hash embedder by default)
+# Run it from the project root:
+#   python -m app.benchmarks.retrieval --sizes 1000 10000 100000 --out retrieval_results.json
+#
+# For each corpus size it measures:
+#   - ingest_items_for_year throughput (docs/sec)
+#   - search_year latency (p50/p95/p99)
+#   - on-disk size of the vector store
+# Results are written as JSON so runs can be diffed/compared
+import argparse
+import json
+import platform
+import time
+from datetime import datetime, timezone
+
+from app.benchmarks.common import (
+    directory_size, isolated_vector_store, latency_summary, make_corpus, make_queries, use_fake_embeddings
+)
+from app.services import vectordb_service
+from app.services.embedding_cache import model_name, query_embedding_cache
+
+BENCH_YEAR = 1999 # a year that never holds real macro reports
+
+
+def bench_ingest_items_for_year(corpus: list[str]) -> dict:
+    items = [{"id": f"doc_{index}", "text": text, "metadata": {"index": index}} for index, text in enumerate(corpus)]
+
+    start = time.perf_counter()
+    vectordb_service.ingest_items_for_year(BENCH_YEAR, items)
+    seconds = time.perf_counter() - start
+
+    return {"docs": len(items), "seconds": round(seconds, 3), "docs_per_sec": round(len(items) / seconds, 2)}
+
+
+def bench_search_year(queries: list[str], k: int) -> dict:
+    # Cold cache so every query pays for its embedding, like a first-time query would
+    query_embedding_cache.clear()
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        vectordb_service.search_year(BENCH_YEAR, query, k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return latency_summary(latencies)
+
+
+def run(sizes: list[int], query_count: int, k: int, seed: int) -> dict:
+    report = {
+        "project": "StockMarketProject",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "embedding": model_name(vectordb_service.EMBEDDING),
+        "seed": seed,
+        "k": k,
+        "results": []
+    }
+
+    for size in sizes:
+        directory = isolated_vector_store(vectordb_service, f"retrieval_bench_{size}_")
+        corpus = make_corpus(size, seed)
+        queries = make_queries(corpus, query_count, seed)
+
+        result = {"size": size, "ingest_items_for_year": bench_ingest_items_for_year(corpus)}
+        result["search_year"] = bench_search_year(queries, k)
+        result["disk_bytes"] = directory_size(directory)
+        report["results"].append(result)
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline ingest/search benchmark for the per-year vector service")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--real-embeddings", action="store_true", help="use the configured Ollama model instead of the hash embedder")
+    parser.add_argument("--out", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    if not args.real_embeddings:
+        use_fake_embeddings(vectordb_service)
+
+    results = run(args.sizes, args.queries, args.k, args.seed)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as out_file:
+            json.dump(results, out_file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
@@ -1,13 +1,32 @@
 from fastapi import FastAPI
+from starlette.responses import JSONResponse
 from app.routers import stocks, price, chat, vector_ops
 from app.db import init_models
 from app.auth import router as auth_router
+from app.services.llm_gateway import LLMOverloadedError, llm_gateway
+from app.services.summary_cache import summary_cache
 
 app = FastAPI()
 
 @app.on_event("startup")
 async def startup_event():
     await init_models()
+    # Start summarizing the static files in the background, so /chatbot/trading-philosophy is ready before anyone asks
+    summary_cache.warm_up()
+
+# The shared LLM gateway is full - shed the request with a 503 and tell the client when to retry
+@app.exception_handler(LLMOverloadedError)
+async def llm_overloaded_exception_handler(request, exception: LLMOverloadedError):
+    return JSONResponse(
+        status_code=503,
+        content={"message": str(exception)},
+        headers={"Retry-After": str(exception.retry_after)},
+    )
+
+# How busy the shared LLM gateway is (queue depth, wait times, shed/coalesced requests)
+@app.get("/llm-gateway")
+async def llm_gateway_stats():
+    return llm_gateway.stats()
 
 app.include_router(stocks.route)
 app.include_router(price.route)
@@ -1,7 +1,8 @@
 from app.services.chain_service import get_memory_chain, get_session_messages, get_general_chain
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from pydantic import BaseModel
-from langchain_community.document_loaders import TextLoader, CSVLoader
+from app.services.document_cache import document_cache, load_csv, load_text
+from app.services.summary_cache import summary_cache
 
 
 
@@ -39,29 +40,42 @@ async def chat_with_memory(chat:ChatInputModel):
     message_memory = get_session_messages(session_id)
     return {"reply": reply, "message_memory": message_memory}
 
-@route.get("/trading-philosophy")
-async def summarize_warren_buffet_philosophy():
-
-    # Load in .txt file
-    loader = TextLoader("app/files_to_load/warren_buffet.txt")
-    docs = loader.load() # return a list of langchain Document objects
-
-    # Extract the text from the docs variable
-    warren_buffet_text = docs[0].page_content
-
-    return general_chain.invoke(
+# The philosophy file is static, so its summary is precomputed (at startup) and only redone when the file changes
+async def summarize_warren_buffet_text(warren_buffet_text: str):
+    return await general_chain.ainvoke(
         {
             "input": f"Concisely summarize the following text from Warren Buffet trading philosophy: "
             f"{warren_buffet_text}"
         }
     )
 
+# The summary cache loads the .txt file (through the document cache) and hashes it for us
+summary_cache.register("trading-philosophy", "app/files_to_load/warren_buffet.txt", summarize_warren_buffet_text)
+
+@route.get("/trading-philosophy")
+async def summarize_warren_buffet_philosophy(response: Response):
+
+    # "fresh" = cached summary of the current file, "stale" = file changed and a refresh is running,
+    # "cold" = first summary ever, so we had to wait for it
+    summary, status = await summary_cache.get("trading-philosophy")
+    response.headers["X-Summary-Cache"] = status
+    return summary
+
+# Which summaries are cached, and for which version of their file
+@route.get("/summary-cache")
+async def summary_cache_stats():
+    return summary_cache.stats()
+
+# How often the loaders in this router are served from memory vs read from disk
+@route.get("/document-cache")
+async def document_cache_stats():
+    return document_cache.stats()
+
 # ...existing code...
 @route.get("/Warren-Buffet-stock-recommendations")
 async def get_stock_recommendations():
-    # Load in .txt file
-    loader = TextLoader("app/files_to_load/warren_buffet.txt")
-    docs = loader.load()  # list[Document]
+    # Load in .txt file (cached)
+    docs = load_text("app/files_to_load/warren_buffet.txt")  # list[Document]
 
     # If the file is large, consider summarizing before using as context.
     warren_buffet_text = docs[0].page_content
@@ -91,19 +105,18 @@ async def get_stock_recommendations():
 @route.post("/stock-analysis")
 async def analyze_stock(chat:ChatInputModel):
 
-    # Load in .csv file
-    loader = CSVLoader("app/files_to_load/tech_performance.csv")
-    docs = loader.load()
+    # Load in .csv file (cached)
+    docs = load_csv("app/files_to_load/tech_performance.csv")
 
     # Convert the loaded documents into a single CSV string
     magnificent7_data_csv = "\n".join(doc.page_content for doc in docs)
 
     # Invoke the LLM with another small prompt encouraging data analysis
-    return general_chain.invoke(
+    return (await general_chain.ainvoke(
         {
             "input": f"Answer the following question based on the history performance of the magnificent seven stocks: "
                      f"{chat.input}"
                      f"Here's the stock data: "
                      f"{magnificent7_data_csv}"
         }
-    ).content
\ No newline at end of file
+    )).content
\ No newline at end of file
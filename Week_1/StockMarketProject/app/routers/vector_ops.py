@@ -10,6 +10,7 @@ from app.services.vectordb_service import (
     search_year,
 )
 from app.services.chain_service import get_general_chain
+from app.services.embedding_cache import query_embedding_cache
 
 router = APIRouter(prefix="/vectors", tags=["vectors"])
 
@@ -90,6 +91,16 @@ async def ingest_items(year: int, req: IngestItemsRequest):
 
 general_chain = get_general_chain()
 
+@router.get("/embedding-cache", response_model=Dict[str, Any])
+async def embedding_cache_stats():
+    """Hit/miss counters and size of the query-embedding cache."""
+    return query_embedding_cache.stats()
+
+@router.delete("/embedding-cache", response_model=Dict[str, int])
+async def flush_embedding_cache(model: Optional[str] = None):
+    """Flush cached query embeddings (all of them, or just one model's) after the embedding model changes."""
+    return {"flushed": query_embedding_cache.clear(model)}
+
 @router.get("/{year}/search", response_model=Dict[str, Any])
 async def search_year_endpoint(year: int, q: str, k: int = 3):
     """
@@ -1,10 +1,11 @@
 from langchain_classic.memory import ConversationBufferWindowMemory, ConversationSummaryMemory
-from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from typing import Dict, List, Any
 import asyncio
 
+from app.services.llm_gateway import get_llm
+
 # simple in-memory session store for message history
 _sessions_store: Dict[str, List[Any]] = {}
 
@@ -98,8 +99,9 @@ def get_session_messages(session_id: str) -> List[str]:
     # fallback
     return list(_sessions_store.get(session_id, []))
 
-llm = ChatOllama(
-    model="llama3.2:3b", # The model we're using (we installed llama3.2:3b)
+# get_llm() gives us a ChatOllama (llama3.2:3b) that goes through the shared LLM gateway (see llm_gateway.py),
+# so every LLM call in the app shares one concurrency limit
+llm = get_llm(
     temperature=0.2 # Temp goes from 0-1. Higher temp = more creativity
 )
 
@@ -0,0 +1,73 @@
+# This service keeps loaded files (as LangChain Document lists) in memory
+# so endpoints like /chat/plan-summary don't re-read and re-parse the same file on every request
+#
+# Every lookup does a cheap os.stat() - if the file's modification time or size changed since we
+# cached it, we reload it. So editing boss_plans.txt still shows up on the very next request
+import os
+import threading
+from typing import Any
+
+from langchain_community.document_loaders import CSVLoader, TextLoader
+from langchain_core.documents import Document
+
+
+class DocumentCache:
+
+    def __init__(self):
+        # key -> (mtime_ns, size, documents)
+        self._entries: dict[tuple, tuple[int, int, list[Document]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0 # first load of a file
+        self.reloads = 0 # file changed on disk, so we loaded it again
+
+    # Load a file with the given loader class, or return the cached Documents if the file hasn't changed
+    # Extra keyword args go to the loader (e.g. csv_args for CSVLoader) and are part of the cache key
+    def load(self, path: str, loader_class: type = TextLoader, **loader_kwargs: Any) -> list[Document]:
+        key = (os.path.abspath(path), loader_class.__name__, repr(sorted(loader_kwargs.items())))
+        stat = os.stat(path) # raises FileNotFoundError just like the loader would
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self.hits += 1
+                return list(entry[2]) # copy of the list, so callers can't change what's cached
+
+        # Load outside the lock - a slow file shouldn't block lookups for other files
+        documents = loader_class(path, **loader_kwargs).load()
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.reloads += 1
+            self._entries[key] = (stat.st_mtime_ns, stat.st_size, documents)
+
+        return list(documents)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.reloads = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads
+            }
+
+
+# One cache shared by every router in the app
+document_cache = DocumentCache()
+
+
+# Shortcuts for the two loaders our routes use
+def load_text(path: str) -> list[Document]:
+    return document_cache.load(path, TextLoader)
+
+
+def load_csv(path: str, **loader_kwargs: Any) -> list[Document]:
+    return document_cache.load(path, CSVLoader, **loader_kwargs)
@@ -0,0 +1,122 @@
+# This service keeps recently used QUERY embeddings in memory
+# Embedding a query means a round trip to Ollama, and the same queries come in over and over
+# (LangGraph nodes, /vector-ops endpoints, etc.) so we remember the vectors for a while
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+CACHE_MAX_SIZE = 1024 # How many query vectors we keep before evicting the least recently used
+CACHE_TTL_SECONDS = 60 * 60 # How long a cached vector stays valid (1 hour)
+
+
+# Normalize the query so "Moon Vaporizer?" and "  Moon   Vaporizer? " share a cache entry
+# Only the whitespace - case can change the embedding, and the vector we cache is the one for THIS exact text
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+
+# Figure out which model an embedding object uses, so entries from different models never mix
+def model_name(embedding: Any) -> str:
+    return getattr(embedding, "model", None) or type(embedding).__name__
+
+
+class EmbeddingCache:
+    """
+    A bounded LRU cache from (model name, normalized query text) to the embedding vector.
+    Entries are evicted when the cache is full (least recently used first) or when they are older than the TTL.
+    """
+
+    def __init__(self, max_size: int = CACHE_MAX_SIZE, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        # OrderedDict remembers insertion order, so we can move hits to the end and pop from the front
+        self._entries: OrderedDict[tuple[str, str], tuple[float, list[float]]] = OrderedDict()
+        self._lock = threading.Lock() # FastAPI runs sync code in a threadpool, so guard the dict
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, model: str, query: str) -> list[float] | None:
+        key = (model, normalize_query(query))
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, vector = entry
+
+            # Expired? Drop it and treat it like a miss
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+
+            # Mark as recently used
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, model: str, query: str, vector: list[float]) -> None:
+        key = (model, normalize_query(query))
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+
+            # Evict the least recently used entries until we're back under the size limit
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # Flush the cache (call this when the embedding model changes)
+    # If a model name is passed in, only that model's entries are dropped
+    def clear(self, model: str | None = None) -> int:
+        with self._lock:
+            if model is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                stale_keys = [key for key in self._entries if key[0] == model]
+                for key in stale_keys:
+                    del self._entries[key]
+                removed = len(stale_keys)
+
+        return removed
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
+
+# Single shared instance (singleton) - every search in the app goes through this one
+query_embedding_cache = EmbeddingCache()
+
+
+# Get the embedding for a query, only calling the embedding model on a cache miss
+# The normalized query is what gets embedded, so every query sharing a cache entry really has that vector
+# (not whichever spelling happened to be asked first)
+def get_query_embedding(query: str, embedding: Any) -> list[float]:
+    model = model_name(embedding)
+    query = normalize_query(query)
+
+    vector = query_embedding_cache.get(model, query)
+    if vector is None:
+        vector = embedding.embed_query(query)
+        query_embedding_cache.put(model, query, vector)
+
+    return vector
@@ -0,0 +1,271 @@
+# This service is the ONE door every LLM call in the app goes through
+# There's a single local Ollama server. If 20 requests hit it at once, all 20 get slow together -
+# so instead we:
+#   - only let LLM_MAX_CONCURRENCY generations run at the same time (admission control)
+#   - make the rest wait in a line of at most LLM_MAX_QUEUE requests
+#   - turn away anything beyond that right away (LLMOverloadedError -> 503 + Retry-After) instead of
+#     letting it pile up, and give up on requests that waited longer than LLM_QUEUE_TIMEOUT_SECONDS
+#   - let identical prompts that are already being generated share that ONE generation (coalescing)
+#
+# Use get_llm() instead of ChatOllama(...) - it returns a ChatOllama that goes through the gateway,
+# so chains, bind_tools, streaming etc. all work exactly like before
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Iterator
+
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_ollama import ChatOllama
+
+LLM_MODEL = os.getenv("LLM_MODEL", "llama3.2:3b")
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2")) # generations running at once
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "16")) # requests allowed to wait for a slot
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "60"))
+LLM_RETRY_AFTER_SECONDS = int(os.getenv("LLM_RETRY_AFTER_SECONDS", "5")) # what we tell shed clients
+LLM_WAIT_WINDOW = 1000 # how many recent queue wait times we keep for the percentiles
+
+
+class LLMOverloadedError(Exception):
+    """Raised when the LLM queue is full (or a request waited too long). The app turns it into a 503."""
+
+    def __init__(self, message: str, retry_after: int = LLM_RETRY_AFTER_SECONDS):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMGateway:
+    """
+    Admission control + coalescing for LLM calls.
+    Works for both async callers (ainvoke/astream) and sync callers (invoke/stream, which run in threads),
+    so they all share the same concurrency limit and the same line.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        max_queue: int = LLM_MAX_QUEUE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT_SECONDS
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._lock = threading.Lock()
+        self._active = 0
+        # The line: each waiter has a grant() that hands it the slot (and returns False if it already gave up)
+        self._waiters: deque = deque()
+        # prompt key -> the future of the generation that's already running for it
+        self._inflight: dict[str, asyncio.Future] = {}
+
+        self.admitted = 0
+        self.rejected = 0 # queue was full
+        self.timed_out = 0 # waited too long
+        self.coalesced = 0 # shared someone else's generation
+        self._wait_ms: deque = deque(maxlen=LLM_WAIT_WINDOW)
+
+    # Take a free slot, or get in line. Returns a waiter if we have to wait, None if we got a slot right away
+    def _admit_or_enqueue(self, waiter) -> Any:
+        with self._lock:
+            if self._active < self.max_concurrency and not self._waiters:
+                self._active += 1
+                self.admitted += 1
+                self._wait_ms.append(0.0)
+                return None
+
+            if len(self._waiters) >= self.max_queue:
+                self.rejected += 1
+                raise LLMOverloadedError(f"LLM queue is full ({self.max_queue} waiting)")
+
+            self._waiters.append(waiter)
+            return waiter
+
+    # A waiter gave up (timeout/cancel) - True if it was still in line, False if it had already been given a slot
+    def _leave_queue(self, waiter) -> bool:
+        with self._lock:
+            try:
+                self._waiters.remove(waiter)
+                return True
+            except ValueError:
+                return False
+
+    def _release(self) -> None:
+        with self._lock:
+            # Hand our slot straight to the next waiter in line (the active count stays the same)
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if waiter.grant():
+                    self.admitted += 1
+                    return
+            self._active -= 1
+
+    def _record_wait(self, started: float) -> None:
+        with self._lock:
+            self._wait_ms.append((time.perf_counter() - started) * 1000)
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        started = time.perf_counter()
+        waiter = self._admit_or_enqueue(_AsyncWaiter(asyncio.get_running_loop()))
+
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as error:
+                if not self._leave_queue(waiter):
+                    self._release() # we were handed a slot at the last moment - give it back
+                if isinstance(error, asyncio.CancelledError):
+                    raise
+                with self._lock:
+                    self.timed_out += 1
+                raise LLMOverloadedError(f"waited more than {self.queue_timeout}s for the LLM") from None
+            self._record_wait(started)
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    @contextmanager
+    def admit_sync(self) -> Iterator[None]:
+        started = time.perf_counter()
+        waiter = self._admit_or_enqueue(_ThreadWaiter())
+
+        if waiter is not None:
+            if not waiter.event.wait(self.queue_timeout):
+                if not self._leave_queue(waiter):
+                    self._release()
+                with self._lock:
+                    self.timed_out += 1
+                raise LLMOverloadedError(f"waited more than {self.queue_timeout}s for the LLM")
+            self._record_wait(started)
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    # Run a generation, unless the exact same one is already running - then wait for that one instead
+    async def coalesce(self, key: str, generate) -> Any:
+        running = self._inflight.get(key)
+        if running is not None:
+            with self._lock:
+                self.coalesced += 1
+            try:
+                return await asyncio.shield(running)
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    raise # WE were cancelled
+                # The generation we were sharing got cancelled (its caller hung up) - run our own below
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await generate()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            future.exception() # mark it retrieved, in case nobody else was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._wait_ms)
+
+            def percentile(pct: float) -> float:
+                return round(waits[min(len(waits) - 1, int(pct / 100 * len(waits)))], 1) if waits else 0.0
+
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queue_depth": len(self._waiters),
+                "inflight_prompts": len(self._inflight),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "coalesced": self.coalesced,
+                "wait_p50_ms": percentile(50),
+                "wait_p99_ms": percentile(99)
+            }
+
+
+class _AsyncWaiter:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+
+    def grant(self) -> bool:
+        if self.future.done():
+            return False
+        # _release may run on another thread (sync callers), so hop onto the waiter's event loop
+        self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(True))
+        return True
+
+
+class _ThreadWaiter:
+    def __init__(self):
+        self.event = threading.Event()
+
+    def grant(self) -> bool:
+        self.event.set()
+        return True
+
+
+# The one gateway the whole app shares
+llm_gateway = LLMGateway()
+
+
+# Identical prompt + settings -> identical key
+def prompt_key(model: ChatOllama, messages: list[BaseMessage], stop: list[str] | None, kwargs: dict[str, Any]) -> str:
+    payload = {
+        "model": model.model,
+        "temperature": model.temperature,
+        "format": model.format,
+        "messages": [(message.type, message.content, getattr(message, "tool_calls", None)) for message in messages],
+        "stop": stop,
+        "kwargs": kwargs
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class GatewayChatOllama(ChatOllama):
+    """ChatOllama whose generations go through llm_gateway."""
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        async def generate() -> ChatResult:
+            async with llm_gateway.admit():
+                return await super(GatewayChatOllama, self)._agenerate(messages, stop, run_manager, **kwargs)
+
+        return await llm_gateway.coalesce(prompt_key(self, messages, stop, kwargs), generate)
+
+    # Streams aren't coalesced (each client wants its own tokens as they come), but they still wait their turn
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        async with llm_gateway.admit():
+            async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+                yield chunk
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        with llm_gateway.admit_sync():
+            return super()._generate(messages, stop, run_manager, **kwargs)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        with llm_gateway.admit_sync():
+            yield from super()._stream(messages, stop, run_manager, **kwargs)
+
+
+# Use this instead of ChatOllama(...) everywhere in the app
+def get_llm(temperature: float = 0.2, **kwargs: Any) -> GatewayChatOllama:
+    return GatewayChatOllama(model=LLM_MODEL, temperature=temperature, **kwargs)
@@ -0,0 +1,125 @@
+# This service precomputes LLM summaries of static files (like warren_buffet.txt)
+# Summarizing a file takes seconds, but the answer only changes when the file changes
+#
+# How it works:
+#   - Each summary is stored with the sha256 hash of the file content it was made from
+#   - At startup (warm_up) every registered summary is computed in the background
+#   - On a request, if the file content still has the same hash -> serve the stored summary ("fresh")
+#   - If the file changed -> start a background refresh, but serve the previous summary right away ("stale")
+#   - If there's no summary yet -> wait for it to be computed ("cold") - only the very first request pays this
+import asyncio
+import hashlib
+import time
+from typing import Any, Awaitable, Callable
+
+from app.services.document_cache import load_text
+
+Summarizer = Callable[[str], Awaitable[Any]]
+
+
+class SummaryCache:
+
+    def __init__(self):
+        # name -> (path, summarize function)
+        self._sources: dict[str, tuple[str, Summarizer]] = {}
+        # name -> {"hash": ..., "summary": ..., "updated_at": ...}
+        self._entries: dict[str, dict[str, Any]] = {}
+        # name -> the refresh task that is currently running (at most one per summary)
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    # Tell the cache which file a summary comes from, and how to summarize it
+    def register(self, name: str, path: str, summarize: Summarizer) -> None:
+        self._sources[name] = (path, summarize)
+
+    # Returns (summary, status) where status is "fresh", "stale" or "cold"
+    async def get(self, name: str) -> tuple[Any, str]:
+        path, _ = self._sources[name]
+        text, content_hash = read_with_hash(path)
+        entry = self._entries.get(name)
+
+        if entry is not None and entry["hash"] == content_hash:
+            self.hits += 1
+            return entry["summary"], "fresh"
+
+        task = self._start_refresh(name, text, content_hash)
+
+        # The file changed - answer with the old summary now, the new one is on its way
+        if entry is not None:
+            self.stale_hits += 1
+            return entry["summary"], "stale"
+
+        # Nothing cached yet - we have to wait for the (possibly already running) summary
+        self.misses += 1
+        await asyncio.shield(task) # shield: a client hanging up shouldn't cancel the shared refresh
+        return self._entries[name]["summary"], "cold"
+
+    # Kick off a background summary of every registered file (call this at app startup)
+    def warm_up(self) -> None:
+        for name, (path, _) in self._sources.items():
+            try:
+                text, content_hash = read_with_hash(path)
+            except OSError as error:
+                print(f"[SUMMARY] can't warm up '{name}': {error}")
+                continue
+            self._start_refresh(name, text, content_hash)
+
+    # Start a refresh for this content, unless one is already running for the same content
+    def _start_refresh(self, name: str, text: str, content_hash: str) -> asyncio.Task:
+        task = self._refreshing.get(name)
+        if task is not None and not task.done() and task.content_hash == content_hash:
+            return task
+
+        task = asyncio.create_task(self._refresh(name, text, content_hash))
+        task.content_hash = content_hash
+        # Background failures are already logged in _refresh - mark them as handled so asyncio doesn't complain
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._refreshing[name] = task
+        return task
+
+    async def _refresh(self, name: str, text: str, content_hash: str) -> None:
+        _, summarize = self._sources[name]
+        start = time.perf_counter()
+
+        try:
+            summary = await summarize(text)
+        except Exception as error:
+            # Keep serving the previous summary (if any) - the next request will try again
+            print(f"[SUMMARY] refresh of '{name}' failed: {error}")
+            raise
+        finally:
+            # If the file changed again while we were summarizing, a newer refresh replaced us
+            is_latest = self._refreshing.get(name) is asyncio.current_task()
+            if is_latest:
+                del self._refreshing[name]
+
+        # Don't let an outdated refresh overwrite a newer summary (but anything beats no summary)
+        if not is_latest and name in self._entries:
+            return
+
+        self._entries[name] = {"hash": content_hash, "summary": summary, "updated_at": time.time()}
+        print(f"[SUMMARY] '{name}' refreshed in {time.perf_counter() - start:.2f}s")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "summaries": {
+                name: {"hash": entry["hash"][:12], "updated_at": entry["updated_at"]}
+                for name, entry in self._entries.items()
+            },
+            "refreshing": [name for name, task in self._refreshing.items() if not task.done()],
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses
+        }
+
+
+# Read a text file (through the document cache) and hash its content
+def read_with_hash(path: str) -> tuple[str, str]:
+    text = load_text(path)[0].page_content
+    return text, hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# One cache shared by the whole app
+summary_cache = SummaryCache()
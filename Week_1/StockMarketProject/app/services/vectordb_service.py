@@ -3,13 +3,21 @@ from langchain_community.embeddings import OllamaEmbeddings
 from typing import List, Dict, Any, Optional
 from langchain_core.documents import Document
 
+import os
 import uuid
 import json
 
+from app.services.embedding_cache import get_query_embedding
+from app.services.fake_embeddings import HashEmbeddings
+
 PERSIST_DIRECTORY = "app/chroma_store" # Where the DB will be stored on disk
 COLLECTION = "macro_reports" # What kind of data we're storing (like the tables in SQL)
 EMBEDDING = OllamaEmbeddings(model="nomic-embed-text") # The embedding model to use 
 
+# Set FAKE_EMBEDDINGS=1 to swap in the deterministic hash-based embedder (no Ollama needed - benchmarks use this)
+if os.getenv("FAKE_EMBEDDINGS"):
+    EMBEDDING = HashEmbeddings()
+
 # The actual chroma vector store itself  is a dict that holds Chroma instances
 # This allows us to manage multiple collections at once
 vector_store: dict[str, Chroma] = {}
@@ -158,13 +166,13 @@ def search_year(year: int, query: str, k: int = 3) -> List[Dict[str, Any]]:
     collection = _collection_for_year(year)
     db = get_vector_store(collection)
 
-    # try high-level similarity_search if available
+    # prefer searching by vector so the query embedding can come from the LRU cache
     results = []
-    if hasattr(db, "similarity_search"):
-        docs = db.similarity_search(query, k=k)
-    elif hasattr(db, "similarity_search_by_vector"):
-        vec = EMBEDDING.embed_query(query)
+    if hasattr(db, "similarity_search_by_vector"):
+        vec = get_query_embedding(query, EMBEDDING)
         docs = db.similarity_search_by_vector(vec, k=k)
+    elif hasattr(db, "similarity_search"):
+        docs = db.similarity_search(query, k=k)
     else:
         # fallback: return empty
         docs = []
@@ -1,4 +1,3 @@
-import axios from "axios"
 import { useState } from "react"
 import { Button, Card, Form } from "react-bootstrap"
 
@@ -9,33 +8,76 @@ export const Chat:React.FC = () => {
     const [output, setOutput] = useState<string>("")
     // One more state object to track whether the LLM response is loading 
     const [loading, setLoading] = useState<boolean>(false)
+    // Each browser tab gets its own conversation memory on the backend
+    const [sessionId] = useState<string>(() => crypto.randomUUID())
 
-    // Function that sends the chat and captures the response 
-
-    // Function that sends the chat and captures the response
+    // Function that sends the chat and streams the response in token by token
     const sendMessage = async () => {
 
         //set loading to true as the LLM response load 
         setLoading(true)
-        const response = await axios.post("http://127.0.0.1:8000/chat/memory-chat", {input:input})
-
-        //print out the response just to see it 
-        console.log(response)
-
-        //set the response in state, wipe the input state 
-        setOutput(response.data.response)
-        /* response.data.response?? wut
-
-           response 1 is the actual HTTP response
-           data is the data within the HTTP response
-           response 2 is the field in data called "response" 
-        */
-
-        setInput("")
-        setLoading(false)
-
-        //temporary, to delete 
-        alert(output) 
+        setOutput("")
+
+        // try/finally so the button ALWAYS comes back, even if the request or the stream fails halfway
+        try {
+            // We use fetch instead of axios here because fetch lets us read the response body AS IT ARRIVES
+            // The backend sends Server-Sent Events: "data: {"token": "..."}" messages separated by blank lines
+            const response = await fetch("http://127.0.0.1:8000/chat/memory-chat/stream", {
+                method: "POST",
+                headers: {"Content-Type": "application/json"},
+                body: JSON.stringify({input:input, session_id:sessionId})
+            })
+
+            // Unlike axios, fetch doesn't throw on a 4xx/5xx response - check it ourselves
+            if (!response.ok || !response.body) {
+                throw new Error(`the server answered ${response.status} ${response.statusText}`)
+            }
+
+            const reader = response.body.getReader()
+            const decoder = new TextDecoder()
+            let buffer = ""
+
+            while (true) {
+                const {done, value} = await reader.read()
+                if (done) break
+
+                // Chunks don't always line up with messages, so keep any partial message in the buffer
+                buffer += decoder.decode(value, {stream: true})
+                const messages = buffer.split("\n\n")
+                buffer = messages.pop() ?? ""
+
+                for (const message of messages) {
+                    const data = message.split("\n").find((line) => line.startsWith("data: "))
+                    if (!data) continue
+
+                    const payload = JSON.parse(data.slice(6))
+
+                    // The final "done" event has timings instead of a token
+                    if (message.startsWith("event: done")) {
+                        console.log(`time to first token: ${payload.ttft_ms}ms, total: ${payload.total_ms}ms`)
+                    } else if (message.startsWith("event: error")) {
+                        // Either the backend is too busy right now (it tells us how long to wait before trying again),
+                        // or the answer broke off halfway
+                        setOutput(payload.retry_after !== undefined
+                            ? `The assistant is busy, try again in ${payload.retry_after} seconds`
+                            : `Something went wrong: ${payload.error}`)
+                    } else {
+                        //append each token to the output as soon as it arrives
+                        setOutput((previous) => previous + payload.token)
+                    }
+                }
+            }
+
+            setInput("")
+        } catch (error) {
+            // Network down, server error, stream cut off... show it instead of leaving the chat hanging
+            console.error(error)
+            // (anything that already streamed in stays on screen)
+            const reason = error instanceof Error ? error.message : String(error)
+            setOutput((previous) => `${previous ? previous + "\n\n" : ""}Something went wrong: ${reason}`)
+        } finally {
+            setLoading(false)
+        }
     }
 
     return(